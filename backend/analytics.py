@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+from models import db, Department
+import rollup
+import ticket_log
+
+
+RESOLVED = 'Resolved'
+PRIORITIES = ('Urgent', 'Medium', 'Low')
+
+
+def _in_priority_order(counts):
+    rank = {priority: i for i, priority in enumerate(PRIORITIES)}
+    return dict(sorted(counts.items(), key=lambda item: rank.get(item[0], len(PRIORITIES))))
+
+
+def _satisfaction_bucket(rating):
+    # 5 = Happy, 3-4 = Neutral, 1-2 = Unhappy
+    if rating == 5:
+        return 'Happy'
+    if rating >= 3:
+        return 'Neutral'
+    return 'Unhappy'
+
+
+def dashboard_stats(days=7):
+    """Aggregates behind the GM dashboard charts.
+
+    Reads the StatsRollup counters, so the cost is a few lookups sized by
+    the number of departments rather than by the ticket table.
+    """
+    departments = Department.query.order_by(Department.id).all()
+
+    # Department x status counts give both issues per dept and dept load
+    per_dept = {}
+    for (dept_id, status), (count, _) in rollup.counters('dept_status').items():
+        per_dept.setdefault(dept_id, {})[status] = count
+
+    issues_per_dept = [
+        {'name': d.name, 'count': sum(per_dept.get(str(d.id), {}).values())} for d in departments
+    ]
+    dept_load = [
+        {'name': d.name, 'active_tickets': per_dept.get(str(d.id), {}).get('In Progress', 0)} for d in departments
+    ]
+
+    # Tenant satisfaction from the rating histogram
+    buckets = {'Happy': 0, 'Neutral': 0, 'Unhappy': 0}
+    for (rating, _), (count, _) in rollup.counters('rating').items():
+        buckets[_satisfaction_bucket(int(rating))] += count
+    satisfaction = [{'name': name, 'value': value} for name, value in buckets.items()]
+
+    # Avg time to fix per day, measured from accepted_at (falling back to created_at)
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=days - 1)
+    per_day = {day: totals for (day, _), totals in rollup.counters('resolved_day', since=first_day.isoformat()).items()}
+
+    avg_time = []
+    for i in range(days):
+        day = first_day + timedelta(days=i)
+        count, total_seconds = per_day.get(day.isoformat(), (0, 0))
+        avg_time.append({
+            'day': day.strftime('%a'), # Mon, Tue
+            'full_date': day.strftime('%Y-%m-%d'),
+            'hours': round((total_seconds / count) / 3600, 1) if count > 0 else 0
+        })
+
+    return {
+        'issues_per_dept': issues_per_dept,
+        'satisfaction': satisfaction,
+        'avg_time': avg_time,
+        'dept_load': dept_load
+    }
+
+
+def ticket_breakdown():
+    """Every ticket counted by status, department and priority.
+
+    One read of the 'ticket_mix' rollup counters (department x status x
+    priority, a few dozen rows) answers every breakdown below. Open means
+    not yet resolved. Departments are ranked by open tickets.
+    """
+    names = dict(db.session.query(Department.id, Department.name).order_by(Department.id))
+    departments = {dept_id: {'name': name, 'total': 0, 'open': 0, 'by_status': {}, 'open_by_priority': {}}
+                   for dept_id, name in names.items()}
+    by_status, by_priority = {}, {}
+    total = unassigned = 0
+    for (dept_key, mix), (count, _) in rollup.counters('ticket_mix').items():
+        if not count:
+            continue
+        status, priority = mix.split('|', 1)
+        is_open = status != RESOLVED
+        total += count
+        by_status[status] = by_status.get(status, 0) + count
+        counts = by_priority.setdefault(priority, {'total': 0, 'open': 0})
+        counts['total'] += count
+        counts['open'] += count if is_open else 0
+        dept = departments.get(int(dept_key)) if dept_key else None
+        if dept is None:
+            unassigned += count if is_open else 0
+            continue
+        dept['total'] += count
+        dept['by_status'][status] = dept['by_status'].get(status, 0) + count
+        if is_open:
+            dept['open'] += count
+            dept['open_by_priority'][priority] = dept['open_by_priority'].get(priority, 0) + count
+
+    for dept in departments.values():
+        dept['open_by_priority'] = _in_priority_order(dept['open_by_priority'])
+    resolved = by_status.get(RESOLVED, 0)
+    return {
+        'total': total,
+        'open': total - resolved,
+        'resolved': resolved,
+        'unassigned_open': unassigned,
+        'by_status': by_status,
+        'by_priority': _in_priority_order(by_priority),
+        # Stable sort keeps department id order among equals
+        'departments': sorted(departments.values(), key=lambda d: -d['open']),
+    }
+
+
+def average_rating():
+    """Mean feedback rating from the rollup's rating histogram, None before any feedback."""
+    histogram = rollup.counters('rating')
+    count = sum(c for c, _ in histogram.values())
+    return sum(int(rating) * c for (rating, _), (c, _) in histogram.items()) / count if count else None
+
+
+def workflow_stats(days=30):
+    """Time in each status, rework and staff throughput over the last ``days``.
+
+    Read from the ticket event log, one indexed range scan per figure.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    return {
+        'days': days,
+        'time_in_state': ticket_log.time_in_state(since),
+        'rework': ticket_log.rework(since),
+        'staff_throughput': ticket_log.staff_throughput(since)
+    }
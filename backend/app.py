@@ -1,45 +1,133 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, url_for
 from flask_restful import Api, Resource
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from flask_cors import CORS
-from models import db, User, Ticket, Department, RecurringTask
+from flask_migrate import Migrate
+import click
+from models import db, User, Ticket, TicketArchive, Department, RecurringTask
+from ticket_queries import DEFAULT_PAGE_SIZE, FALSY, MAX_PAGE_SIZE, QueryError, apply_filters, paginate, scoped_query
+from analytics import dashboard_stats, workflow_stats
+import rollup
+import ticket_log
+import bulk_actions
+import assignment
+import workflow
+import sla
+import archive
+from workflow import TransitionError
+import hubai
+import uploads
+import media
+import events
+import changes
+import conditional
+import cache
+import sqlite_profile
+import database
+import serialization
+from serialization import encode_tickets, ticket_rows
+from database import read_only
+from writer import writes
+from scheduler import POLICIES, parse_frequency, run_due, scheduler
 from datetime import datetime, timedelta
 import os
 import json
-import re
-
-from werkzeug.utils import secure_filename
-import time
+import threading
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hubops.db'
+app.request_class = uploads.UploadRequest
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///hubops.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Optional streaming replica for the read-heavy views (see database.py)
+app.config['DATABASE_READ_URL'] = os.environ.get('DATABASE_READ_URL')
+# Connection pool outside SQLite: connections kept open, extra ones allowed
+# under load, seconds to wait for one, and seconds before one is replaced
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
 app.config['JWT_SECRET_KEY'] = 'super-secret-key'  # Change this in production
 app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'uploads')
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_BYTES', 512 * 1024 * 1024))
+# Let the front web server stream upload bodies: 'x-sendfile' or 'x-accel' (nginx)
+app.config['UPLOADS_OFFLOAD'] = os.environ.get('UPLOADS_OFFLOAD')
+app.config['UPLOADS_ACCEL_PREFIX'] = os.environ.get('UPLOADS_ACCEL_PREFIX', '/protected-uploads/')
+app.config['USE_X_SENDFILE'] = app.config['UPLOADS_OFFLOAD'] == 'x-sendfile'
+# Threads per process generating thumbnails; 0 leaves it to `flask media-worker`
+app.config['MEDIA_WORKERS'] = int(os.environ.get('MEDIA_WORKERS', 2))
+# SQLite tuning (see sqlite_profile.py); 'off' keeps the stock settings
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'production')
+# Per-PRAGMA overrides of the profile, e.g. SQLITE_BUSY_TIMEOUT=10000
+for _pragma in sqlite_profile.PRODUCTION:
+    app.config[sqlite_profile.setting(_pragma)] = os.environ.get(sqlite_profile.setting(_pragma))
+# Funnel ticket writes through one batching writer thread per process (SQLite only)
+app.config['WRITE_QUEUE'] = os.environ.get('WRITE_QUEUE', '1') not in ('0', 'false', 'no', 'off')
+# Response cache for lists and stats: seconds to keep entries (0 disables),
+# entries per process, or a Redis URL to share them between workers
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 30))
+app.config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('RESPONSE_CACHE_SIZE', 512))
+app.config['RESPONSE_CACHE_URL'] = os.environ.get('RESPONSE_CACHE_URL')
+# Redis URL shared by all workers for /tickets/stream; unset keeps events in-process
+app.config['EVENTS_BROKER_URL'] = os.environ.get('EVENTS_BROKER_URL')
+# JSON encoder for API responses: 'auto' (orjson if installed), 'orjson' or 'json'
+app.config['JSON_SERIALIZER'] = os.environ.get('JSON_SERIALIZER', 'auto')
+# Fire recurring tasks, flag SLA breaches and archive old tickets from background threads (see wsgi.py and __main__)
+app.config['SCHEDULER_ENABLED'] = os.environ.get('SCHEDULER_ENABLED', '1') not in ('0', 'false', 'no', 'off')
+# Also run those timers in wsgi.py. Every gunicorn worker imports it, so set
+# this with one worker only; with more, run `flask run-timers` once instead
+app.config['HUBOPS_RUN_TIMERS'] = os.environ.get('HUBOPS_RUN_TIMERS', '0') not in ('0', 'false', 'no', 'off')
+# Longest the SLA sweeper sleeps between looks at the deadlines, in seconds
+app.config['SLA_SWEEP_SECONDS'] = int(os.environ.get('SLA_SWEEP_SECONDS', 60))
+# Days a resolved ticket stays in the ticket table before archive.py moves it (0 keeps them all)
+app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+database.init_app(app)
 db.init_app(app)
+sqlite_profile.init_app(app)
+writes.init_app(app)
+events.init_app(app)
+cache.init_app(app)
+migrate = Migrate(app, db, render_as_batch=True)
 api = Api(app)
+serialization.init_app(app, api)
 jwt = JWTManager(app)
-CORS(app)
+CORS(app, expose_headers=['X-Total-Count', 'X-Next-Cursor', 'X-Change-Seq'])
 
 # --- Uploads & Static ---
-@app.route('/uploads/<filename>')
+# Content-addressed files live under ab/cd/, older uploads at the top level
+@app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return uploads.serve(filename)
+
+app.teardown_request(uploads.discard_pending)
 
 class UploadFile(Resource):
     def post(self):
-        if 'file' not in request.files:
-            return {'message': 'No file part'}, 400
-        file = request.files['file']
-        if file.filename == '':
-            return {'message': 'No selected file'}, 400
-        if file:
-            filename = secure_filename(file.filename)
-            unique_filename = f"{int(time.time())}_{filename}"
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
-            return {'url': f"http://localhost:5000/uploads/{unique_filename}"}, 201
+        # Multipart form (as the dashboards send it) or a raw body with ?filename=
+        if request.mimetype == 'multipart/form-data':
+            if 'file' not in request.files:
+                return {'message': 'No file part'}, 400
+            file = request.files['file']
+            if file.filename == '':
+                return {'message': 'No selected file'}, 400
+            hashed, filename = file.stream, file.filename
+        else:
+            filename = request.args.get('filename', '')
+            if not filename:
+                return {'message': 'No selected file'}, 400
+            hashed = uploads.stream_to_file(request.stream)
+
+        path, deduplicated = uploads.store(hashed, filename)
+        media.enqueue(path)
+        url = url_for('uploaded_file', filename=path, _external=True)
+        return {
+            'url': url,
+            'thumbnail_url': uploads.thumbnail_url(url),
+            'sha256': hashed.sha256.hexdigest(),
+            'size': hashed.size,
+            'deduplicated': deduplicated
+        }, 201
 
 # --- Auth Resources ---
 class Login(Resource):
@@ -77,163 +165,188 @@ class Login(Resource):
 
 # --- Ticket Resources ---
 class TicketList(Resource):
+    @read_only
     @jwt_required()
     def get(self):
         current_user = json.loads(get_jwt_identity())
-        role = current_user['role']
-        
-        if role == 'tenant':
-            # Tenants see their own tickets (or all for demo simplicity if we want)
-            # For demo, let's show all tickets created by "Tenant User"
-            tickets = Ticket.query.order_by(Ticket.created_at.desc()).all()
-        elif role == 'gm':
-            # GM sees all tickets
-            tickets = Ticket.query.order_by(Ticket.created_at.desc()).all()
-        elif role == 'dept':
-            # Dept sees tickets assigned to their dept
-            dept_id = current_user['dept_id']
-            tickets = Ticket.query.filter_by(assigned_dept_id=dept_id).order_by(Ticket.created_at.desc()).all()
-        elif role == 'staff':
-            # Staff sees tickets assigned to them OR tickets for their department (optional, but good for visibility)
-            # For now, let's show tickets assigned to their department so they can see the pool if needed, 
-            # or just their assignments. The dashboard filters them anyway.
-            dept_id = current_user['dept_id']
-            tickets = Ticket.query.filter_by(assigned_dept_id=dept_id).order_by(Ticket.created_at.desc()).all()
-        else:
-            tickets = []
-
-        return [t.to_dict() for t in tickets], 200
+        # ?archived=1 lists tickets archive.py moved out of the ticket table
+        archived = request.args.get('archived', '0').lower() not in FALSY
+        model = TicketArchive if archived else Ticket
+        endpoint = 'tickets-archive' if archived else 'tickets'
+        query = scoped_query(current_user, model)
+        if query is None:
+            return [], 200
+
+        # gm and tenant lists are identical, dept and staff follow their department.
+        # seq is read before listing: anything changed meanwhile shows up
+        # again in /tickets/changes?since= rather than being missed.
+        scope = changes.ticket_scope(current_user)
+        seq, version = changes.versions(changes.SEQUENCE, scope)
+        tag = conditional.etag(endpoint, scope, version)
+        cached = conditional.not_modified(tag)
+        if cached:
+            return cached
+
+        # Page through with ?limit=&cursor=; the next cursor and the total
+        # (unless ?count=false) come back in headers so the body stays a list.
+        def page():
+            rows, next_cursor, total = paginate(apply_filters(query, request.args, model), request.args,
+                                                select=lambda q: ticket_rows(q, model), model=model)
+            headers = {'X-Change-Seq': str(seq)}
+            if next_cursor:
+                headers['X-Next-Cursor'] = next_cursor
+            if total is not None:
+                headers['X-Total-Count'] = str(total)
+            # ?format=columns sends {"fields": [...], "rows": [[...], ...]}
+            return encode_tickets(rows, columns=request.args.get('format') == 'columns'), headers
+
+        try:
+            body, headers = cache.cached(endpoint, scope, version, [scope], page)
+        except QueryError as e:
+            return {'message': str(e)}, 400
+        return body, 200, {**headers, **conditional.headers(tag)}
 
     @jwt_required()
     def post(self):
         data = request.get_json()
         current_user = json.loads(get_jwt_identity())
         
-        new_ticket = Ticket(
-            tenant_name=current_user['username'], # Or from input if anonymous
-            anonymous=data.get('anonymous', False),
-            type=data.get('type'),
-            priority=data.get('priority'),
-            photo_url=data.get('photo_url'), # In real app, handle upload separately
-            description=data.get('description'),
-            status='Pending Approval'
-        )
-        
-        
-        # Auto-assignment removed to enforce GM approval
-        # dept_name = data.get('type')
-        # if dept_name:
-        #     dept = Department.query.filter_by(name=dept_name).first()
-        #     if dept:
-        #         new_ticket.assigned_dept_id = dept.id
-        #         new_ticket.status = 'Assigned' # Auto-assign to dept
-
-        db.session.add(new_ticket)
-        db.session.commit()
-        return new_ticket.to_dict(), 201
+        def create():
+            new_ticket = Ticket(
+                tenant_name=current_user['username'], # Or from input if anonymous
+                anonymous=data.get('anonymous', False),
+                type=data.get('type'),
+                priority=data.get('priority'),
+                photo_url=data.get('photo_url'), # In real app, handle upload separately
+                description=data.get('description'),
+                status='Pending Approval'
+            )
+
+            # Auto-assignment removed to enforce GM approval
+            # dept_name = data.get('type')
+            # if dept_name:
+            #     dept = Department.query.filter_by(name=dept_name).first()
+            #     if dept:
+            #         new_ticket.assigned_dept_id = dept.id
+            #         new_ticket.status = 'Assigned' # Auto-assign to dept
+
+            db.session.add(new_ticket)
+            ticket_log.record(new_ticket, 'create', current_user)
+            return lambda: (new_ticket.to_dict(), 201)
+
+        return writes.submit(create)
+
+class TicketChanges(Resource):
+    @jwt_required()
+    def get(self):
+        # Delta sync: tickets written after ?since= (a change_seq from an
+        # earlier response or stream event) and ids that left the caller's
+        # view. Clients drop 'removed' ids, then upsert 'tickets', and ask
+        # again from the returned 'seq' while 'has_more' is set. A first
+        # load belongs on GET /tickets, which also returns X-Change-Seq.
+        current_user = json.loads(get_jwt_identity())
+        query = scoped_query(current_user)
+        if query is None:
+            return {'seq': 0, 'tickets': [], 'removed': [], 'has_more': False}, 200
+        try:
+            since = int(request.args.get('since', 0))
+            limit = max(1, min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        except ValueError:
+            return {'message': "Invalid 'since' or 'limit'"}, 400
+        if since < 0:
+            return {'message': "Invalid 'since' or 'limit'"}, 400
+
+        seq = changes.current_seq()
+        tickets, last_seq = changes.changed_tickets(ticket_rows(query), since, limit)
+        if last_seq is not None:
+            seq = last_seq
+        removed = changes.removed_ids(since, current_user, until=seq)
+        present = {t.id for t in tickets}
+        return {
+            'seq': seq,
+            'tickets': encode_tickets(tickets),
+            'removed': [i for i in removed if i not in present],
+            'has_more': last_seq is not None
+        }, 200
+
+class TicketOverdue(Resource):
+    @read_only
+    @jwt_required()
+    def get(self):
+        # Escalation list: In Progress tickets past their deadline, most overdue first
+        current_user = json.loads(get_jwt_identity())
+        query = scoped_query(current_user)
+        if query is None:
+            return [], 200
+        try:
+            limit = max(1, min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        except ValueError:
+            return {'message': "Invalid 'limit'"}, 400
+        return encode_tickets(ticket_rows(sla.overdue(query)).limit(limit).all()), 200
+
+class TicketStream(Resource):
+    # EventSource cannot set headers, so the token may also come as ?jwt=
+    @jwt_required(locations=['headers', 'query_string'])
+    def get(self):
+        current_user = json.loads(get_jwt_identity())
+        # Subscribe before returning so nothing committed from here on is missed
+        subscription = events.broker.subscribe()
+        return Response(events.stream(current_user, subscription), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # nginx would otherwise hold events back
+        })
 
 class TicketAction(Resource):
     @jwt_required()
     def put(self, ticket_id):
         data = request.get_json()
-        action = data.get('action')
-        ticket = Ticket.query.get_or_404(ticket_id)
         current_user = json.loads(get_jwt_identity())
+        try:
+            # Applied on the writer thread, which commits queued writes together
+            response = writes.submit(lambda: self.apply(ticket_id, data, current_user))
+        except TransitionError as e:
+            db.session.rollback()
+            return {'message': str(e)}, e.status
+        if data.get('action') in ('accept', 'staff_accept'):
+            sla.sweeper.notify()  # A new deadline to watch
+        return response
+
+    @staticmethod
+    def apply(ticket_id, data, current_user):
+        # Validated and applied by the state machine (see workflow.py)
+        workflow.apply(ticket_id, data, current_user)
+        # Built after the writer commits, from the fresh row
+        return lambda: (db.session.get(Ticket, ticket_id).to_dict(), 200)
+
+class TicketBulkAction(Resource):
+    @jwt_required()
+    def post(self):
+        # One action over many tickets in one transaction (see bulk_actions.py)
+        data = request.get_json()
+        current_user = json.loads(get_jwt_identity())
+        try:
+            return writes.submit(lambda: bulk_actions.apply(data, current_user)), 200
+        except TransitionError as e:
+            db.session.rollback()
+            return {'message': str(e)}, e.status
 
-        if action == 'assign':
-            if current_user['role'] != 'gm':
-                return {'message': 'Unauthorized'}, 403
-            dept_name = data.get('department')
-            dept = Department.query.filter_by(name=dept_name).first()
-            if not dept:
-                return {'message': 'Department not found'}, 404
-            ticket.assigned_dept_id = dept.id
-            ticket.status = 'Assigned'
-        
-        elif action == 'accept':
-            if current_user['role'] != 'dept':
-                return {'message': 'Unauthorized'}, 403
-            ticket.estimated_fix_time = data.get('estimated_fix_time') # Human readable string
-            ticket.assigned_duration_minutes = data.get('duration_minutes') # Integer for timer
-            ticket.accepted_at = datetime.utcnow()
-            ticket.status = 'In Progress'
-
-        elif action == 'resolve':
-            if current_user['role'] != 'dept':
-                return {'message': 'Unauthorized'}, 403
-            ticket.proof_url = data.get('proof_url')
-            ticket.status = 'Pending GM Review'
-            # ticket.resolved_at = datetime.utcnow() # Moved to GM approval
-        
-        elif action == 'assign_staff':
-            staff_id = data.get('staff_id')
-            ticket.assigned_staff_id = staff_id
-            ticket.staff_status = 'Pending'
-            
-        elif action == 'staff_accept':
-            ticket.estimated_fix_time = data.get('estimated_fix_time')
-            ticket.assigned_duration_minutes = data.get('duration_minutes')
-            ticket.accepted_at = datetime.utcnow()
-            ticket.staff_status = 'Accepted'
-            ticket.status = 'In Progress'
-
-        elif action == 'staff_submit_work':
-            # Staff submits work for review
-            ticket.proof_url = data.get('proof_url')
-            ticket.status = 'Pending QA'
-            ticket.staff_status = 'Completed'
-        
-        elif action == 'dept_approve_work':
-            if current_user['role'] != 'dept':
-                return {'message': 'Unauthorized'}, 403
-            ticket.status = 'Pending GM Review'
-            # ticket.resolved_at = datetime.utcnow() # Moved to GM approval
-
-        elif action == 'dept_reject_work':
-            if current_user['role'] != 'dept':
-                return {'message': 'Unauthorized'}, 403
-            # Send back to staff
-            ticket.status = 'In Progress'
-            ticket.staff_status = 'Rejected'
-            ticket.rejection_message = data.get('rejection_message')
-            # ticket.proof_url = None # KEPT for history/visibility as per new requirement
-            # Optional: Add rejection reason to description/logs
-            
-        elif action == 'staff_reject':
-            ticket.assigned_staff_id = None
-            ticket.staff_status = None
-        
-        elif action == 'dept_reject':
-            if current_user['role'] != 'dept':
-                return {'message': 'Unauthorized'}, 403
-            reason = data.get('reason', 'No reason provided')
-            ticket.status = 'Rejected'
-            ticket.description = f"{ticket.description}\n\n[REJECTED]: {reason}"
-            # Reset assignment so it can be re-assigned
-            ticket.assigned_dept_id = None
-
-        elif action == 'gm_approve_work':
-            if current_user['role'] != 'gm':
-                return {'message': 'Unauthorized'}, 403
-            ticket.status = 'Resolved'
-            ticket.resolved_at = datetime.utcnow()
-            
-        elif action == 'gm_reject_work':
-            if current_user['role'] != 'gm':
-                return {'message': 'Unauthorized'}, 403
-            # Send back to Dept Head (Pending QA)
-            ticket.status = 'Pending QA'
-            ticket.rejection_message = f"[GM]: {data.get('rejection_message', 'No reason provided')}"
-
-        else:
-            return {'message': 'Invalid action'}, 400
-
-        db.session.commit()
-        return ticket.to_dict(), 200
+class TicketEvents(Resource):
+    @jwt_required()
+    def get(self, ticket_id):
+        # A ticket's history, to whoever can see the ticket, archived or not
+        current_user = json.loads(get_jwt_identity())
+        for model in (Ticket, TicketArchive):
+            query = scoped_query(current_user, model)
+            if query is not None and query.filter(model.id == ticket_id).first() is not None:
+                return [e.to_dict() for e in ticket_log.history(ticket_id)], 200
+        return {'message': 'Ticket not found'}, 404
 
 class StaffList(Resource):
     @jwt_required()
     def get(self, dept_id):
+        if request.args.get('with_load') == '1':
+            # Open tickets and estimated minutes per staff member, least loaded first
+            return assignment.staff_load(dept_id), 200
         staff_members = User.query.filter_by(role='staff', department_id=dept_id).all()
         return [s.to_dict() for s in staff_members], 200
 
@@ -245,8 +358,14 @@ class RecurringTaskList(Resource):
         if current_user['role'] != 'gm':
             return {'message': 'Unauthorized'}, 403
         
-        tasks = RecurringTask.query.all()
-        return [t.to_dict() for t in tasks], 200
+        tag = conditional.etag('recurring-tasks', changes.current_seq(changes.RECURRING_TASKS))
+        cached = conditional.not_modified(tag)
+        if cached:
+            return cached
+        
+        body, _ = cache.cached('recurring-tasks', 'all', tag, [changes.RECURRING_TASKS],
+                               lambda: ([t.to_dict() for t in RecurringTask.query.all()], {}))
+        return body, 200, conditional.headers(tag)
 
     @jwt_required()
     def post(self):
@@ -258,15 +377,25 @@ class RecurringTaskList(Resource):
         dept_name = data.get('department')
         dept = Department.query.filter_by(name=dept_name).first()
         
+        policy = data.get('catch_up_policy', 'coalesce')
+        if policy not in POLICIES:
+            return {'message': f"catch_up_policy must be one of {', '.join(POLICIES)}"}, 400
+        try:
+            frequency_days = parse_frequency(data.get('frequency_days'))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
         new_task = RecurringTask(
             title=data.get('title'),
             description=data.get('description'),
-            frequency_days=int(data.get('frequency_days')),
+            frequency_days=frequency_days,
             next_run_date=datetime.strptime(data.get('next_run_date'), '%Y-%m-%d').date(),
-            assigned_dept_id=dept.id if dept else None
+            assigned_dept_id=dept.id if dept else None,
+            catch_up_policy=policy
         )
         db.session.add(new_task)
         db.session.commit()
+        scheduler.notify()
         return new_task.to_dict(), 201
 
 class RecurringTaskItem(Resource):
@@ -284,13 +413,22 @@ class RecurringTaskItem(Resource):
         
         task.title = data.get('title', task.title)
         task.description = data.get('description', task.description)
-        task.frequency_days = int(data.get('frequency_days', task.frequency_days))
+        if 'frequency_days' in data:
+            try:
+                task.frequency_days = parse_frequency(data['frequency_days'])
+            except ValueError as e:
+                return {'message': str(e)}, 400
         if data.get('next_run_date'):
             task.next_run_date = datetime.strptime(data.get('next_run_date'), '%Y-%m-%d').date()
         if dept:
             task.assigned_dept_id = dept.id
+        if data.get('catch_up_policy'):
+            if data['catch_up_policy'] not in POLICIES:
+                return {'message': f"catch_up_policy must be one of {', '.join(POLICIES)}"}, 400
+            task.catch_up_policy = data['catch_up_policy']
             
         db.session.commit()
+        scheduler.notify()
         return task.to_dict(), 200
 
     @jwt_required()
@@ -302,258 +440,128 @@ class RecurringTaskItem(Resource):
         task = RecurringTask.query.get_or_404(task_id)
         db.session.delete(task)
         db.session.commit()
+        scheduler.notify()
         return {'message': 'Task deleted'}, 200
 
 # --- HubAI Analyst (Simulated NLP) ---
 class HubAIQuery(Resource):
+    @read_only
     @jwt_required()
     def post(self):
+        # Routed to a handler by keyword (see hubai.py)
         data = request.get_json()
-        query = data.get('query', '').lower()
-        
-        # Simulated "Thinking" Delay for effect handled in frontend or here? 
-        # Frontend is better for UI/UX, keeping backend fast.
-        
-        response_text = "I'm not sure I understand. Try asking about open tickets, specific ticket IDs (e.g., 'Ticket #10'), or search for issues."
-        analysis_data = {}
-        
-        # --- 1. Specific Ticket Lookup (Regex: "ticket #123" or "issue 45") ---
-        ticket_match = re.search(r'(?:ticket|issue)\s*#?(\d+)', query)
-        if ticket_match:
-            ticket_id = ticket_match.group(1)
-            ticket = Ticket.query.get(ticket_id)
-            if ticket:
-                response_text = (
-                    f"**Ticket #{ticket.id}** ({ticket.type})\n"
-                    f"**Status**: {ticket.status}\n"
-                    f"**Priority**: {ticket.priority}\n"
-                    f"**Reported By**: {ticket.tenant_name}\n"
-                    f"**Description**: \"{ticket.description}\""
-                )
-            else:
-                response_text = f"I could not find a ticket with ID **#{ticket_id}**."
-                
-        # --- 2. Search / Find (Regex: "search X" or "find X") ---
-        elif 'search' in query or 'find' in query:
-            # Extract search term: "search for leak" -> "leak"
-            search_term = re.sub(r'search|find|for|tickets|issues|about', '', query).strip()
-            if search_term:
-                results = Ticket.query.filter(
-                    (Ticket.description.ilike(f'%{search_term}%')) | 
-                    (Ticket.type.ilike(f'%{search_term}%'))
-                ).limit(5).all()
-                
-                if results:
-                    response_text = f"Found **{len(results)}** tickets matching '*{search_term}*':\n"
-                    for t in results:
-                        response_text += f"- **#{t.id}**: {t.type} ({t.status})\n"
-                else:
-                    response_text = f"No tickets found matching '*{search_term}*'."
-            else:
-                response_text = "What would you like me to search for? (e.g., 'Search for leak')"
-
-        # --- 3. Recent Activity ---
-        elif 'recent' in query or 'latest' in query or 'last' in query:
-            results = Ticket.query.order_by(Ticket.created_at.desc()).limit(3).all()
-            if results:
-                response_text = "**Most Recent Activity:**\n"
-                for t in results:
-                    response_text += f"- **#{t.id}** ({t.type}): {t.status} - *{t.description[:30]}...*\n"
-            else:
-                response_text = "No recent activity found."
-
-        # --- 4. Ticket Counts ---
-        elif 'how many' in query or 'count' in query:
-            if 'ticket' in query or 'issue' in query:
-                if 'open' in query or 'pending' in query:
-                    count = Ticket.query.filter(Ticket.status != 'Resolved').count()
-                    response_text = f"There are currently **{count} open tickets** requiring attention."
-                elif 'resolved' in query or 'closed' in query:
-                    count = Ticket.query.filter_by(status='Resolved').count()
-                    response_text = f"Great news! We have resolved **{count} tickets** so far."
-                else:
-                    count = Ticket.query.count()
-                    response_text = f"We have a total of **{count} tickets** recorded in the system."
-                    
-        # --- 5. Department Issues ---
-        elif 'department' in query or 'dept' in query:
-            if 'most' in query or 'worst' in query or 'busiest' in query:
-                # Find dept with most open tickets
-                departments = Department.query.all()
-                max_tickets = -1
-                busiest_dept = None
-                
-                for dept in departments:
-                    count = Ticket.query.filter_by(assigned_dept_id=dept.id).count()
-                    if count > max_tickets:
-                        max_tickets = count
-                        busiest_dept = dept.name
-                        
-                if busiest_dept:
-                    response_text = f"**{busiest_dept}** is currently the busiest department with **{max_tickets} tickets**."
-                else:
-                    response_text = "Analysis shows no active data for departments yet."
-                    
-        # --- 6. Satisfaction / Sentiment ---
-        elif 'happy' in query or 'satisfaction' in query or 'rating' in query:
-            avg_rating = db.session.query(db.func.avg(Ticket.feedback_rating)).scalar()
-            if avg_rating:
-                stars = round(avg_rating, 1)
-                response_text = f"The current tenant satisfaction score is **{stars} / 5.0**. "
-                if stars >= 4:
-                    response_text += "Keep up the great work! 🌟"
-                elif stars >= 3:
-                    response_text += "Room for improvement."
-                else:
-                    response_text += "Urgent attention recommended."
-            else:
-                response_text = "We don't have enough feedback data yet to calculate satisfaction."
-                
-        # --- 7. Status / Summary ---
-        elif 'summary' in query or 'status' in query or 'report' in query:
-             open_count = Ticket.query.filter(Ticket.status != 'Resolved').count()
-             resolved_count = Ticket.query.filter_by(status='Resolved').count()
-             response_text = f"**Executive Summary**:\n- Open Issues: {open_count}\n- Resolved: {resolved_count}\nSystem is operating normally."
-
-        # --- 8. Fun / Easter Eggs ---
-        elif 'hello' in query or 'hi' in query:
-            response_text = "Hello! I am HubAI, your operations assistant. Ask me about tickets, departments, or tenant satisfaction."
-        elif 'thank' in query:
-            response_text = "You're welcome! Let me know if you need anything else."
-            
-        return {'answer': response_text}, 200
+        return {'answer': hubai.answer(data.get('query', ''))}, 200
 
 class SchedulerCheck(Resource):
     def post(self):
-        # In a real app, this would be secured or run by a cron job internally
-        # For this demo, we expose it so the frontend can trigger it
-        
-        today = datetime.utcnow().date()
-        due_tasks = RecurringTask.query.filter(RecurringTask.next_run_date <= today).all()
-        
-        created_tickets = []
-        
-        for task in due_tasks:
-            # Create Ticket
-            new_ticket = Ticket(
-                tenant_name='System Scheduler',
-                anonymous=False,
-                type='Maintenance', # Generic type for now
-                priority='Medium',
-                description=f"Recurring Task: {task.title}\n{task.description}",
-                status='Pending Approval', # Or directly 'Assigned' if we want
-                assigned_dept_id=task.assigned_dept_id
-            )
-            
-            # If we want to auto-assign, we can set status to 'Assigned'
-            if task.assigned_dept_id:
-                new_ticket.status = 'Assigned'
-            
-            db.session.add(new_ticket)
-            created_tickets.append(new_ticket)
-            
-            # Update Next Run Date
-            # If it was due days ago, should we set it to today + freq? 
-            # Or keep adding freq until it's in the future?
-            # For simplicity: next_run = next_run + freq
-            task.next_run_date = task.next_run_date + timedelta(days=task.frequency_days)
-            
-        db.session.commit()
+        # The in-process scheduler (scheduler.py) fires tasks on its own;
+        # this stays so the frontend or a cron job can force a check.
+        due_tasks, ticket_ids = run_due()
+        scheduler.notify()
         
         return {
             'message': f'Processed {len(due_tasks)} due tasks',
-            'tickets_created': [t.id for t in created_tickets]
+            'tickets_created': ticket_ids
         }, 200
 
 # --- Dashboard Stats (GM) ---
 class DashboardStats(Resource):
+    @read_only
     @jwt_required()
     def get(self):
-        # Calculate stats for charts
-        tickets = Ticket.query.all()
-        departments = Department.query.all()
-        
-        # Issues per Dept
-        issues_per_dept = []
-        for dept in departments:
-            count = Ticket.query.filter_by(assigned_dept_id=dept.id).count()
-            issues_per_dept.append({'name': dept.name, 'count': count})
-            
-        # Tenant Satisfaction (Real Calculation from feedback_rating)
-        # 5 = Happy, 3-4 = Neutral, 1-2 = Unhappy
-        tickets_with_feedback = Ticket.query.filter(Ticket.feedback_rating != None).all()
-        
-        happy_count = 0
-        neutral_count = 0
-        unhappy_count = 0
+        # The 7-day chart moves at midnight even when no ticket does
+        tag = conditional.etag('stats', *changes.versions(changes.SEQUENCE, changes.STATS), datetime.utcnow().date())
+        cached = conditional.not_modified(tag)
+        if cached:
+            return cached
         
-        for t in tickets_with_feedback:
-            if t.feedback_rating == 5:
-                happy_count += 1
-            elif t.feedback_rating >= 3:
-                neutral_count += 1
-            else:
-                unhappy_count += 1
-                
-        satisfaction = [
-            {'name': 'Happy', 'value': happy_count},
-            {'name': 'Neutral', 'value': neutral_count},
-            {'name': 'Unhappy', 'value': unhappy_count}
-        ]
-        
-        # Avg Time to Fix - Last 7 Days (Real Calculation)
-        avg_time = []
-        today = datetime.utcnow().date()
-        for i in range(6, -1, -1):
-            day = today - timedelta(days=i)
-            day_start = datetime.combine(day, datetime.min.time())
-            day_end = datetime.combine(day, datetime.max.time())
-            
-            # Find tickets resolved on this day
-            resolved_tickets = Ticket.query.filter(
-                Ticket.status == 'Resolved',
-                Ticket.resolved_at >= day_start,
-                Ticket.resolved_at <= day_end
-            ).all()
-            
-            if not resolved_tickets:
-                hours = 0
-            else:
-                total_seconds = 0
-                count = 0
-                for ticket in resolved_tickets:
-                    # Use accepted_at as start, fallback to created_at
-                    start_time = ticket.accepted_at or ticket.created_at
-                    if ticket.resolved_at and start_time:
-                        duration = ticket.resolved_at - start_time
-                        total_seconds += duration.total_seconds()
-                        count += 1
-                
-                hours = round((total_seconds / count) / 3600, 1) if count > 0 else 0
-            
-            avg_time.append({
-                'day': day.strftime('%a'), # Mon, Tue
-                'full_date': day.strftime('%Y-%m-%d'),
-                'hours': hours
-            })
-        
-        # Dept Load
-        dept_load = []
-        for dept in departments:
-            active_count = Ticket.query.filter_by(assigned_dept_id=dept.id, status='In Progress').count()
-            dept_load.append({'name': dept.name, 'active_tickets': active_count})
+        # Calculate stats for charts
+        body, _ = cache.cached('stats', 'all', tag, [changes.SEQUENCE, changes.STATS], lambda: (dashboard_stats(), {}))
+        return body, 200, conditional.headers(tag)
 
-        return {
-            'issues_per_dept': issues_per_dept,
-            'satisfaction': satisfaction,
-            'avg_time': avg_time,
-            'dept_load': dept_load
-        }, 200
+class WorkflowStats(Resource):
+    @read_only
+    @jwt_required()
+    def get(self):
+        current_user = json.loads(get_jwt_identity())
+        if current_user['role'] != 'gm':
+            return {'message': 'Unauthorized'}, 403
+        try:
+            days = int(request.args.get('days', 30))
+        except ValueError:
+            return {'message': "Invalid 'days'"}, 400
+        return workflow_stats(days), 200
+
+class CacheMetrics(Resource):
+    @jwt_required()
+    def get(self):
+        current_user = json.loads(get_jwt_identity())
+        if current_user['role'] != 'gm':
+            return {'message': 'Unauthorized'}, 403
+        return cache.backend.stats(), 200
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats():
+    """Recompute the dashboard rollup from the ticket table. Run `flask db upgrade` first."""
+    if not db.inspect(db.engine).has_table('stats_rollup'):
+        raise click.ClickException("No stats_rollup table; run `flask --app app db upgrade` first")
+    counters, mismatched = rollup.rebuild()
+    print(f"Rebuilt {counters} counters ({mismatched} differed from the running totals)")
+
+@app.cli.command('sweep-sla')
+def sweep_sla():
+    """Flag tickets that went past their deadline."""
+    flagged = sla.sweep()
+    print(f"Flagged {len(flagged)} overdue tickets")
+
+@app.cli.command('archive-tickets')
+@click.option('--days', type=int, help='Archive tickets resolved more than this many days ago.')
+def archive_tickets(days):
+    """Move old resolved tickets to the archive table."""
+    days = days if days is not None else app.config['ARCHIVE_AFTER_DAYS']
+    if not days:
+        print("Archival is off (ARCHIVE_AFTER_DAYS=0)")
+        return
+    moved = archive.archive(days)
+    print(f"Archived {len(moved)} tickets")
+
+@app.cli.command('media-worker')
+@click.option('--once', is_flag=True, help='Drain the queue and exit.')
+def media_worker(once):
+    """Generate queued thumbnails and video posters."""
+    media.requeue_stale()
+    processed = media.process_pending()
+    print(f"Processed {processed} media jobs")
+    if not once:
+        app.config['MEDIA_WORKERS'] = max(app.config['MEDIA_WORKERS'], 1)
+        media.pool.ensure_started(app)
+        media.pool.notify()
+        threading.Event().wait()
+
+def start_timers():
+    """Start the recurring task, SLA sweep and archive timers in this process."""
+    scheduler.start(app)
+    sla.sweeper.start(app)
+    archive.archiver.start(app)
+
+@app.cli.command('run-timers')
+def run_timers():
+    """Run the recurring task, SLA sweep and archive timers until stopped."""
+    start_timers()
+    print("Timers running")
+    threading.Event().wait()
 
 api.add_resource(Login, '/auth/login')
 api.add_resource(TicketList, '/tickets')
+api.add_resource(TicketChanges, '/tickets/changes')
+api.add_resource(TicketStream, '/tickets/stream')
+api.add_resource(TicketOverdue, '/tickets/overdue')
 api.add_resource(TicketAction, '/tickets/<int:ticket_id>/action')
+api.add_resource(TicketBulkAction, '/tickets/bulk-action')
+api.add_resource(TicketEvents, '/tickets/<int:ticket_id>/events')
 api.add_resource(DashboardStats, '/dashboard/stats')
+api.add_resource(WorkflowStats, '/dashboard/workflow')
+api.add_resource(CacheMetrics, '/metrics/cache')
 api.add_resource(RecurringTaskList, '/recurring-tasks')
 api.add_resource(RecurringTaskItem, '/recurring-tasks/<int:task_id>')
 api.add_resource(HubAIQuery, '/ai/query')
@@ -562,4 +570,6 @@ api.add_resource(StaffList, '/departments/<int:dept_id>/staff')
 api.add_resource(UploadFile, '/upload')
 
 if __name__ == '__main__':
+    if app.config['SCHEDULER_ENABLED']:
+        start_timers()
     app.run(debug=True, port=5000)
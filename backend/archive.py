@@ -0,0 +1,95 @@
+"""Archival of resolved tickets.
+
+Resolved tickets pile up, and every list, search and sweep would keep
+reading past them. ``archive()`` moves tickets resolved more than
+ARCHIVE_AFTER_DAYS ago from ``ticket`` to ``ticket_archive``. The two tables
+have the same columns. A ticket keeps its id, and ``ticket`` is AUTOINCREMENT
+on SQLite, so an archived id is never handed out again. Each batch is locked,
+copied with one INSERT ... SELECT and deleted in one transaction. The hot
+table therefore holds the open work plus a bounded tail of recent history.
+
+Reads stay on ``ticket`` unless they opt in. ``GET /tickets?archived=1``
+pages through the archive. Its event history and lookups by id (HubAI)
+work for both tables. The dashboard counters (rollup.py) are not changed
+by a move, so totals, ratings and resolution times still include archived
+tickets. ``rollup.rebuild()`` reads both tables. To clients, an archived
+ticket looks deleted: the move writes a tombstone and a ``removed`` live
+event.
+
+``Archiver`` runs ``archive()`` in the background, every ARCHIVE_SECONDS.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+
+from models import db, TicketArchive
+import changes
+import events
+from workflow import TICKET
+
+RESOLVED = 'Resolved'
+BATCH_SIZE = 500
+ARCHIVE_SECONDS = 3600
+ARCHIVE = TicketArchive.__table__
+COLUMNS = [column.name for column in TICKET.columns]
+
+
+def archive(days, now=None, batch_size=BATCH_SIZE):
+    """Move tickets resolved more than ``days`` ago to the archive. Returns the moved ids."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    moved = []
+    while True:
+        ids = db.session.scalars(
+            select(TICKET.c.id)
+            .where(TICKET.c.status == RESOLVED, TICKET.c.resolved_at < cutoff)
+            .order_by(TICKET.c.resolved_at).limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            break
+        db.session.execute(insert(ARCHIVE).from_select(
+            COLUMNS, select(*[TICKET.c[name] for name in COLUMNS]).where(TICKET.c.id.in_(ids))))
+        rows = [dict(row) for row in db.session.execute(
+            delete(TICKET).where(TICKET.c.id.in_(ids))
+            .returning(TICKET.c.id, TICKET.c.status, TICKET.c.assigned_dept_id)
+        ).mappings()]
+        if rows:
+            seq = changes.record_deletes(db.session, rows)
+            events.record_deletes(db.session, rows, seq)
+        db.session.commit()
+        # RETURNING comes back in table order; report oldest first
+        deleted = {row['id'] for row in rows}
+        moved.extend(i for i in ids if i in deleted)
+        if len(ids) < batch_size:
+            break
+    return moved
+
+
+class Archiver:
+    """Background thread archiving tickets as they age."""
+
+    def __init__(self, interval=ARCHIVE_SECONDS):
+        self.interval = interval
+        self._thread = None
+
+    def start(self, app):
+        if self._thread is not None or not app.config.get('ARCHIVE_AFTER_DAYS'):
+            return
+        self._thread = threading.Thread(target=self._run, args=(app,), name='ticket-archiver', daemon=True)
+        self._thread.start()
+
+    def _run(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    archive(app.config['ARCHIVE_AFTER_DAYS'])
+                except Exception:
+                    app.logger.exception('Ticket archival failed')
+                finally:
+                    db.session.remove()
+            time.sleep(self.interval)
+
+
+archiver = Archiver()
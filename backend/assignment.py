@@ -0,0 +1,67 @@
+"""Workload-aware staff assignment.
+
+Each staff member's open load is a rollup counter (rollup.py, metric
+'staff_load'): how many tickets are handed to them and not yet submitted
+(staff status Pending or Accepted on an Assigned or In Progress ticket),
+with their estimated minutes in ``total_seconds``. Every ticket write keeps
+it current in the same transaction, so reading a department's load is one
+join of its staff with their counters, and no ticket is counted.
+
+``auto_assign`` gives a ticket to the least loaded staff member: fewest
+open tickets, then fewest estimated minutes, then lowest id. That is one
+ordered query with LIMIT 1, so the database scans the department's
+counters and returns a single row. A bulk auto_assign reads the
+department once, O(n log n) to build a heap keyed the same way, and then
+each ticket costs O(log n): it goes to the top of the heap and adds one to
+that staff member's load.
+"""
+import heapq
+
+from sqlalchemy import String, and_, cast, func
+
+from models import db, StatsRollup, User
+
+
+def _load_query(dept_id, *columns):
+    counters = and_(
+        StatsRollup.metric == 'staff_load',
+        StatsRollup.key == cast(User.id, String),
+        StatsRollup.sub_key == '',
+    )
+    return db.session.query(
+        *columns,
+        func.coalesce(StatsRollup.count, 0),
+        func.coalesce(StatsRollup.total_seconds, 0.0),
+    ).outerjoin(StatsRollup, counters).filter(User.role == 'staff', User.department_id == dept_id)
+
+
+def staff_load(dept_id):
+    """Staff of ``dept_id`` as dicts with ``open_tickets`` and ``estimated_minutes``, least loaded first."""
+    load = [{**user.to_dict(), 'open_tickets': count, 'estimated_minutes': round(seconds / 60)}
+            for user, count, seconds in _load_query(dept_id, User)]
+    load.sort(key=_rank)
+    return load
+
+
+def _rank(staff):
+    return staff['open_tickets'], staff['estimated_minutes'], staff['id']
+
+
+def spread(load, count):
+    """Staff ids for ``count`` new tickets, each to the least loaded at the time."""
+    heap = [_rank(staff) for staff in load]
+    heapq.heapify(heap)
+    picks = []
+    for _ in range(count if heap else 0):
+        tickets, minutes, staff_id = heap[0]
+        picks.append(staff_id)
+        heapq.heapreplace(heap, (tickets + 1, minutes, staff_id))
+    return picks
+
+
+def least_loaded(dept_id):
+    """Id of the least loaded staff member of ``dept_id``, or None if it has none."""
+    row = _load_query(dept_id, User.id).order_by(
+        func.coalesce(StatsRollup.count, 0), func.coalesce(StatsRollup.total_seconds, 0.0), User.id
+    ).first()
+    return row[0] if row else None
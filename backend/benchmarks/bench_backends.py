@@ -0,0 +1,144 @@
+"""Mixed read/write throughput for each database backend.
+
+Starts several processes, like gunicorn workers, each running request
+threads that mostly read (the ticket list and the GM stats) and sometimes
+raise and assign a ticket. The load runs once per ``--url``. With no
+``--url`` it runs against a temporary SQLite file with the production
+profile:
+
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --url sqlite:////tmp/bench.db \\
+        --url postgresql://hubops@localhost/hubops_bench
+
+A PostgreSQL target must be an empty database you can throw away; its
+tables are dropped and re-created. ``--read-url`` adds a replica for the
+read-only views. The response cache is off so every read reaches the
+database.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _environment(url, read_url):
+    os.environ['DATABASE_URL'] = url
+    if read_url:
+        os.environ['DATABASE_READ_URL'] = read_url
+    os.environ['SCHEDULER_ENABLED'] = '0'
+    os.environ['MEDIA_WORKERS'] = '0'
+    os.environ['RESPONSE_CACHE_TTL'] = '0'
+    sys.path.insert(0, BACKEND)
+
+
+def setup(url, read_url):
+    _environment(url, read_url)
+    from app import app
+    from models import db, Department, User
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([User(username='Tenant User', role='tenant'), User(username='General Manager', role='gm')])
+        db.session.add_all(Department(name=name) for name in ('Maintenance', 'Security', 'Housekeeping', 'IT'))
+        db.session.commit()
+
+
+def worker(url, read_url, threads, requests, write_every, results):
+    _environment(url, read_url)
+    from app import app
+    client = app.test_client()
+    tenant = {'Authorization': 'Bearer ' + client.post('/auth/login', json={'role': 'tenant'}).get_json()['token']}
+    gm = {'Authorization': 'Bearer ' + client.post('/auth/login', json={'role': 'gm'}).get_json()['token']}
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def run():
+        local = {'reads': 0, 'writes': 0, 'errors': 0}
+        for i in range(requests):
+            try:
+                if i % write_every == 0:
+                    res = client.post('/tickets', headers=tenant, json={
+                        'type': 'Plumbing', 'priority': 'Low', 'description': f'Leak {i}'
+                    })
+                    if res.status_code == 201:
+                        res = client.put(f"/tickets/{res.get_json()['id']}/action", headers=gm,
+                                         json={'action': 'assign', 'department': 'Maintenance'})
+                    local['writes' if res.status_code == 200 else 'errors'] += 1
+                else:
+                    res = client.get('/tickets' if i % 2 else '/dashboard/stats', headers=gm)
+                    local['reads' if res.status_code == 200 else 'errors'] += 1
+            except Exception:
+                local['errors'] += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(counts)
+
+
+def run_target(url, args):
+    ctx = multiprocessing.get_context('spawn')
+    setup_process = ctx.Process(target=setup, args=(url, args.read_url))
+    setup_process.start()
+    setup_process.join()
+
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(url, args.read_url, args.threads, args.requests,
+                                                  args.write_every, results))
+                 for _ in range(args.workers)]
+    start = time.perf_counter()
+    for p in processes:
+        p.start()
+    totals = {'reads': 0, 'writes': 0, 'errors': 0}
+    for _ in processes:
+        for key, value in results.get().items():
+            totals[key] += value
+    elapsed = time.perf_counter() - start
+    for p in processes:
+        p.join()
+    return totals, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', action='append', help='database URL to test; repeat to compare')
+    parser.add_argument('--read-url', help='replica URL for the read-only views')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--write-every', type=int, default=5, help='one request in N is a write')
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.url:
+        fd, scratch = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        args.url = [f'sqlite:///{scratch}']
+
+    print(f'{args.workers} workers x {args.threads} threads x {args.requests} requests '
+          f'(1 in {args.write_every} a create + assign)')
+    try:
+        for url in args.url:
+            totals, elapsed = run_target(url, args)
+            name = url.split('://')[0]
+            print(f"{name:>12}: {totals['reads'] / elapsed:8.1f} reads/s  {totals['writes'] / elapsed:7.1f} writes/s  "
+                  f"{totals['errors']:5d} failed  ({elapsed:.1f} s)")
+    finally:
+        if scratch:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(scratch + suffix):
+                    os.remove(scratch + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Triage a backlog one ticket at a time against one bulk request.
+
+Seeds a throwaway database with pending tickets, then assigns them to a
+department in-process: first with one PUT /tickets/<id>/action per ticket,
+then, after resetting them, with a single POST /tickets/bulk-action.
+
+    python benchmarks/bench_bulk_actions.py [--tickets 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_db_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+from app import app  # noqa: E402
+from models import db, Department, Ticket, User  # noqa: E402
+
+
+def seed(tickets):
+    db.create_all()
+    db.session.add(User(username='General Manager', role='gm'))
+    db.session.add_all(Department(name=name) for name in ('Maintenance', 'Security', 'Housekeeping', 'IT'))
+    tickets = [Ticket(tenant_name='Tenant User', type='Plumbing', priority='Low', description=f'Ticket {i}',
+                      status='Pending Approval') for i in range(tickets)]
+    db.session.add_all(tickets)
+    db.session.commit()
+    return [t.id for t in tickets]
+
+
+def reset(ids):
+    # Straight back to pending, bypassing the API, so both runs start equal
+    db.session.execute(db.update(Ticket).where(Ticket.id.in_(ids)).values(status='Pending Approval', assigned_dept_id=None))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickets', type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        with app.app_context():
+            ids = seed(args.tickets)
+        client = app.test_client()
+        token = client.post('/auth/login', json={'role': 'gm'}).get_json()['token']
+        auth = {'Authorization': f'Bearer {token}'}
+        body = {'action': 'assign', 'department': 'Maintenance'}
+
+        start = time.perf_counter()
+        for ticket_id in ids:
+            assert client.put(f'/tickets/{ticket_id}/action', headers=auth, json=body).status_code == 200
+        single = time.perf_counter() - start
+
+        with app.app_context():
+            reset(ids)
+
+        start = time.perf_counter()
+        res = client.post('/tickets/bulk-action', headers=auth, json={**body, 'ids': ids})
+        bulk = time.perf_counter() - start
+        assert res.status_code == 200 and len(res.get_json()['updated']) == len(ids)
+
+        print(f'{args.tickets} tickets assigned')
+        print(f'  one request per ticket: {args.tickets:5d} requests  {single * 1000:8.1f} ms')
+        print(f'  bulk-action:            {1:5d} request   {bulk * 1000:8.1f} ms  ({single / bulk:.0f}x faster)')
+    finally:
+        os.close(_db_fd)
+        os.remove(_db_path)
+
+
+if __name__ == '__main__':
+    main()
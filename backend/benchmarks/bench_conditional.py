@@ -0,0 +1,87 @@
+"""Latency of conditional GETs that end in 304 against full responses.
+
+Seeds a throwaway database, then requests /tickets, /dashboard/stats and
+/recurring-tasks in-process, once without validators and once replaying
+the ETag from the first response.
+
+    python benchmarks/bench_conditional.py [--tickets 5000] [--requests 200] [--limit 500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_db_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+from app import app  # noqa: E402
+from models import db, Department, RecurringTask, Ticket, User  # noqa: E402
+
+STATUSES = ['Pending Approval', 'Assigned', 'In Progress', 'Pending QA', 'Resolved']
+
+
+def seed(tickets):
+    db.create_all()
+    db.session.add(User(username='General Manager', role='gm'))
+    depts = [Department(name=name) for name in ('Maintenance', 'Security', 'Housekeeping', 'IT')]
+    db.session.add_all(depts)
+    db.session.flush()
+    start = datetime.utcnow() - timedelta(days=30)
+    db.session.add_all(Ticket(
+        tenant_name='Tenant User', type='Plumbing', priority='Low',
+        description=f'Ticket {i}', status=STATUSES[i % len(STATUSES)],
+        assigned_dept_id=depts[i % len(depts)].id,
+        created_at=start + timedelta(minutes=i)
+    ) for i in range(tickets))
+    db.session.add_all(RecurringTask(
+        title=f'Task {i}', description='', frequency_days=7,
+        next_run_date=date.today() + timedelta(days=i + 1), assigned_dept_id=depts[0].id
+    ) for i in range(20))
+    db.session.commit()
+
+
+def timed(client, url, headers, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        res = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+    return res, samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickets', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        with app.app_context():
+            seed(args.tickets)
+        client = app.test_client()
+        token = client.post('/auth/login', json={'role': 'gm'}).get_json()['token']
+        auth = {'Authorization': f'Bearer {token}'}
+
+        print(f'{args.tickets} tickets, {args.requests} requests per row')
+        for url in (f'/tickets?limit={args.limit}', '/dashboard/stats', '/recurring-tasks'):
+            res, full = timed(client, url, auth, args.requests)
+            tag = res.headers['ETag']
+            res, revalidated = timed(client, url, {**auth, 'If-None-Match': tag}, args.requests)
+            assert res.status_code == 304
+            for label, samples in (('200', full), ('304', revalidated)):
+                samples.sort()
+                print(f'{url:>24} {label}: p50 {statistics.median(samples):7.2f} ms  '
+                      f'p95 {samples[int(len(samples) * 0.95) - 1]:7.2f} ms')
+    finally:
+        os.close(_db_fd)
+        os.remove(_db_path)
+
+
+if __name__ == '__main__':
+    main()
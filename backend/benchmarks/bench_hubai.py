@@ -0,0 +1,124 @@
+"""HubAI intents per second: the old if/elif cascade against hubai.route.
+
+First classifies a synthetic corpus of questions in-process, with the
+substring cascade HubAIQuery.post used to run and with hubai.route, which
+keeps it. Then seeds a throwaway database and posts aggregate questions to
+/ai/query, with the response cache off and on.
+
+    python benchmarks/bench_hubai.py [--questions 100000] [--tickets 20000] [--requests 500]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_db_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+from app import app  # noqa: E402
+from models import db, Department, Ticket, User  # noqa: E402
+import cache  # noqa: E402
+import hubai  # noqa: E402
+
+QUESTIONS = [
+    'Show me ticket #{n}', 'What happened to issue {n}?', 'Search for {word}', 'Find tickets about {word}',
+    'What are the recent tickets?', 'Show the latest activity', 'How many open tickets do we have?',
+    'How many tickets were resolved this month?', 'Count all issues', 'Which department is the busiest?',
+    'Which dept has the most work?', 'Are tenants happy?', 'What is our satisfaction rating?',
+    'Give me a summary', 'Status report please', 'Hello HubAI', 'Thanks a lot', 'Tell me something useful',
+]
+AGGREGATES = ['How many open tickets?', 'Executive summary', 'Tenant satisfaction?', 'Busiest department?']
+FILLER = ['please', 'quickly', 'for the board meeting', 'in building B', 'as of today', 'again']
+WORDS = ['leak', 'door', 'light', 'noise', 'elevator', 'heating']
+
+
+def cascade(query):
+    """The branch HubAIQuery.post used to pick, by its original checks."""
+    query = query.lower()
+    if re.search(r'(?:ticket|issue)\s*#?(\d+)', query):
+        return 'lookup'
+    elif 'search' in query or 'find' in query:
+        return 'search'
+    elif 'recent' in query or 'latest' in query or 'last' in query:
+        return 'recent'
+    elif 'how many' in query or 'count' in query:
+        return 'count'
+    elif 'department' in query or 'dept' in query:
+        return 'department'
+    elif 'happy' in query or 'satisfaction' in query or 'rating' in query:
+        return 'satisfaction'
+    elif 'summary' in query or 'status' in query or 'report' in query:
+        return 'summary'
+    elif 'hello' in query or 'hi' in query:
+        return 'hello'
+    elif 'thank' in query:
+        return 'thanks'
+    return None
+
+
+def corpus(n):
+    rng = random.Random(0)
+    return [f"{rng.choice(QUESTIONS).format(n=rng.randint(1, 5000), word=rng.choice(WORDS))} {rng.choice(FILLER)}"
+            for _ in range(n)]
+
+
+def rate(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def seed(tickets):
+    db.create_all()
+    db.session.add(User(username='General Manager', role='gm'))
+    depts = [Department(name=name) for name in ('Maintenance', 'Security', 'Housekeeping', 'IT')]
+    db.session.add_all(depts)
+    db.session.flush()
+    db.session.execute(db.insert(Ticket), [{
+        'tenant_name': 'Tenant User', 'type': 'Plumbing', 'priority': 'Low', 'description': f'Ticket {i}',
+        'status': 'Resolved' if i % 3 == 0 else 'In Progress', 'assigned_dept_id': depts[i % 4].id,
+        'feedback_rating': i % 5 + 1 if i % 3 == 0 else None,
+    } for i in range(tickets)])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=100000)
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    questions = corpus(args.questions)
+    print(f'Routing {args.questions} questions')
+    print(f'  if/elif cascade:  {rate(cascade, questions):10.0f} questions/s')
+    print(f'  hubai.route:      {rate(lambda q: hubai.route(q.lower()), questions):10.0f} questions/s')
+
+    try:
+        with app.app_context():
+            seed(args.tickets)
+        client = app.test_client()
+        token = client.post('/auth/login', json={'role': 'gm'}).get_json()['token']
+        auth = {'Authorization': f'Bearer {token}'}
+        asked = [AGGREGATES[i % len(AGGREGATES)] for i in range(args.requests)]
+
+        def ask(question):
+            assert client.post('/ai/query', headers=auth, json={'query': question}).status_code == 200
+
+        print(f'Aggregate questions over {args.tickets} tickets')
+        for label, backend in (('cache off', cache.NullCache()), ('cache on', cache.LocalCache())):
+            cache.backend = backend
+            print(f'  {label}:  {rate(ask, asked):10.0f} requests/s')
+    finally:
+        os.close(_db_fd)
+        os.remove(_db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Concurrent range reads against /uploads.
+
+Serves a synthetic proof video from a throwaway upload folder with the
+threaded Werkzeug server, then compares clients scrubbing through it with
+Range requests against clients re-downloading the whole file.
+
+    python benchmarks/bench_media.py [--clients 16] [--requests 50] [--size-mb 32]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+from app import app  # noqa: E402
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def run_clients(url, clients, requests_per_client, make_headers):
+    transferred = [0] * clients
+
+    def worker(n):
+        rng = random.Random(n)
+        for _ in range(requests_per_client):
+            req = urllib.request.Request(url, headers=make_headers(rng))
+            with urllib.request.urlopen(req) as res:
+                transferred[n] += len(res.read())
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, sum(transferred)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--size-mb', type=int, default=32)
+    parser.add_argument('--chunk-kb', type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        app.config['UPLOAD_FOLDER'] = folder
+        size = args.size_mb * 1024 * 1024
+        with open(os.path.join(folder, 'proof.mp4'), 'wb') as f:
+            f.write(os.urandom(size))
+
+        server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.port}/uploads/proof.mp4'
+        chunk = args.chunk_kb * 1024
+
+        def scrub(rng):
+            offset = rng.randrange(0, size - chunk)
+            return {'Range': f'bytes={offset}-{offset + chunk - 1}'}
+
+        print(f'{args.clients} clients x {args.requests} requests, {args.size_mb} MiB file')
+        for label, make_headers, n in (
+            (f'range {args.chunk_kb} KiB', scrub, args.requests),
+            ('full download', lambda rng: {}, max(1, args.requests // 10)),
+        ):
+            elapsed, transferred = run_clients(url, args.clients, n, make_headers)
+            count = args.clients * n
+            print(f'{label:>16}: {count / elapsed:8.1f} req/s  {transferred / elapsed / 2**20:8.1f} MiB/s  '
+                  f'{elapsed / count * 1000:7.2f} ms/req  ({count} requests)')
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Serialize a ticket list through to_dict() and through the row encoder.
+
+Seeds a throwaway database, then times building a JSON body for every
+ticket: loading Ticket objects, to_dict() and json.dumps as the API used
+to, against ticket_rows(), encode_tickets() and serialization.dumps (orjson
+when installed), both as a list of objects and as ?format=columns.
+
+    python benchmarks/bench_serialization.py [--tickets 10000 100000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_db_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+from app import app  # noqa: E402
+from models import db, Department, Ticket, User  # noqa: E402
+import serialization  # noqa: E402
+from serialization import encode_tickets, ticket_rows  # noqa: E402
+
+STATUSES = ['Pending Approval', 'Assigned', 'In Progress', 'Pending QA', 'Resolved']
+
+
+def seed(tickets):
+    db.drop_all()
+    db.create_all()
+    depts = [Department(name=name) for name in ('Maintenance', 'Security', 'Housekeeping', 'IT')]
+    db.session.add_all(depts)
+    db.session.flush()
+    staff = [User(username=f'{d.name.lower()}_staff', role='staff', department_id=d.id) for d in depts]
+    db.session.add_all(staff)
+    db.session.flush()
+    start = datetime(2024, 1, 1)
+    db.session.execute(db.insert(Ticket), [{
+        'tenant_name': 'Tenant User', 'anonymous': i % 7 == 0, 'type': 'Plumbing', 'priority': 'Low',
+        'description': f'Ticket {i}: water leaking under the sink in unit {i % 300}',
+        'photo_url': f'http://localhost:5000/uploads/ab/cd/{i:064x}.jpg' if i % 3 == 0 else None,
+        'status': STATUSES[i % len(STATUSES)],
+        'assigned_dept_id': depts[i % 4].id if i % 5 else None,
+        'assigned_staff_id': staff[i % 4].id if i % 5 > 1 else None,
+        'created_at': start + timedelta(minutes=i),
+        'accepted_at': start + timedelta(minutes=i + 30) if i % 5 > 1 else None,
+        'resolved_at': start + timedelta(minutes=i + 90) if i % 5 == 4 else None,
+        'updated_at': start + timedelta(minutes=i + 90),
+    } for i in range(tickets)])
+    db.session.commit()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(tickets):
+    with app.app_context():
+        seed(tickets)
+
+        db.session.expunge_all()
+        objects, load = timed(lambda: Ticket.query.all())
+        dicts, build = timed(lambda: [t.to_dict() for t in objects])
+        body, dump = timed(lambda: json.dumps(dicts).encode())
+        print(f'{tickets} tickets                  load ms   build ms    dump ms   total ms   bytes')
+        print(f'  to_dict + json.dumps     {load:9.1f}  {build:9.1f}  {dump:9.1f}  {load + build + dump:9.1f}  {len(body)}')
+        del objects, dicts
+
+        db.session.expunge_all()
+        name = 'orjson' if serialization.orjson is not None else 'json'
+        rows, load = timed(lambda: ticket_rows(Ticket.query).all())
+        for label, columns in ((f'rows + {name}', False), (f'rows + {name}, columns', True)):
+            encoded, build = timed(lambda: encode_tickets(rows, columns=columns))
+            body, dump = timed(lambda: serialization.dumps(encoded))
+            print(f'  {label:<24} {load:9.1f}  {build:9.1f}  {dump:9.1f}  {load + build + dump:9.1f}  {len(body)}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickets', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    try:
+        for tickets in args.tickets:
+            run(tickets)
+    finally:
+        os.close(_db_fd)
+        os.remove(_db_path)
+
+
+if __name__ == '__main__':
+    main()
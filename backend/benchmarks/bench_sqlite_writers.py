@@ -0,0 +1,129 @@
+"""Concurrent writers against SQLite, stock settings against the production profile.
+
+Starts several processes, like gunicorn workers, each running a few request
+threads that raise tickets and assign them through the API. The same load
+runs three times on a fresh database:
+
+- ``stock``: SQLITE_PROFILE=off and no write queue, i.e. how HubOps used to run
+- ``profile``: WAL, synchronous=NORMAL and busy_timeout on every connection
+- ``profile+queue``: the above plus the batching single-writer queue
+
+    python benchmarks/bench_sqlite_writers.py [--workers 4] [--threads 8] [--writes 50]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'stock': {'SQLITE_PROFILE': 'off', 'WRITE_QUEUE': '0'},
+    'profile': {'SQLITE_PROFILE': 'production', 'WRITE_QUEUE': '0'},
+    'profile+queue': {'SQLITE_PROFILE': 'production', 'WRITE_QUEUE': '1'},
+}
+
+
+def _environment(db_path, mode):
+    os.environ.update(MODES[mode])
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['SCHEDULER_ENABLED'] = '0'
+    os.environ['MEDIA_WORKERS'] = '0'
+    os.environ['RESPONSE_CACHE_TTL'] = '0'
+    sys.path.insert(0, BACKEND)
+
+
+def setup(db_path, mode):
+    _environment(db_path, mode)
+    from app import app
+    from models import db, Department, User
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([User(username='Tenant User', role='tenant'), User(username='General Manager', role='gm')])
+        db.session.add_all(Department(name=name) for name in ('Maintenance', 'Security', 'Housekeeping', 'IT'))
+        db.session.commit()
+
+
+def worker(db_path, mode, threads, writes, results):
+    _environment(db_path, mode)
+    from app import app
+    client = app.test_client()
+    tenant = {'Authorization': 'Bearer ' + client.post('/auth/login', json={'role': 'tenant'}).get_json()['token']}
+    gm = {'Authorization': 'Bearer ' + client.post('/auth/login', json={'role': 'gm'}).get_json()['token']}
+    counts = {'ok': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def run():
+        ok = errors = 0
+        for i in range(writes):
+            try:
+                res = client.post('/tickets', headers=tenant, json={
+                    'type': 'Plumbing', 'priority': 'Low', 'description': f'Leak {i}'
+                })
+                if res.status_code != 201:
+                    errors += 1
+                    continue
+                res = client.put(f"/tickets/{res.get_json()['id']}/action", headers=gm,
+                                 json={'action': 'assign', 'department': 'Maintenance'})
+                ok, errors = (ok + 2, errors) if res.status_code == 200 else (ok + 1, errors + 1)
+            except Exception:
+                errors += 1
+        with lock:
+            counts['ok'] += ok
+            counts['errors'] += errors
+
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(counts)
+
+
+def run_mode(mode, args):
+    ctx = multiprocessing.get_context('spawn')
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        setup_process = ctx.Process(target=setup, args=(db_path, mode))
+        setup_process.start()
+        setup_process.join()
+
+        results = ctx.Queue()
+        processes = [ctx.Process(target=worker, args=(db_path, mode, args.threads, args.writes, results))
+                     for _ in range(args.workers)]
+        start = time.perf_counter()
+        for p in processes:
+            p.start()
+        totals = {'ok': 0, 'errors': 0}
+        for _ in processes:
+            for key, value in results.get().items():
+                totals[key] += value
+        elapsed = time.perf_counter() - start
+        for p in processes:
+            p.join()
+        return totals, elapsed
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f'{args.workers} workers x {args.threads} threads x {args.writes} tickets (create + assign)')
+    for mode in MODES:
+        totals, elapsed = run_mode(mode, args)
+        print(f"{mode:>14}: {totals['ok'] / elapsed:8.1f} writes/s  {totals['errors']:5d} failed  ({elapsed:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""One action applied to many tickets: POST /tickets/bulk-action.
+
+A GM triaging a backlog would otherwise call /tickets/<id>/action once per
+ticket, paying for a lookup, a commit and a full response each time. Here
+the action is looked up in the state machine (workflow.py), and the role
+and the action's arguments (department, staff member) are checked once.
+The targeted rows are read with one locking SELECT and changed with one
+conditional UPDATE per source status, all in a single transaction.
+auto_assign is the exception: its tickets go to different staff members
+(assignment.py), so there is one UPDATE per source status and staff member.
+
+A set-based UPDATE skips the session hooks that keep the rollup, change
+sequence, live events and ticket log in step, so ``workflow.record`` calls
+their explicit helpers.
+"""
+from sqlalchemy import select, update
+
+from models import db
+import assignment
+import changes
+import workflow
+from workflow import TICKET, SCOPE, TransitionError
+
+MAX_TICKETS = 1000
+
+
+def parse_ids(data):
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        raise TransitionError("'ids' must be a non-empty list of ticket ids")
+    if len(ids) > MAX_TICKETS:
+        raise TransitionError(f'At most {MAX_TICKETS} tickets per request')
+    return list(dict.fromkeys(ids))
+
+
+def _spread(groups, values, user):
+    """auto_assign batches: the tickets dealt out over the department's staff by load."""
+    rows = [(transition, row) for transition, group in groups.items() for row in group]
+    staff_ids = assignment.spread(assignment.staff_load(user['dept_id']), len(rows))
+    batches = {}
+    for (transition, row), staff_id in zip(rows, staff_ids):
+        batches.setdefault((transition, staff_id), []).append(row)
+    return [(transition, group, {**values, 'assigned_staff_id': staff_id}, {'staff_id': staff_id})
+            for (transition, staff_id), group in batches.items()]
+
+
+def apply(data, user):
+    """Apply ``data['action']`` to ``data['ids']`` in the current transaction.
+
+    Returns ``{'action', 'seq', 'updated': [ids], 'failed': {id: reason}}``.
+    Tickets the user cannot see are reported as not found, tickets in a
+    state the action does not apply to with their status.
+    """
+    action, compiled, values, payload, now = workflow.prepare(data, user)
+    ids = parse_ids(data)
+
+    # Earlier work in this session must reach the rows read and updated below
+    db.session.flush()
+    query = select(TICKET).where(TICKET.c.id.in_(ids)).with_for_update()
+    if user['role'] in SCOPE:
+        col, key = SCOPE[user['role']]
+        query = query.where(TICKET.c[col] == user[key])
+    rows = {row['id']: dict(row) for row in db.session.execute(query).mappings()}
+
+    groups, updated, failed = {}, [], {}
+    for ticket_id in ids:
+        row = rows.get(ticket_id)
+        transition = next((c for c in compiled if c.allows(row, user)), None) if row else None
+        if transition is not None:
+            groups.setdefault(transition, []).append(row)
+            updated.append(ticket_id)
+        elif row is None:
+            failed[str(ticket_id)] = 'not found'
+        else:
+            failed[str(ticket_id)] = f"cannot {action} a ticket that is {row['status']}"
+
+    seq = None
+    if groups:
+        seq = changes.stamp_updates(db.session, values, now)
+        batches = _spread(groups, values, user) if action == 'auto_assign' else \
+            [(transition, group, values, payload) for transition, group in groups.items()]
+        for transition, group, batch_values, batch_payload in batches:
+            new_values = transition.values(batch_values)
+            db.session.execute(
+                update(TICKET)
+                .where(TICKET.c.id.in_([row['id'] for row in group]), transition.conditions[user['role']])
+                .values(**new_values),
+                transition.params(user)
+            )
+            workflow.record(group, new_values, action, user, batch_payload, now)
+        workflow.expire(updated)
+
+    return {'action': action, 'seq': seq, 'updated': updated, 'failed': failed}
@@ -0,0 +1,200 @@
+"""Shared response cache for the list and dashboard resources.
+
+Every gm and tenant gets the same ticket list, and every user of one
+department the same department list, so bodies are cached per scope rather
+than per user. Keys hold the endpoint, the scope, its data version from
+changes.py and the query string. A key can therefore never serve a body
+older than its data, even when another worker wrote it.
+
+Entries are tagged with the version names they depend on. When a
+transaction advances those versions (changes.TOUCHED_KEY), the tagged
+entries are dropped on commit. That frees the memory straight away and
+keeps a shared backend tidy.
+
+LocalCache is an LRU with a TTL for one process. Set RESPONSE_CACHE_URL to a
+Redis URL (``pip install redis``) to share entries between gunicorn
+workers; there Redis' own eviction (``maxmemory-policy allkeys-lru``)
+bounds the size. RESPONSE_CACHE_TTL=0 turns caching off.
+"""
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import changes
+import serialization
+
+DEFAULT_TTL = 30
+DEFAULT_SIZE = 512
+
+
+def key(endpoint, scope, version):
+    args = sorted(request.args.items(multi=True))
+    return f"{endpoint}|{scope}|{version}|{json.dumps(args)}"
+
+
+class LocalCache:
+    """Per-process LRU with a TTL and tag invalidation."""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_SIZE, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires, value, tags)
+        self._tags = {}  # tag -> keys
+        self._lock = threading.Lock()
+        self.metrics = Counter()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    self._drop(key)
+                    self.metrics['expired'] += 1
+                self.metrics['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (self.clock() + self.ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.metrics['evictions'] += 1
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._drop(key)
+                        self.metrics['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self.metrics, 'entries': len(self._entries)}
+
+    def _drop(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """Entries, tag sets and metrics kept in Redis for all workers."""
+
+    PREFIX = 'hubops:cache:'
+
+    def __init__(self, url, ttl=DEFAULT_TTL):
+        import redis  # optional, only needed when RESPONSE_CACHE_URL is set
+        self.ttl = ttl
+        self._redis = redis.Redis.from_url(url)
+
+    def _count(self, metric, n=1):
+        self._redis.hincrby(self.PREFIX + 'metrics', metric, n)
+
+    def get(self, key):
+        raw = self._redis.get(self.PREFIX + key)
+        self._count('misses' if raw is None else 'hits')
+        return None if raw is None else serialization.loads(raw)
+
+    def set(self, key, value, tags=()):
+        pipe = self._redis.pipeline()
+        pipe.setex(self.PREFIX + key, self.ttl, serialization.dumps(value))
+        for tag in tags:
+            pipe.sadd(self.PREFIX + 'tag:' + tag, self.PREFIX + key)
+            pipe.expire(self.PREFIX + 'tag:' + tag, self.ttl)
+        pipe.execute()
+
+    def invalidate(self, tags):
+        for tag in tags:
+            tag_key = self.PREFIX + 'tag:' + tag
+            keys = self._redis.smembers(tag_key)
+            if keys:
+                self._count('invalidations', self._redis.delete(*keys))
+            self._redis.delete(tag_key)
+
+    def clear(self):
+        keys = list(self._redis.scan_iter(self.PREFIX + '*'))
+        if keys:
+            self._redis.delete(*keys)
+
+    def stats(self):
+        metrics = self._redis.hgetall(self.PREFIX + 'metrics')
+        return {k.decode(): int(v) for k, v in metrics.items()}
+
+
+class NullCache:
+    """Stands in when caching is turned off."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, tags=()):
+        pass
+
+    def invalidate(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+backend = LocalCache()
+
+
+def init_app(app):
+    global backend
+    ttl = app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL)
+    if not ttl:
+        backend = NullCache()
+    elif app.config.get('RESPONSE_CACHE_URL'):
+        backend = RedisCache(app.config['RESPONSE_CACHE_URL'], ttl)
+    else:
+        backend = LocalCache(ttl, app.config.get('RESPONSE_CACHE_SIZE', DEFAULT_SIZE))
+
+
+def cached(endpoint, scope, version, tags, compute):
+    """``compute()``'s ``(body, headers)``, from the cache when possible."""
+    cache_key = key(endpoint, scope, version)
+    hit = backend.get(cache_key)
+    if hit is not None:
+        return hit
+    body, headers = compute()
+    backend.set(cache_key, [body, headers], tags)
+    return body, headers
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_touched(session):
+    touched = session.info.pop(changes.TOUCHED_KEY, None)
+    if touched:
+        backend.invalidate(touched)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_touched(session, previous_transaction):
+    session.info.pop(changes.TOUCHED_KEY, None)
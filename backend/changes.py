@@ -0,0 +1,193 @@
+"""Change sequence for delta sync (GET /tickets/changes?since=).
+
+Every flush that writes a Ticket takes the next value of a shared counter
+and stamps it on the ticket as ``change_seq`` (with ``updated_at``). Taking
+the counter locks its row until commit, so sequence order is commit order
+and a client that has seen ``seq`` can ask for everything after it.
+
+Tickets that disappear from someone's view leave a TicketTombstone: a
+deletion removes the ticket for everyone, a reassignment removes it from
+the department it left.
+
+The same table holds data versions for conditional GETs: the ticket
+sequence is the global version, ``ticket:dept:<id>`` is the last sequence
+that touched a department's tickets, ``recurring_task`` counts writes to
+recurring tasks and ``stats`` counts rollup rebuilds. Reading one is a primary-key lookup, so a resource can
+answer If-None-Match without touching the rows it would have listed.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models import db, ChangeSequence, RecurringTask, Ticket, TicketTombstone
+
+SEQUENCE = 'ticket'
+RECURRING_TASKS = 'recurring_task'
+STATS = 'stats'  # bumped when the rollup is rebuilt outside ticket writes
+
+# Version names advanced in the current transaction, for cache.py to
+# invalidate once it commits
+TOUCHED_KEY = 'touched_versions'
+
+
+def dept_scope(dept_id):
+    return f'ticket:dept:{dept_id}'
+
+
+def next_seq(connection, name=SEQUENCE):
+    """Advance the named sequence and return the new value."""
+    table = ChangeSequence.__table__
+    value = connection.execute(
+        table.update()
+        .where(table.c.name == name)
+        .values(value=table.c.value + 1)
+        .returning(table.c.value)
+    ).scalar()
+    if value is None:
+        connection.execute(table.insert().values(name=name, value=1))
+        value = 1
+    return value
+
+
+def set_versions(session, names, value):
+    table = ChangeSequence.__table__
+    connection = session.connection()
+    for name in names:
+        if not connection.execute(table.update().where(table.c.name == name).values(value=value)).rowcount:
+            connection.execute(table.insert().values(name=name, value=value))
+    session.info.setdefault(TOUCHED_KEY, set()).update(names)
+
+
+def bump(session, name):
+    """Advance ``name`` in the session's transaction and return the new value."""
+    value = next_seq(session.connection(), name)
+    session.info.setdefault(TOUCHED_KEY, set()).add(name)
+    return value
+
+
+def current_seq(name=SEQUENCE):
+    return db.session.query(ChangeSequence.value).filter_by(name=name).scalar() or 0
+
+
+def versions(*names):
+    """Current values of several sequences in one query, 0 for unused ones."""
+    rows = dict(db.session.query(ChangeSequence.name, ChangeSequence.value).filter(ChangeSequence.name.in_(names)))
+    return [rows.get(name, 0) for name in names]
+
+
+def ticket_scope(user):
+    """Version name for the tickets ``user`` can list: per department for dept and staff."""
+    if user['role'] in ('dept', 'staff'):
+        return dept_scope(user['dept_id'])
+    return SEQUENCE
+
+
+def stamp_inserts(session, rows, now):
+    """Sequence and versions for tickets about to be written with a bulk INSERT."""
+    seq = bump(session, SEQUENCE)
+    for row in rows:
+        row.update(change_seq=seq, updated_at=now)
+    depts = {row['assigned_dept_id'] for row in rows} - {None}
+    set_versions(session, [dept_scope(d) for d in depts], seq)
+
+
+def stamp_updates(session, values, now):
+    """Add the next change_seq and updated_at to a set-based UPDATE's ``values``."""
+    seq = bump(session, SEQUENCE)
+    values.update(change_seq=seq, updated_at=now)
+    return seq
+
+
+def record_updates(session, rows, values):
+    """Versions and tombstones for tickets changed with a set-based UPDATE.
+
+    ``rows`` are the tickets as they were, ``values`` what the UPDATE set,
+    stamped by ``stamp_updates``.
+    """
+    seq = values['change_seq']
+    depts = {row['assigned_dept_id'] for row in rows}
+    if 'assigned_dept_id' in values:
+        new_dept = values['assigned_dept_id']
+        depts.add(new_dept)
+        moved = [row for row in rows if row['assigned_dept_id'] not in (None, new_dept)]
+        if moved:
+            session.execute(db.insert(TicketTombstone), [
+                {'ticket_id': row['id'], 'dept_id': row['assigned_dept_id'], 'change_seq': seq} for row in moved
+            ])
+    set_versions(session, [dept_scope(d) for d in depts - {None}], seq)
+
+
+def record_deletes(session, rows):
+    """Sequence, tombstones and versions for tickets removed with a set-based DELETE.
+
+    ``rows`` hold each ticket's ``id`` and ``assigned_dept_id``. Returns the sequence.
+    """
+    seq = bump(session, SEQUENCE)
+    session.execute(db.insert(TicketTombstone), [
+        {'ticket_id': row['id'], 'dept_id': None, 'change_seq': seq} for row in rows
+    ])
+    set_versions(session, [dept_scope(d) for d in {row['assigned_dept_id'] for row in rows} - {None}], seq)
+    return seq
+
+
+def changed_tickets(query, since, limit):
+    """Up to ``limit`` tickets from ``query`` written after ``since``, oldest write first.
+
+    Returns ``(tickets, last_seq)``, where ``last_seq`` is None when no later
+    writes are left. A page never ends part way through one write, so a
+    bulk write bigger than ``limit`` comes back whole.
+    """
+    query = query.filter(Ticket.change_seq > since)
+    rows = query.order_by(Ticket.change_seq, Ticket.id).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1].change_seq
+    if rows[limit].change_seq == last:
+        rows = [row for row in rows[:limit] if row.change_seq < last] or \
+            query.filter(Ticket.change_seq == last).order_by(Ticket.id).all()
+    else:
+        rows = rows[:limit]
+    return rows, rows[-1].change_seq
+
+
+def removed_ids(since, user, until=None):
+    """Ids that left ``user``'s view after ``since`` (and up to ``until``)."""
+    query = db.session.query(TicketTombstone.ticket_id).filter(TicketTombstone.change_seq > since)
+    if until is not None:
+        query = query.filter(TicketTombstone.change_seq <= until)
+    if user['role'] in ('dept', 'staff'):
+        query = query.filter(db.or_(TicketTombstone.dept_id.is_(None), TicketTombstone.dept_id == user['dept_id']))
+    else:
+        # Reassignments never hide a ticket from gm or tenants
+        query = query.filter(TicketTombstone.dept_id.is_(None))
+    return sorted({ticket_id for ticket_id, in query})
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_changes(session, flush_context, instances):
+    if any(isinstance(obj, RecurringTask) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        bump(session, RECURRING_TASKS)
+
+    new = [obj for obj in session.new if isinstance(obj, Ticket)]
+    dirty = [obj for obj in session.dirty if isinstance(obj, Ticket) and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Ticket)]
+    if not (new or dirty or deleted):
+        return
+
+    seq = bump(session, SEQUENCE)
+    now = datetime.utcnow()
+    depts = set()
+    for ticket in new + dirty:
+        ticket.change_seq = seq
+        ticket.updated_at = now
+        depts.add(ticket.assigned_dept_id)
+    for ticket in dirty:
+        history = inspect(ticket).attrs.assigned_dept_id.history
+        if history.deleted and history.deleted[0] is not None and history.deleted[0] != ticket.assigned_dept_id:
+            session.add(TicketTombstone(ticket_id=ticket.id, dept_id=history.deleted[0], change_seq=seq))
+            depts.add(history.deleted[0])
+    for ticket in deleted:
+        session.add(TicketTombstone(ticket_id=ticket.id, dept_id=None, change_seq=seq))
+        depts.add(ticket.assigned_dept_id)
+    set_versions(session, [dept_scope(d) for d in depts - {None}], seq)
@@ -0,0 +1,34 @@
+"""Conditional GET for the list and dashboard resources.
+
+A resource builds its ETag from the data versions kept by changes.py plus
+whatever else shapes the body (scope, query string, the current day), and
+checks it before running its queries. A matching If-None-Match is answered
+with an empty 304, so an unchanged dashboard costs a primary-key lookup.
+
+Responses are marked ``no-cache``: browsers keep them but revalidate every
+time, which axios gets for free through the browser's HTTP cache.
+"""
+import hashlib
+
+from flask import Response, request
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def etag(*parts):
+    """A strong ETag over ``parts``, with the query string mixed in."""
+    args = sorted(request.args.items(multi=True))
+    digest = hashlib.sha1(repr((parts, args)).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def headers(tag):
+    return {'ETag': tag, 'Cache-Control': CACHE_CONTROL}
+
+
+def not_modified(tag):
+    """A 304 response if the client already holds ``tag``, else None."""
+    # Weak comparison, as RFC 9110 asks for If-None-Match
+    if request.if_none_match.contains_weak(tag.strip('"')):
+        return Response(status=304, headers=headers(tag))
+    return None
@@ -0,0 +1,123 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+# Point the app at a throwaway database before it is imported. Set
+# TEST_DATABASE_URL to run the suite against an empty PostgreSQL database.
+_db_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or f'sqlite:///{_db_path}'
+
+from app import app  # noqa: E402
+from models import db, User, Department, Ticket  # noqa: E402
+import cache  # noqa: E402
+
+DEPARTMENTS = ['Maintenance', 'Security', 'Housekeeping', 'IT']
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'sqlite_only: checks SQLite query plans or PRAGMAs')
+
+
+def pytest_collection_modifyitems(config, items):
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+    skip = pytest.mark.skip(reason='needs SQLite')
+    for item in items:
+        if 'sqlite_only' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def client(tmp_path):
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['MEDIA_WORKERS'] = 0  # tests drain the media queue synchronously
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+    # Versions restart with the schema, so cached bodies would look current
+    cache.backend.clear()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(username='Tenant User', role='tenant'))
+        db.session.add(User(username='General Manager', role='gm'))
+        for name in DEPARTMENTS:
+            dept = Department(name=name)
+            db.session.add(dept)
+            db.session.flush()
+            db.session.add(User(username=f'{name.lower()}_head', role='dept', department_id=dept.id))
+            db.session.add(User(username=f'{name.lower()}_staff', role='staff', department_id=dept.id))
+        db.session.commit()
+        yield app.test_client()
+        db.session.remove()
+
+
+@pytest.fixture
+def login(client):
+    def _login(role, department=None):
+        res = client.post('/auth/login', json={'role': role, 'department': department})
+        return {'Authorization': f"Bearer {res.get_json()['token']}"}
+    return _login
+
+
+@pytest.fixture
+def raise_ticket(client, login):
+    """Raise a ticket as the tenant through POST /tickets and return its id."""
+    def _raise(description='Leaking tap'):
+        res = client.post('/tickets', headers=login('tenant'), json={
+            'type': 'Plumbing', 'priority': 'Low', 'description': description
+        })
+        return res.get_json()['id']
+    return _raise
+
+
+@pytest.fixture
+def add_ticket(client):
+    """Insert a ticket straight into the database and return its id.
+
+    Fields default to a low priority plumbing leak raised by the tenant.
+    ``commit=False`` only flushes, for work that commits elsewhere.
+    """
+    def _add(commit=True, **fields):
+        ticket = Ticket(**{'tenant_name': 'Tenant User', 'type': 'Plumbing', 'priority': 'Low',
+                           'description': 'Leak', **fields})
+        db.session.add(ticket)
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        return ticket.id
+    return _add
+
+
+@pytest.fixture
+def act(client):
+    """PUT a workflow action on a ticket and return the response."""
+    def _act(headers, ticket_id, **body):
+        return client.put(f'/tickets/{ticket_id}/action', headers=headers, json=body)
+    return _act
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager collecting the SQL statements issued inside it."""
+    @contextmanager
+    def _count():
+        statements = []
+
+        def before_execute(conn, cursor, statement, params, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_execute)
+    return _count
+
+
+def pytest_sessionfinish(session, exitstatus):
+    os.close(_db_fd)
+    os.remove(_db_path)
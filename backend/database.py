@@ -0,0 +1,69 @@
+"""Engine configuration and read-replica routing.
+
+DATABASE_URL picks the primary database: SQLite by default, or PostgreSQL
+(``pip install psycopg2-binary``). Outside SQLite the engine gets a
+QueuePool sized by the DB_POOL_* settings. ``pool_pre_ping`` drops
+connections the server closed, and ``pool_recycle`` replaces them before a
+proxy or PgBouncer does.
+
+Set DATABASE_READ_URL to a streaming replica and views decorated with
+``@read_only`` run their queries there. Flushes still go to the primary,
+and so does everything outside those views.
+"""
+from functools import wraps
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+
+REPLICA = 'replica'
+
+
+def normalize_url(url):
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, config):
+    if url.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+def init_app(app):
+    """Fill in engine options and the replica bind; call before ``db.init_app``."""
+    config = app.config
+    url = config['SQLALCHEMY_DATABASE_URI'] = normalize_url(config['SQLALCHEMY_DATABASE_URI'])
+    config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(url, config))
+    if config.get('DATABASE_READ_URL'):
+        read_url = normalize_url(config['DATABASE_READ_URL'])
+        config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA] = {'url': read_url, **engine_options(read_url, config)}
+
+
+def read_only(view):
+    """Let ``view`` read from the replica, if one is configured."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_replica = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g.pop('read_replica', None)
+    return wrapper
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing
+                and has_request_context() and g.get('read_replica')):
+            replica = self._db.engines.get(REPLICA)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,277 @@
+"""Live ticket change feed behind GET /tickets/stream.
+
+Ticket inserts, updates and deletes are collected by a flush hook and
+published once the transaction commits, so every write path (TicketAction,
+TicketList.post, the scheduler's bulk insert) feeds the stream without the
+resources knowing about it. Events are compact: the ticket id, its
+change_seq, its status and department, and only the fields that changed,
+keyed as in ``Ticket.to_dict()``. After a reconnect, clients catch up from
+the last ``seq`` they saw with GET /tickets/changes?since=.
+
+The default broker fans events out to subscribers in this process. Set
+EVENTS_BROKER_URL to a Redis URL (``pip install redis``) to share them
+between gunicorn workers; each process then relays the channel to its own
+subscribers.
+"""
+import json
+import queue
+import threading
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models import Department, Ticket, User
+from uploads import thumbnail_url
+
+QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15
+CHANNEL = 'hubops:tickets'
+
+PENDING_KEY = 'ticket_events'
+# change_seq travels as the event's 'seq'; updated_at is implied by it
+COLUMNS = [c.key for c in Ticket.__table__.columns if c.key not in ('change_seq', 'updated_at')]
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _fields(session, ticket, names):
+    """``Ticket.to_dict()`` entries for the given columns of ``ticket``."""
+    fields = {name: _jsonable(getattr(ticket, name)) for name in names}
+    if 'tenant_name' in fields or 'anonymous' in fields:
+        fields['tenant_name'] = 'Anonymous' if ticket.anonymous else ticket.tenant_name
+    # Relationships may still point at the old row mid-flush; look the names up
+    with session.no_autoflush:
+        if 'assigned_dept_id' in fields:
+            dept = session.get(Department, ticket.assigned_dept_id) if ticket.assigned_dept_id else None
+            fields['assigned_dept'] = dept.name if dept else None
+        if 'assigned_staff_id' in fields:
+            staff = session.get(User, ticket.assigned_staff_id) if ticket.assigned_staff_id else None
+            fields['assigned_staff_name'] = staff.username if staff else None
+    if 'photo_url' in fields:
+        fields['photo_thumb_url'] = thumbnail_url(ticket.photo_url)
+    if 'proof_url' in fields:
+        fields['proof_thumb_url'] = thumbnail_url(ticket.proof_url)
+    return fields
+
+
+def _event(kind, ticket, fields, previous_dept_id=None):
+    return {
+        'type': kind,
+        'id': ticket.id,
+        'seq': ticket.change_seq,
+        'status': ticket.status,
+        'assigned_dept_id': ticket.assigned_dept_id,
+        'previous_dept_id': previous_dept_id,
+        'fields': fields,
+    }
+
+
+def created(session, ticket):
+    names = [name for name in COLUMNS if getattr(ticket, name) is not None]
+    return _event('created', ticket, _fields(session, ticket, names))
+
+
+def updated(session, ticket):
+    state = inspect(ticket)
+    names = [name for name in COLUMNS if state.attrs[name].history.has_changes()]
+    if not names:
+        return None
+    dept_history = state.attrs.assigned_dept_id.history
+    previous = dept_history.deleted[0] if dept_history.deleted else ticket.assigned_dept_id
+    return _event('updated', ticket, _fields(session, ticket, names), previous)
+
+
+def deleted(ticket):
+    return _event('removed', ticket, {}, ticket.assigned_dept_id)
+
+
+def record(session, events):
+    """Queue events to publish when ``session`` commits."""
+    session.info.setdefault(PENDING_KEY, []).extend(events)
+
+
+def record_inserts(session, ticket_ids, rows):
+    """Queue ``created`` events for tickets written with a bulk INSERT."""
+    record(session, [created(session, Ticket(id=ticket_id, **row)) for ticket_id, row in zip(ticket_ids, rows)])
+
+
+def record_updates(session, rows, values):
+    """Queue ``updated`` events for tickets changed with a set-based UPDATE.
+
+    ``rows`` are the tickets as they were, ``values`` what the UPDATE set.
+    """
+    # Every row gets the same values, so rows changing the same columns share their fields
+    fields = {}
+    events = []
+    for row in rows:
+        names = tuple(name for name in COLUMNS if name in values and values[name] != row[name])
+        if not names:
+            continue
+        after = SimpleNamespace(**{**row, **values})
+        if names not in fields:
+            fields[names] = _fields(session, after, names)
+        events.append(_event('updated', after, fields[names], row['assigned_dept_id']))
+    record(session, events)
+
+
+def record_deletes(session, rows, seq):
+    """Queue ``removed`` events for tickets deleted with a set-based DELETE at ``seq``."""
+    record(session, [deleted(SimpleNamespace(**row, change_seq=seq)) for row in rows])
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_ticket_events(session, flush_context):
+    events = []
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            events.append(created(session, obj))
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj):
+            events.append(updated(session, obj))
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            events.append(deleted(obj))
+    events = [e for e in events if e]
+    if events:
+        record(session, events)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_ticket_events(session):
+    events = session.info.pop(PENDING_KEY, None)
+    if events:
+        broker.publish(events)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_ticket_events(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+
+
+def visible(event, user):
+    """The event as ``user`` should see it, or None if it is out of scope.
+
+    Mirrors the scoping in TicketList.get: gm and tenant see every ticket,
+    dept and staff only their department's. A ticket moved out of a
+    department reaches that department as a ``removed`` event.
+    """
+    public = {k: v for k, v in event.items() if k != 'previous_dept_id'}
+    role = user['role']
+    if role in ('gm', 'tenant'):
+        return public
+    if role in ('dept', 'staff'):
+        dept_id = user['dept_id']
+        if event['assigned_dept_id'] == dept_id:
+            return public
+        if event['previous_dept_id'] == dept_id:
+            return {'type': 'removed', 'id': event['id'], 'seq': event['seq']}
+    return None
+
+
+class Subscription:
+    """One client's queue. If the client falls too far behind it is told to resync."""
+
+    def __init__(self, size):
+        self.queue = queue.Queue(size)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        if self.overflowed:
+            self.overflowed = False
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            return {'type': 'resync'}
+        return self.queue.get(timeout=timeout)
+
+
+class LocalBroker:
+    """Fans events out to the subscribers in this process."""
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, events):
+        self._deliver(events)
+
+    def _deliver(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            for e in events:
+                subscription.put(e)
+
+
+class RedisBroker(LocalBroker):
+    """Publishes through a Redis channel so every worker process sees every event."""
+
+    def __init__(self, url, channel=CHANNEL, queue_size=QUEUE_SIZE):
+        import redis  # optional, only needed when EVENTS_BROKER_URL is set
+        super().__init__(queue_size)
+        self.channel = channel
+        self._redis = redis.Redis.from_url(url)
+        self._listener = None
+
+    def subscribe(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='events-relay', daemon=True)
+                self._listener.start()
+        return super().subscribe()
+
+    def publish(self, events):
+        self._redis.publish(self.channel, json.dumps(events))
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            self._deliver(json.loads(message['data']))
+
+
+broker = LocalBroker()
+
+
+def init_app(app):
+    global broker
+    url = app.config.get('EVENTS_BROKER_URL')
+    if url:
+        broker = RedisBroker(url)
+
+
+def stream(user, subscription, heartbeat=HEARTBEAT_SECONDS):
+    """Server-sent events for ``user`` until the client disconnects."""
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = subscription.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            event = event if event['type'] == 'resync' else visible(event, user)
+            if event:
+                yield f"data: {json.dumps(event)}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
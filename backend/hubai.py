@@ -0,0 +1,217 @@
+"""HubAI: answers to free-text questions about tickets (POST /ai/query).
+
+A question is routed by keyword, with the substring checks HubAIQuery.post
+always ran, in the same order: the first branch whose keyword appears in
+the lowercased question picks the handler. A table of intents compiled
+into one regex, or a keyword lookup over the question's words, was
+measured and routed two to three times slower than this cascade (see
+benchmarks/bench_hubai.py). Routing costs microseconds either way; the
+answers are what cost.
+
+The counts, summary and busiest department come from one read of the
+rollup counters (analytics.ticket_breakdown), and satisfaction from the
+rating histogram there. These aggregate answers go through the response
+cache (cache.py), keyed by the ticket change sequence and the rollup
+rebuild version. A ticket write or a ``rebuild-stats`` therefore drops
+them, and they never outlive RESPONSE_CACHE_TTL.
+"""
+import re
+from collections import namedtuple
+from functools import wraps
+
+from models import db, Ticket, TicketArchive
+from analytics import average_rating, ticket_breakdown
+from search import tokenize, search_tickets
+import cache
+import changes
+
+FALLBACK = ("I'm not sure I understand. Try asking about open tickets, specific ticket IDs "
+            "(e.g., 'Ticket #10'), or search for issues.")
+
+Question = namedtuple('Question', 'text match')
+
+
+def aggregate(fn):
+    """Serve ``fn()``'s answer from the response cache until tickets or counters change."""
+    @wraps(fn)
+    def cached(question):
+        version = '.'.join(str(v) for v in changes.versions(changes.SEQUENCE, changes.STATS))
+        body, _ = cache.cached('hubai', fn.__name__, version, [changes.SEQUENCE, changes.STATS],
+                               lambda: (fn(question), {}))
+        return body
+    return cached
+
+
+# --- Handlers: Question -> answer, or None for the fallback ---
+
+def _lookup(question):
+    ticket_id = question.match.group(1)
+    # Old resolved tickets live in the archive
+    ticket = db.session.get(Ticket, int(ticket_id)) or db.session.get(TicketArchive, int(ticket_id))
+    if not ticket:
+        return f"I could not find a ticket with ID **#{ticket_id}**."
+    return (
+        f"**Ticket #{ticket.id}** ({ticket.type})\n"
+        f"**Status**: {ticket.status}\n"
+        f"**Priority**: {ticket.priority}\n"
+        f"**Reported By**: {ticket.tenant_name}\n"
+        f"**Description**: \"{ticket.description}\""
+    )
+
+
+def _search(question):
+    # Extract search words: "search for leak" -> ["leak"]
+    words = tokenize(question.text)
+    search_term = ' '.join(words)
+    if not words:
+        return "What would you like me to search for? (e.g., 'Search for leak')"
+    results = search_tickets(words, limit=5)
+    if not results:
+        return f"No tickets found matching '*{search_term}*'."
+    return f"Found **{len(results)}** tickets matching '*{search_term}*':\n" + ''.join(
+        f"- **#{t.id}**: {t.type} ({t.status})\n" for t in results)
+
+
+def _recent(question):
+    results = Ticket.query.order_by(Ticket.created_at.desc()).limit(3).all()
+    if not results:
+        return "No recent activity found."
+    return "**Most Recent Activity:**\n" + ''.join(
+        f"- **#{t.id}** ({t.type}): {t.status} - *{t.description[:30]}...*\n" for t in results)
+
+
+def _priorities(counts):
+    """``{priority: n}`` as "Urgent 2, Low 1", in priority order."""
+    return ', '.join(f"{priority or 'None'} {n}" for priority, n in counts.items() if n)
+
+
+@aggregate
+def _open_count(question):
+    breakdown = ticket_breakdown()
+    count = breakdown['open']
+    split = _priorities({p: c['open'] for p, c in breakdown['by_priority'].items()})
+    return f"There are currently **{count} open tickets** requiring attention" + (f" ({split})." if split else ".")
+
+
+@aggregate
+def _resolved_count(question):
+    count = ticket_breakdown()['resolved']
+    return f"Great news! We have resolved **{count} tickets** so far."
+
+
+@aggregate
+def _total_count(question):
+    count = ticket_breakdown()['total']
+    return f"We have a total of **{count} tickets** recorded in the system."
+
+
+def _count(question):
+    text = question.text
+    if 'ticket' not in text and 'issue' not in text:
+        return None
+    if 'open' in text or 'pending' in text:
+        return _open_count(question)
+    if 'resolved' in text or 'closed' in text:
+        return _resolved_count(question)
+    return _total_count(question)
+
+
+@aggregate
+def _busiest(question):
+    # Ranked by open tickets
+    ranked = [d for d in ticket_breakdown()['departments'] if d['open']]
+    if not ranked:
+        return "Analysis shows no active data for departments yet."
+    busiest = ranked[0]
+    return (
+        f"**{busiest['name']}** is currently the busiest department with **{busiest['open']} open tickets**.\n"
+        "**Open load by department:**\n" + ''.join(
+            f"{rank}. {d['name']}: {d['open']} open ({_priorities(d['open_by_priority'])})\n"
+            for rank, d in enumerate(ranked, 1))
+    )
+
+
+def _department(question):
+    text = question.text
+    return _busiest(question) if 'most' in text or 'worst' in text or 'busiest' in text else None
+
+
+@aggregate
+def _satisfaction(question):
+    avg_rating = average_rating()
+    if not avg_rating:
+        return "We don't have enough feedback data yet to calculate satisfaction."
+    stars = round(avg_rating, 1)
+    if stars >= 4:
+        verdict = "Keep up the great work! 🌟"
+    elif stars >= 3:
+        verdict = "Room for improvement."
+    else:
+        verdict = "Urgent attention recommended."
+    return f"The current tenant satisfaction score is **{stars} / 5.0**. {verdict}"
+
+
+@aggregate
+def _summary(question):
+    breakdown = ticket_breakdown()
+    lines = [f"- Open Issues: {breakdown['open']}", f"- Resolved: {breakdown['resolved']}"]
+    split = _priorities({p: c['open'] for p, c in breakdown['by_priority'].items()})
+    if split:
+        lines.append(f"- Open by priority: {split}")
+    busiest = breakdown['departments'][0] if breakdown['departments'] else None
+    if busiest and busiest['open']:
+        lines.append(f"- Busiest department: {busiest['name']} ({busiest['open']} open)")
+    if breakdown['unassigned_open']:
+        lines.append(f"- Awaiting assignment: {breakdown['unassigned_open']}")
+    return "**Executive Summary**:\n" + '\n'.join(lines) + "\nSystem is operating normally."
+
+
+def _hello(question):
+    return "Hello! I am HubAI, your operations assistant. Ask me about tickets, departments, or tenant satisfaction."
+
+
+def _thanks(question):
+    return "You're welcome! Let me know if you need anything else."
+
+
+HANDLERS = {
+    'lookup': _lookup, 'search': _search, 'recent': _recent, 'count': _count, 'department': _department,
+    'satisfaction': _satisfaction, 'summary': _summary, 'hello': _hello, 'thanks': _thanks,
+}
+
+# "ticket #123" or "issue 45"
+TICKET_ID = re.compile(r'(?:ticket|issue)\s*#?(\d+)')
+
+
+def route(text):
+    """``(intent, match)`` for a lowercased question, or ``(None, None)``.
+
+    ``match`` is the ticket id match for a lookup, else None.
+    """
+    match = TICKET_ID.search(text)
+    if match:
+        return 'lookup', match
+    if 'search' in text or 'find' in text:
+        return 'search', None
+    if 'recent' in text or 'latest' in text or 'last' in text:
+        return 'recent', None
+    if 'how many' in text or 'count' in text:
+        return 'count', None
+    if 'department' in text or 'dept' in text:
+        return 'department', None
+    if 'happy' in text or 'satisfaction' in text or 'rating' in text:
+        return 'satisfaction', None
+    if 'summary' in text or 'status' in text or 'report' in text:
+        return 'summary', None
+    if 'hello' in text or 'hi' in text:
+        return 'hello', None
+    if 'thank' in text:
+        return 'thanks', None
+    return None, None
+
+
+def answer(text):
+    text = text.lower()
+    intent, match = route(text)
+    reply = HANDLERS[intent](Question(text, match)) if intent else None
+    return reply or FALLBACK
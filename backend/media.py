@@ -0,0 +1,184 @@
+"""Background thumbnails and video posters for uploads.
+
+UploadFile.post queues a MediaJob row per stored file. A small pool of
+worker threads claims jobs with a conditional UPDATE, so several gunicorn
+workers (or a dedicated ``flask media-worker``) can share the queue without
+running a job twice. Jobs left 'running' by a dead process are requeued
+when a pool starts.
+
+Images need Pillow; video posters need ffmpeg on PATH. Without them the
+job is marked 'skipped' and image thumbnails keep redirecting to the
+original file.
+"""
+import mimetypes
+import os
+import shutil
+import subprocess
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db, MediaJob
+from uploads import thumbnail_path, upload_root
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional
+    Image = None
+
+THUMB_SIZE = 480
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 30
+STALE_AFTER = timedelta(minutes=10)
+
+
+def media_kind(relative_path):
+    mimetype = mimetypes.guess_type(relative_path)[0] or ''
+    if mimetype.startswith('image/'):
+        return 'image'
+    if mimetype.startswith('video/'):
+        return 'video'
+    return None
+
+
+def _image_thumbnail(source, destination):
+    if Image is None:
+        return False
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((THUMB_SIZE, THUMB_SIZE))
+        image.convert('RGB').save(destination, 'JPEG', quality=80, optimize=True)
+    return True
+
+
+def _video_poster(source, destination):
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return False
+    subprocess.run(
+        [ffmpeg, '-y', '-loglevel', 'error', '-i', source, '-frames:v', '1',
+         '-vf', f"scale='min({THUMB_SIZE},iw)':-2", '-f', 'image2', '-c:v', 'mjpeg', destination],
+        check=True, capture_output=True, timeout=60
+    )
+    return True
+
+
+def generate(relative_path):
+    """Write the derivative for one upload. Returns False if no tool is available."""
+    source = os.path.join(upload_root(), relative_path)
+    destination = os.path.join(upload_root(), thumbnail_path(relative_path))
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+
+    # Render next to the target and rename, so readers never see half a file
+    partial = destination + '.part'
+    make = _image_thumbnail if media_kind(relative_path) == 'image' else _video_poster
+    try:
+        if not make(source, partial):
+            return False
+        os.replace(partial, destination)
+        return True
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def enqueue(relative_path):
+    """Queue derivatives for a stored upload. Re-uploads reuse the existing job."""
+    if media_kind(relative_path) is None:
+        return None
+    job = MediaJob.query.filter_by(source_path=relative_path).first()
+    if job is None:
+        job = MediaJob(source_path=relative_path)
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # The same file uploaded twice at once; the other request queued it
+            db.session.rollback()
+            job = MediaJob.query.filter_by(source_path=relative_path).one()
+    pool.ensure_started(current_app._get_current_object())
+    pool.notify()
+    return job
+
+
+def claim_next():
+    """Atomically move the oldest queued job to 'running' and return it."""
+    while True:
+        job_id = db.session.query(MediaJob.id).filter_by(status='queued').order_by(MediaJob.id).limit(1).scalar()
+        if job_id is None:
+            return None
+        claimed = MediaJob.query.filter_by(id=job_id, status='queued').update({
+            'status': 'running', 'attempts': MediaJob.attempts + 1, 'updated_at': datetime.utcnow()
+        })
+        db.session.commit()
+        if claimed:
+            return db.session.get(MediaJob, job_id)
+
+
+def run_job(job):
+    try:
+        job.status = 'done' if generate(job.source_path) else 'skipped'
+        job.error = None
+    except Exception as e:
+        job.status = 'queued' if job.attempts < MAX_ATTEMPTS else 'failed'
+        job.error = str(e)[:1000]
+    job.updated_at = datetime.utcnow()
+    db.session.commit()
+
+
+def process_pending(limit=None):
+    """Run queued jobs until the queue is empty (or ``limit`` ran). Returns the count."""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def requeue_stale():
+    cutoff = datetime.utcnow() - STALE_AFTER
+    MediaJob.query.filter(MediaJob.status == 'running', MediaJob.updated_at < cutoff).update({'status': 'queued'})
+    db.session.commit()
+
+
+class WorkerPool:
+    """Daemon threads draining the media queue inside this process."""
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def ensure_started(self, app):
+        workers = app.config.get('MEDIA_WORKERS', 0)
+        with self._lock:
+            if self._threads or workers <= 0:
+                return
+            requeue_stale()
+            for n in range(workers):
+                thread = threading.Thread(target=self._work, args=(app,), name=f'media-worker-{n}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _work(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    busy = process_pending(limit=10)
+                except Exception:
+                    app.logger.exception('Media worker failed')
+                    busy = 0
+            if not busy:
+                self._wakeup.wait(POLL_SECONDS)
+                self._wakeup.clear()
+
+
+pool = WorkerPool()
@@ -0,0 +1,55 @@
+"""stats rollup table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:07:26.894976
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stats_rollup',
+    sa.Column('metric', sa.String(length=20), nullable=False),
+    sa.Column('key', sa.String(length=30), nullable=False),
+    sa.Column('sub_key', sa.String(length=30), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total_seconds', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('metric', 'key', 'sub_key')
+    )
+
+    # Seed the counters from the existing tickets; writes keep them current from here
+    op.execute(
+        "INSERT INTO stats_rollup (metric, key, sub_key, count, total_seconds) "
+        "SELECT 'dept_status', COALESCE(CAST(assigned_dept_id AS VARCHAR(30)), ''), COALESCE(status, ''), "
+        "COUNT(id), 0 FROM ticket GROUP BY assigned_dept_id, status"
+    )
+    op.execute(
+        "INSERT INTO stats_rollup (metric, key, sub_key, count, total_seconds) "
+        "SELECT 'rating', CAST(feedback_rating AS VARCHAR(30)), '', COUNT(id), 0 "
+        "FROM ticket WHERE feedback_rating IS NOT NULL GROUP BY feedback_rating"
+    )
+    start = 'COALESCE(accepted_at, created_at, resolved_at)'
+    if op.get_bind().dialect.name == 'sqlite':
+        day = 'date(resolved_at)'
+        seconds = f'(julianday(resolved_at) - julianday({start})) * 86400.0'
+    else:
+        day = 'CAST(CAST(resolved_at AS DATE) AS VARCHAR(30))'
+        seconds = f'EXTRACT(EPOCH FROM resolved_at - {start})'
+    op.execute(
+        "INSERT INTO stats_rollup (metric, key, sub_key, count, total_seconds) "
+        f"SELECT 'resolved_day', {day}, '', COUNT(id), SUM({seconds}) "
+        f"FROM ticket WHERE status = 'Resolved' AND resolved_at IS NOT NULL GROUP BY {day}"
+    )
+
+
+def downgrade():
+    op.drop_table('stats_rollup')
@@ -0,0 +1,50 @@
+"""ticket search index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:40:02.114530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other backends search with ILIKE (see search.py)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS ticket_fts USING fts5(
+        description, type, tenant_name,
+        content='ticket', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS ticket_fts_ai AFTER INSERT ON ticket BEGIN
+        INSERT INTO ticket_fts(rowid, description, type, tenant_name)
+        VALUES (new.id, new.description, new.type, new.tenant_name);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS ticket_fts_ad AFTER DELETE ON ticket BEGIN
+        INSERT INTO ticket_fts(ticket_fts, rowid, description, type, tenant_name)
+        VALUES ('delete', old.id, old.description, old.type, old.tenant_name);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS ticket_fts_au AFTER UPDATE OF description, type, tenant_name ON ticket BEGIN
+        INSERT INTO ticket_fts(ticket_fts, rowid, description, type, tenant_name)
+        VALUES ('delete', old.id, old.description, old.type, old.tenant_name);
+        INSERT INTO ticket_fts(rowid, description, type, tenant_name)
+        VALUES (new.id, new.description, new.type, new.tenant_name);
+    END""")
+    op.execute("INSERT INTO ticket_fts(ticket_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS ticket_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS ticket_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS ticket_fts_ai")
+    op.execute("DROP TABLE IF EXISTS ticket_fts")
@@ -0,0 +1,31 @@
+"""ticket mix rollup counters
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 14:02:37.551820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Seed department x status x priority counts; writes keep them current from here
+    op.execute("DELETE FROM stats_rollup WHERE metric = 'ticket_mix'")
+    op.execute(
+        "INSERT INTO stats_rollup (metric, key, sub_key, count, total_seconds) "
+        "SELECT 'ticket_mix', COALESCE(CAST(assigned_dept_id AS VARCHAR(30)), ''), "
+        "COALESCE(status, '') || '|' || COALESCE(priority, ''), COUNT(id), 0 "
+        "FROM ticket GROUP BY assigned_dept_id, status, priority"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM stats_rollup WHERE metric = 'ticket_mix'")
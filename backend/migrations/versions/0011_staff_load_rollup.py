@@ -0,0 +1,32 @@
+"""staff load rollup counters
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 15:12:44.918305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Seed each staff member's open tickets and estimated seconds; writes keep them current from here
+    op.execute("DELETE FROM stats_rollup WHERE metric = 'staff_load'")
+    op.execute(
+        "INSERT INTO stats_rollup (metric, key, sub_key, count, total_seconds) "
+        "SELECT 'staff_load', CAST(assigned_staff_id AS VARCHAR(30)), '', COUNT(id), "
+        "SUM(COALESCE(assigned_duration_minutes, 0) * 60.0) "
+        "FROM ticket WHERE assigned_staff_id IS NOT NULL AND status IN ('Assigned', 'In Progress') "
+        "AND staff_status IN ('Pending', 'Accepted') GROUP BY assigned_staff_id"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM stats_rollup WHERE metric = 'staff_load'")
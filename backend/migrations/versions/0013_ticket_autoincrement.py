@@ -0,0 +1,50 @@
+"""ticket autoincrement
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 17:02:44.519306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+import search
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def _recreate_ticket(autoincrement):
+    # Only SQLite reuses ids; PostgreSQL sequences never go backwards
+    if op.get_bind().dialect.name != 'sqlite':
+        return False
+    with op.batch_alter_table('ticket', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    return True
+
+
+def upgrade():
+    if not _recreate_ticket(True):
+        return
+    # Recreating ``ticket`` drops the search triggers from 0004
+    search.restore_index(op)
+
+    # Start past every id already used, including archived and deleted
+    # tickets that only their events remember
+    highest = op.get_bind().execute(sa.text(
+        "SELECT max(id) FROM (SELECT max(id) AS id FROM ticket UNION ALL "
+        "SELECT max(id) FROM ticket_archive UNION ALL SELECT max(ticket_id) FROM ticket_event)"
+    )).scalar()
+    if highest:
+        op.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = 'ticket'"))
+        op.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('ticket', :seq)").bindparams(seq=highest))
+
+
+def downgrade():
+    if _recreate_ticket(False):
+        search.restore_index(op)
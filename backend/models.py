@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from uploads import thumbnail_url
+from database import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -27,7 +29,8 @@ class Department(db.Model):
             'name': self.name
         }
 
-class Ticket(db.Model):
+class TicketColumns:
+    """Columns and to_dict() shared by Ticket and TicketArchive."""
     id = db.Column(db.Integer, primary_key=True)
     tenant_name = db.Column(db.String(80), nullable=False)
     anonymous = db.Column(db.Boolean, default=False)
@@ -47,9 +50,10 @@ class Ticket(db.Model):
     rejection_message = db.Column(db.Text, nullable=True)
     accepted_at = db.Column(db.DateTime, nullable=True)
     assigned_duration_minutes = db.Column(db.Integer, nullable=True) # Duration in minutes
-
-    department = db.relationship('Department', backref='tickets')
-    staff = db.relationship('User', foreign_keys=[assigned_staff_id], backref='assigned_tickets')
+    change_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0') # bumped on every write (changes.py)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    due_at = db.Column(db.DateTime, nullable=True) # accepted_at + assigned_duration_minutes (sla.py)
+    breached_at = db.Column(db.DateTime, nullable=True) # set by the SLA sweeper once due_at passes
 
     def to_dict(self):
         return {
@@ -59,6 +63,7 @@ class Ticket(db.Model):
             'type': self.type,
             'priority': self.priority,
             'photo_url': self.photo_url,
+            'photo_thumb_url': thumbnail_url(self.photo_url),
             'description': self.description,
             'status': self.status,
             'assigned_dept': self.department.name if self.department else None,
@@ -68,14 +73,49 @@ class Ticket(db.Model):
             'created_at': self.created_at.isoformat(),
             'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
             'proof_url': self.proof_url,
+            'proof_thumb_url': thumbnail_url(self.proof_url),
             'assigned_staff_id': self.assigned_staff_id,
             'assigned_staff_name': self.staff.username if self.staff else None,
             'staff_status': self.staff_status,
             'rejection_message': self.rejection_message,
             'accepted_at': self.accepted_at.isoformat() if self.accepted_at else None,
-            'assigned_duration_minutes': self.assigned_duration_minutes
+            'assigned_duration_minutes': self.assigned_duration_minutes,
+            'change_seq': self.change_seq,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'due_at': self.due_at.isoformat() if self.due_at else None,
+            'breached_at': self.breached_at.isoformat() if self.breached_at else None
         }
 
+class Ticket(TicketColumns, db.Model):
+    # Matched to the list, dashboard and staff queries in app.py
+    __table_args__ = (
+        db.Index('ix_ticket_created_at', 'created_at'),
+        db.Index('ix_ticket_dept_created', 'assigned_dept_id', 'created_at'),
+        db.Index('ix_ticket_status_created', 'status', 'created_at'),
+        db.Index('ix_ticket_status_resolved', 'status', 'resolved_at'),
+        db.Index('ix_ticket_staff_status', 'assigned_staff_id', 'staff_status'),
+        db.Index('ix_ticket_change_seq', 'change_seq'),
+        db.Index('ix_ticket_dept_change_seq', 'assigned_dept_id', 'change_seq'),
+        db.Index('ix_ticket_status_due', 'status', 'due_at'),
+        # Never hand out an id again once its ticket is archived or deleted
+        {'sqlite_autoincrement': True},
+    )
+
+    # Eager-loaded in the same SELECT since to_dict() reads both for every row
+    department = db.relationship('Department', backref='tickets', lazy='joined')
+    staff = db.relationship('User', foreign_keys='Ticket.assigned_staff_id', backref='assigned_tickets', lazy='joined')
+
+class TicketArchive(TicketColumns, db.Model):
+    """Resolved tickets moved out of ``ticket`` by archive.py, ids unchanged."""
+    # History lists page the same way as the ticket list
+    __table_args__ = (
+        db.Index('ix_ticket_archive_created_at', 'created_at'),
+        db.Index('ix_ticket_archive_dept_created', 'assigned_dept_id', 'created_at'),
+    )
+
+    department = db.relationship('Department', lazy='joined')
+    staff = db.relationship('User', foreign_keys='TicketArchive.assigned_staff_id', lazy='joined')
+
 class RecurringTask(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -84,8 +124,9 @@ class RecurringTask(db.Model):
     next_run_date = db.Column(db.Date, nullable=False)
     assigned_dept_id = db.Column(db.Integer, db.ForeignKey('department.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    catch_up_policy = db.Column(db.String(20), nullable=False, default='coalesce', server_default='coalesce') # skip, coalesce, backfill
 
-    department = db.relationship('Department', backref='recurring_tasks')
+    department = db.relationship('Department', backref='recurring_tasks', lazy='joined')
 
     def to_dict(self):
         return {
@@ -95,5 +136,80 @@ class RecurringTask(db.Model):
             'frequency_days': self.frequency_days,
             'next_run_date': self.next_run_date.isoformat(),
             'assigned_dept_id': self.assigned_dept_id,
-            'assigned_dept': self.department.name if self.department else None
+            'assigned_dept': self.department.name if self.department else None,
+            'catch_up_policy': self.catch_up_policy
+        }
+
+class StatsRollup(db.Model):
+    """Running dashboard counters, kept in step with ticket writes by rollup.py."""
+    metric = db.Column(db.String(20), primary_key=True) # 'dept_status', 'ticket_mix', 'staff_load', 'rating', 'resolved_day'
+    key = db.Column(db.String(30), primary_key=True) # dept id, staff id, rating or YYYY-MM-DD
+    sub_key = db.Column(db.String(30), primary_key=True, default='') # status for 'dept_status'
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_seconds = db.Column(db.Float, nullable=False, default=0) # resolution time for 'resolved_day', estimates for 'staff_load'
+
+class MediaJob(db.Model):
+    """Thumbnail/poster generation queued for an uploaded file (see media.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    source_path = db.Column(db.String(255), unique=True, nullable=False) # relative to the upload folder
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, running, done, skipped, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_media_job_status', 'status', 'id'),
+    )
+
+class ChangeSequence(db.Model):
+    """Named counters handed out by changes.next_seq()."""
+    name = db.Column(db.String(30), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class TicketTombstone(db.Model):
+    """A ticket deleted (dept_id NULL) or moved out of ``dept_id`` at ``change_seq``."""
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, nullable=False) # no FK: the ticket may be gone
+    dept_id = db.Column(db.Integer, nullable=True)
+    change_seq = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_ticket_tombstone_seq', 'change_seq'),
+        db.Index('ix_ticket_tombstone_dept_seq', 'dept_id', 'change_seq'),
+    )
+
+class TicketEvent(db.Model):
+    """One ticket transition, appended by ticket_log.py and never updated."""
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, nullable=False) # in ticket or, once archived, ticket_archive
+    action = db.Column(db.String(30), nullable=False) # 'create' or a TicketAction action
+    actor_id = db.Column(db.Integer, nullable=True) # NULL for the scheduler
+    actor_role = db.Column(db.String(20), nullable=True)
+    status = db.Column(db.String(20), nullable=True) # ticket status after the action
+    payload = db.Column(db.JSON, nullable=True) # reasons, proof, staff or department
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # History per ticket, and time-window scans for the workflow analytics
+    __table_args__ = (
+        db.Index('ix_ticket_event_ticket', 'ticket_id', 'id'),
+        db.Index('ix_ticket_event_created', 'created_at'),
+        db.Index('ix_ticket_event_action_created', 'action', 'created_at'),
+        db.Index('ix_ticket_event_actor_created', 'actor_id', 'created_at'),
+    )
+
+    # No foreign key, since events outlive the move to ticket_archive
+    ticket = db.relationship('Ticket', primaryjoin='foreign(TicketEvent.ticket_id) == Ticket.id')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ticket_id': self.ticket_id,
+            'action': self.action,
+            'actor_id': self.actor_id,
+            'actor_role': self.actor_role,
+            'status': self.status,
+            'payload': self.payload or {},
+            'created_at': self.created_at.isoformat()
         }
@@ -0,0 +1,254 @@
+"""Incrementally maintained dashboard counters.
+
+Every flush that inserts, updates or deletes a Ticket adjusts the matching
+StatsRollup rows in the same transaction, so the dashboard can read a
+handful of counters instead of scanning ``ticket``. ``rebuild()`` recomputes
+the whole table from scratch (``flask rebuild-stats``) to verify or repair it.
+Moving tickets to ``ticket_archive`` (archive.py) leaves the counters as
+they are, so the recount reads both tables.
+"""
+from collections import defaultdict
+
+from sqlalchemy import event, inspect, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import db, Ticket, TicketArchive, StatsRollup
+import changes
+
+TRACKED = ('status', 'assigned_dept_id', 'priority', 'feedback_rating', 'resolved_at', 'accepted_at', 'created_at',
+           'assigned_staff_id', 'staff_status', 'assigned_duration_minutes')
+
+# A staff member's open load: tickets handed to them and not yet submitted
+LOAD_STATUSES = ('Assigned', 'In Progress')
+LOAD_STAFF_STATUSES = ('Pending', 'Accepted')
+
+
+def duration_seconds(end, start):
+    """Seconds between two datetime columns, computed in the database."""
+    if db.engine.dialect.name == 'sqlite':
+        return (db.func.julianday(end) - db.func.julianday(start)) * 86400.0
+    return db.func.extract('epoch', end - start)
+
+
+def mix_key(status, priority):
+    """sub_key of a 'ticket_mix' counter: one per department, status and priority."""
+    return f"{status or ''}|{priority or ''}"
+
+
+def contributions(state):
+    """Counters a ticket in ``state`` (TRACKED field -> value) adds to.
+
+    Returns a list of ``((metric, key, sub_key), seconds)`` pairs, each worth
+    one count.
+    """
+    dept = '' if state['assigned_dept_id'] is None else str(state['assigned_dept_id'])
+    result = [
+        (('dept_status', dept, state['status'] or ''), 0.0),
+        (('ticket_mix', dept, mix_key(state['status'], state['priority'])), 0.0),
+    ]
+    if (state['assigned_staff_id'] is not None and state['status'] in LOAD_STATUSES
+            and state['staff_status'] in LOAD_STAFF_STATUSES):
+        minutes = state['assigned_duration_minutes'] or 0
+        result.append((('staff_load', str(state['assigned_staff_id']), ''), minutes * 60.0))
+    if state['feedback_rating'] is not None:
+        result.append((('rating', str(state['feedback_rating']), ''), 0.0))
+    if state['status'] == 'Resolved' and state['resolved_at']:
+        start = state['accepted_at'] or state['created_at'] or state['resolved_at']
+        seconds = (state['resolved_at'] - start).total_seconds()
+        result.append((('resolved_day', state['resolved_at'].date().isoformat(), ''), seconds))
+    return result
+
+
+def _current_state(ticket):
+    return {attr: getattr(ticket, attr) for attr in TRACKED}
+
+
+def _previous_state(ticket):
+    state = {}
+    attrs = inspect(ticket).attrs
+    for attr in TRACKED:
+        history = attrs[attr].history
+        if history.deleted:
+            state[attr] = history.deleted[0]
+        elif history.unchanged:
+            state[attr] = history.unchanged[0]
+        else:
+            state[attr] = getattr(ticket, attr)
+    return state
+
+
+def _upsert(connection, key, count, seconds):
+    table = StatsRollup.__table__
+    values = dict(zip(('metric', 'key', 'sub_key'), key), count=count, total_seconds=seconds)
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table).values(**values).on_conflict_do_update(
+            index_elements=[table.c.metric, table.c.key, table.c.sub_key],
+            set_={'count': table.c.count + count, 'total_seconds': table.c.total_seconds + seconds}
+        )
+        connection.execute(stmt)
+        return
+
+    match = (table.c.metric == key[0]) & (table.c.key == key[1]) & (table.c.sub_key == key[2])
+    result = connection.execute(table.update().where(match).values(
+        count=table.c.count + count, total_seconds=table.c.total_seconds + seconds
+    ))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**values))
+
+
+def apply_deltas(connection, deltas):
+    """Add ``{key: [count, seconds]}`` increments to the rollup table."""
+    for key, (count, seconds) in deltas.items():
+        if count or seconds:
+            _upsert(connection, key, count, seconds)
+
+
+def add_change(deltas, before, after):
+    """Accumulate the counter changes for one ticket moving from ``before`` to ``after``.
+
+    Either side may be None for inserts and deletes.
+    """
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        for key, seconds in contributions(state):
+            deltas[key][0] += sign
+            deltas[key][1] += sign * seconds
+
+
+def record_inserts(connection, states):
+    """Count tickets written with a bulk INSERT, which skips the flush hook.
+
+    ``states`` are the inserted rows as dicts holding the TRACKED fields.
+    """
+    deltas = defaultdict(lambda: [0, 0.0])
+    for state in states:
+        add_change(deltas, None, {attr: state.get(attr) for attr in TRACKED})
+    apply_deltas(connection, deltas)
+
+
+def record_updates(connection, rows, values):
+    """Count tickets changed with a set-based UPDATE, which skips the flush hook.
+
+    ``rows`` are the tickets as they were, ``values`` what the UPDATE set.
+    """
+    deltas = defaultdict(lambda: [0, 0.0])
+    changed = {attr: value for attr, value in values.items() if attr in TRACKED}
+    for row in rows:
+        before = {attr: row[attr] for attr in TRACKED}
+        add_change(deltas, before, {**before, **changed})
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_ticket_changes(session, flush_context):
+    deltas = defaultdict(lambda: [0, 0.0])
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            add_change(deltas, None, _current_state(obj))
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj):
+            add_change(deltas, _previous_state(obj), _current_state(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            add_change(deltas, _previous_state(obj), None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+# Load the old value on assignment so the flush hook always sees what a
+# tracked field changed from, even if it was expired at the time.
+for _attr in TRACKED:
+    event.listen(getattr(Ticket, _attr), 'set', lambda *args: None, active_history=True)
+
+
+def _all_tickets():
+    """``ticket`` and ``ticket_archive`` as one subquery: archived tickets still count."""
+    return union_all(*(
+        select(*[model.__table__.c[name] for name in ('id',) + TRACKED]) for model in (Ticket, TicketArchive)
+    )).subquery()
+
+
+def compute():
+    """Counters recomputed from the ticket and archive tables with grouped queries."""
+    totals = {}
+    t = _all_tickets()
+
+    rows = db.session.query(
+        t.c.assigned_dept_id, t.c.status, db.func.count(t.c.id)
+    ).group_by(t.c.assigned_dept_id, t.c.status)
+    for dept_id, status, count in rows:
+        totals[('dept_status', '' if dept_id is None else str(dept_id), status or '')] = (count, 0.0)
+
+    rows = db.session.query(
+        t.c.assigned_dept_id, t.c.status, t.c.priority, db.func.count(t.c.id)
+    ).group_by(t.c.assigned_dept_id, t.c.status, t.c.priority)
+    for dept_id, status, priority, count in rows:
+        totals[('ticket_mix', '' if dept_id is None else str(dept_id), mix_key(status, priority))] = (count, 0.0)
+
+    rows = db.session.query(
+        t.c.assigned_staff_id, db.func.count(t.c.id),
+        db.func.sum(db.func.coalesce(t.c.assigned_duration_minutes, 0) * 60.0)
+    ).filter(t.c.assigned_staff_id.isnot(None), t.c.status.in_(LOAD_STATUSES),
+             t.c.staff_status.in_(LOAD_STAFF_STATUSES)).group_by(t.c.assigned_staff_id)
+    for staff_id, count, seconds in rows:
+        totals[('staff_load', str(staff_id), '')] = (count, float(seconds or 0))
+
+    rows = db.session.query(
+        t.c.feedback_rating, db.func.count(t.c.id)
+    ).filter(t.c.feedback_rating.isnot(None)).group_by(t.c.feedback_rating)
+    for rating, count in rows:
+        totals[('rating', str(rating), '')] = (count, 0.0)
+
+    resolved_day = db.func.date(t.c.resolved_at)
+    rows = db.session.query(
+        resolved_day,
+        db.func.count(t.c.id),
+        db.func.sum(duration_seconds(t.c.resolved_at, db.func.coalesce(t.c.accepted_at, t.c.created_at)))
+    ).filter(t.c.status == 'Resolved', t.c.resolved_at.isnot(None)).group_by(resolved_day)
+    for day, count, seconds in rows:
+        totals[('resolved_day', str(day), '')] = (count, float(seconds or 0))
+
+    return totals
+
+
+def rebuild():
+    """Replace the rollup with freshly computed counters.
+
+    Returns ``(counters, mismatched)`` where ``mismatched`` is how many
+    counters disagreed with the running totals before the rebuild.
+    """
+    fresh = compute()
+    current = {
+        (r.metric, r.key, r.sub_key): (r.count, r.total_seconds)
+        for r in StatsRollup.query.all() if r.count or r.total_seconds
+    }
+    mismatched = 0
+    for key in set(fresh) | set(current):
+        count, seconds = fresh.get(key, (0, 0.0))
+        old_count, old_seconds = current.get(key, (0, 0.0))
+        if count != old_count or abs(seconds - old_seconds) > 1:
+            mismatched += 1
+
+    StatsRollup.query.delete()
+    db.session.add_all(
+        StatsRollup(metric=k[0], key=k[1], sub_key=k[2], count=c, total_seconds=s)
+        for k, (c, s) in fresh.items()
+    )
+    changes.bump(db.session, changes.STATS)
+    db.session.commit()
+    return len(fresh), mismatched
+
+
+def counters(metric, since=None):
+    """``{(key, sub_key): (count, total_seconds)}`` for one metric.
+
+    ``since`` keeps keys >= it, which for 'resolved_day' is a date range.
+    """
+    query = StatsRollup.query.filter(StatsRollup.metric == metric)
+    if since is not None:
+        query = query.filter(StatsRollup.key >= since)
+    return {(r.key, r.sub_key): (r.count, r.total_seconds) for r in query}
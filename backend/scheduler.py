@@ -0,0 +1,188 @@
+"""Recurring task scheduler.
+
+``run_due()`` turns every overdue RecurringTask into tickets according to
+its catch-up policy and inserts them in one bulk statement:
+
+- ``skip``: missed runs are dropped; a ticket is only raised for a run due today.
+- ``coalesce``: one ticket stands in for all missed runs (the default).
+- ``backfill``: one ticket per missed run, capped at MAX_BACKFILL.
+
+Each task is claimed with ``UPDATE ... WHERE id = ? AND next_run_date = ?``
+before its tickets are written, in the same transaction, so two gunicorn
+workers (or the timer and POST /scheduler/check) cannot fire a task twice.
+The bulk insert skips the ORM flush hooks, so the change sequence, the
+stats rollup and the ticket change feed are updated explicitly.
+
+``Scheduler`` is the in-process timer: a min-heap of (next_run_date, task id)
+that sleeps until the earliest task is due, reloading from the database
+periodically and whenever a task is edited through the API.
+"""
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from models import db, Ticket, RecurringTask
+import changes
+import events
+import rollup
+import ticket_log
+
+POLICIES = ('skip', 'coalesce', 'backfill')
+MAX_BACKFILL = 366
+RELOAD_SECONDS = 300
+# Rows written before frequency_days was validated may hold 0 or less
+ACTIVE = RecurringTask.frequency_days > 0
+
+
+def parse_frequency(value):
+    """``value`` as whole days between runs; ValueError unless it is a positive integer."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError('frequency_days must be a positive integer')
+    days = int(value)
+    if days < 1:
+        raise ValueError('frequency_days must be a positive integer')
+    return days
+
+
+def missed_runs(task, today):
+    """Run dates from ``next_run_date`` up to and including ``today``."""
+    if task.frequency_days < 1:
+        # A zero step would never reach ``today``
+        raise ValueError(f'Recurring task {task.id} has frequency_days {task.frequency_days}')
+    runs = []
+    run = task.next_run_date
+    while run <= today:
+        runs.append(run)
+        run += timedelta(days=task.frequency_days)
+    return runs
+
+
+def plan(task, today):
+    """``(missed run dates, run dates that get a ticket, new next_run_date)`` for a due task."""
+    missed = missed_runs(task, today)
+    next_run = missed[-1] + timedelta(days=task.frequency_days)
+    if task.catch_up_policy == 'skip':
+        return missed, [r for r in missed if r == today], next_run
+    if task.catch_up_policy == 'backfill':
+        return missed, missed[-MAX_BACKFILL:], next_run
+    return missed, missed[-1:], next_run
+
+
+def ticket_row(task, run, missed, now):
+    description = f"Recurring Task: {task.title}\n{task.description}"
+    if len(missed) > 1:
+        if task.catch_up_policy == 'backfill':
+            description += f"\n(Scheduled for {run.isoformat()})"
+        elif task.catch_up_policy == 'coalesce':
+            description += f"\n(Covers {len(missed)} missed runs since {missed[0].isoformat()})"
+    return {
+        'tenant_name': 'System Scheduler',
+        'anonymous': False,
+        'type': 'Maintenance', # Generic type for now
+        'priority': 'Medium',
+        'description': description,
+        # Straight to the department when the task has one
+        'status': 'Assigned' if task.assigned_dept_id else 'Pending Approval',
+        'assigned_dept_id': task.assigned_dept_id,
+        'created_at': now,
+    }
+
+
+def claim(task_id, run_date, next_run):
+    """Move a task on from ``run_date``; False if someone else already did."""
+    return bool(RecurringTask.query.filter_by(
+        id=task_id, next_run_date=run_date
+    ).update({'next_run_date': next_run}, synchronize_session=False))
+
+
+def run_due(today=None):
+    """Fire every due task. Returns ``(tasks fired, created ticket ids)``."""
+    now = datetime.utcnow()
+    today = today or now.date()
+    due_tasks = RecurringTask.query.filter(RecurringTask.next_run_date <= today, ACTIVE).all()
+
+    fired, rows = [], []
+    for task in due_tasks:
+        missed, runs, next_run = plan(task, today)
+        if not claim(task.id, task.next_run_date, next_run):
+            continue  # Another worker got there first
+        rows.extend(ticket_row(task, run, missed, now) for run in runs)
+        fired.append(task)
+
+    if fired:
+        # The claims above are plain UPDATEs
+        changes.bump(db.session, changes.RECURRING_TASKS)
+
+    ticket_ids = []
+    if rows:
+        changes.stamp_inserts(db.session, rows, now)
+        ticket_ids = list(db.session.scalars(db.insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True), rows))
+        rollup.record_inserts(db.session.connection(), rows)
+        events.record_inserts(db.session, ticket_ids, rows)
+        ticket_log.record_inserts(db.session, ticket_ids, rows, actor_role='scheduler')
+    db.session.commit()
+    return fired, ticket_ids
+
+
+class Scheduler:
+    """Background thread firing recurring tasks as they fall due."""
+
+    def __init__(self):
+        self._heap = []
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def load(self):
+        tasks = db.session.query(RecurringTask.next_run_date, RecurringTask.id).filter(ACTIVE)
+        self._heap = [(t.next_run_date, t.id) for t in tasks]
+        heapq.heapify(self._heap)
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
+
+    def tick(self, today=None):
+        """Fire due tasks if the earliest one is due. Returns created ticket ids."""
+        today = today or datetime.utcnow().date()
+        with self._lock:
+            due = self.next_due()
+            if due is None or due > today:
+                return []
+            _, ticket_ids = run_due(today)
+            self.load()
+            return ticket_ids
+
+    def notify(self):
+        """Reload the queue; called after tasks are created or edited."""
+        self._wakeup.set()
+
+    def start(self, app):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(app,), name='scheduler', daemon=True)
+        self._thread.start()
+
+    def _seconds_until_due(self):
+        now = datetime.utcnow()
+        due = self.next_due()
+        if due is None:
+            return RELOAD_SECONDS
+        due_at = datetime.combine(due, datetime.min.time())
+        return max(1.0, min(RELOAD_SECONDS, (due_at - now).total_seconds()))
+
+    def _run(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    with self._lock:
+                        self.load()
+                    self.tick()
+                except Exception:
+                    app.logger.exception('Scheduler tick failed')
+                finally:
+                    db.session.remove()
+            self._wakeup.wait(self._seconds_until_due())
+            self._wakeup.clear()
+
+
+scheduler = Scheduler()
@@ -0,0 +1,94 @@
+"""Ranked ticket search for HubAI.
+
+On SQLite, tickets are indexed in an FTS5 table (``ticket_fts``) over
+description, type and tenant name. Triggers on ``ticket`` keep it in sync,
+so ORM writes and plain UPDATE statements are both covered. Other databases
+fall back to matching every search word with ILIKE.
+
+Batch migrations that recreate ``ticket`` drop its triggers; such a
+revision calls restore_index() afterwards.
+"""
+import re
+
+from sqlalchemy import DDL, event, text
+
+from models import db, Ticket
+
+# Words that phrase a request rather than describe what to look for
+STOP_WORDS = {
+    'search', 'find', 'for', 'ticket', 'tickets', 'issue', 'issues', 'about',
+    'me', 'show', 'all', 'any', 'the', 'a', 'an', 'with', 'of', 'in', 'on', 'please'
+}
+
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS ticket_fts USING fts5(
+        description, type, tenant_name,
+        content='ticket', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS ticket_fts_ai AFTER INSERT ON ticket BEGIN
+        INSERT INTO ticket_fts(rowid, description, type, tenant_name)
+        VALUES (new.id, new.description, new.type, new.tenant_name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS ticket_fts_ad AFTER DELETE ON ticket BEGIN
+        INSERT INTO ticket_fts(ticket_fts, rowid, description, type, tenant_name)
+        VALUES ('delete', old.id, old.description, old.type, old.tenant_name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS ticket_fts_au AFTER UPDATE OF description, type, tenant_name ON ticket BEGIN
+        INSERT INTO ticket_fts(ticket_fts, rowid, description, type, tenant_name)
+        VALUES ('delete', old.id, old.description, old.type, old.tenant_name);
+        INSERT INTO ticket_fts(rowid, description, type, tenant_name)
+        VALUES (new.id, new.description, new.type, new.tenant_name);
+    END""",
+    "INSERT INTO ticket_fts(ticket_fts) VALUES ('rebuild')",
+]
+
+# Keep the index alongside the table when it is built with create_all()
+for _statement in FTS_DDL:
+    event.listen(Ticket.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Ticket.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS ticket_fts').execute_if(dialect='sqlite'))
+
+
+def restore_index(op):
+    """Put back the triggers a migration lost by recreating ``ticket``, and reindex."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in FTS_DDL:
+        op.execute(statement)
+
+
+def tokenize(query):
+    """Search words in ``query``, lowercased, without request phrasing."""
+    return [w for w in re.findall(r'\w+', query.lower()) if w not in STOP_WORDS]
+
+
+def _fts_available():
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    return db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ticket_fts'")
+    ).first() is not None
+
+
+def search_tickets(words, limit=5):
+    """Tickets matching every word (as a prefix), best matches first."""
+    if not words:
+        return []
+
+    if _fts_available():
+        # Quote each word so FTS5 operators in user input stay literal
+        match = ' '.join('"{}"*'.format(w.replace('"', '""')) for w in words)
+        ids = [row[0] for row in db.session.execute(
+            text("SELECT rowid FROM ticket_fts WHERE ticket_fts MATCH :match "
+                 "ORDER BY bm25(ticket_fts, 3.0, 2.0, 1.0) LIMIT :limit"),
+            {'match': match, 'limit': limit}
+        )]
+        by_id = {t.id: t for t in Ticket.query.filter(Ticket.id.in_(ids))}
+        return [by_id[i] for i in ids if i in by_id]
+
+    query = Ticket.query
+    for w in words:
+        pattern = f'%{w}%'
+        query = query.filter(
+            Ticket.description.ilike(pattern) | Ticket.type.ilike(pattern) | Ticket.tenant_name.ilike(pattern)
+        )
+    return query.order_by(Ticket.created_at.desc()).limit(limit).all()
@@ -17,10 +17,14 @@ def get_or_create_user(username, role, dept_id=None):
         db.session.add(user)
     return user
 
+def with_deadline(ticket):
+    # The SLA deadline accepting the ticket sets (see sla.py)
+    ticket.due_at = ticket.accepted_at + timedelta(minutes=ticket.assigned_duration_minutes)
+    return ticket
+
 def seed_data():
     with app.app_context():
-        # Ensure tables exist but DO NOT DROP them
-        db.create_all()
+        # The schema comes from `flask --app app db upgrade`
 
         print("Checking/Creating Departments...")
         maintenance = get_or_create_dept('Maintenance')
@@ -70,7 +74,7 @@ def seed_data():
         # 1 Resolved
         t5 = Ticket(tenant_name='Tenant User', type='IT', priority='Medium', description='WiFi down in food court', status='Resolved', assigned_dept_id=it.id, estimated_fix_time='1 hour', proof_url=vid_proof1, photo_url=img_wifi, resolved_at=datetime.utcnow(), feedback_rating=5)
 
-        db.session.add_all([t1, t2, t3, t4, t5])
+        db.session.add_all([t1, t2, with_deadline(t3), with_deadline(t4), t5])
         db.session.commit()
 
         print("Generating historical data (Add-on)...")
@@ -129,6 +133,7 @@ def seed_data():
                     assigned_duration_minutes=random.randint(60, 480),
                     photo_url=photo_url
                 )
+                with_deadline(ticket)
             else:
                 # Resolved (50% of tickets)
                 status = 'Resolved'
@@ -153,6 +158,7 @@ def seed_data():
                     proof_url=proof_url, # Use real file
                     photo_url=photo_url
                 )
+                with_deadline(ticket)
 
             db.session.add(ticket)
             
@@ -0,0 +1,132 @@
+"""JSON encoding for API responses.
+
+Flask-RESTful encodes every response with ``json.dumps``. Here the API's
+``application/json`` representation goes through ``dumps`` instead, which
+uses orjson (``pip install orjson``) when it is installed and the standard
+library otherwise. JSON_SERIALIZER picks one explicitly: 'orjson', 'json',
+or 'auto' (the default). Both accept datetimes and dates and write them
+with ``isoformat()``, so values can be handed over unconverted.
+
+Ticket lists skip the ORM as well. ``ticket_rows`` turns a Ticket query into
+one that selects the response columns as plain tuples. Anonymization and
+the department and staff names are resolved in SQL, and ``encode_tickets``
+only adds the two derived thumbnail URLs per row. With ``columns=True``
+the list is sent as ``{"fields": [...], "rows": [[...], ...]}`` and no
+per-row dict is built at all.
+"""
+import json
+from datetime import date
+
+from flask import make_response
+from sqlalchemy import case
+from sqlalchemy.orm import aliased
+
+from models import Department, Ticket, TicketArchive, User
+from uploads import thumbnail_url
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, date):  # datetimes too
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'{type(obj).__name__} is not JSON serializable')
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, default=_default).encode()
+
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+BACKENDS = {'json': (_stdlib_dumps, json.loads)}
+if orjson is not None:
+    BACKENDS['orjson'] = (_orjson_dumps, orjson.loads)
+
+dumps, loads = BACKENDS['orjson' if orjson is not None else 'json']
+
+
+def use(name):
+    """Switch the process to the ``name`` backend ('auto' prefers orjson)."""
+    global dumps, loads
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    if name not in BACKENDS:
+        raise ValueError(f"JSON_SERIALIZER must be one of auto, {', '.join(BACKENDS)} (is orjson installed?)")
+    dumps, loads = BACKENDS[name]
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTful representation for application/json."""
+    response = make_response(dumps(data), code)
+    response.headers.extend(headers or {})
+    response.mimetype = 'application/json'
+    return response
+
+
+def init_app(app, api):
+    use(app.config.get('JSON_SERIALIZER', 'auto'))
+    api.representations['application/json'] = output_json
+
+
+# Ticket.to_dict() fields, as columns of one SELECT; thumbnails follow in Python
+_staff = aliased(User)
+
+
+def ticket_columns(model):
+    """The response columns of ``model`` (Ticket or TicketArchive)."""
+    return [
+        model.id,
+        case((model.anonymous.is_(True), 'Anonymous'), else_=model.tenant_name).label('tenant_name'),
+        model.anonymous,
+        model.type,
+        model.priority,
+        model.photo_url,
+        model.description,
+        model.status,
+        Department.name.label('assigned_dept'),
+        model.assigned_dept_id,
+        model.estimated_fix_time,
+        model.feedback_rating,
+        model.created_at,
+        model.resolved_at,
+        model.proof_url,
+        model.assigned_staff_id,
+        _staff.username.label('assigned_staff_name'),
+        model.staff_status,
+        model.rejection_message,
+        model.accepted_at,
+        model.assigned_duration_minutes,
+        model.change_seq,
+        model.updated_at,
+        model.due_at,
+        model.breached_at,
+    ]
+
+
+TICKET_COLUMNS = ticket_columns(Ticket)
+_COLUMNS = {Ticket: TICKET_COLUMNS, TicketArchive: ticket_columns(TicketArchive)}
+TICKET_FIELDS = tuple(c.key for c in TICKET_COLUMNS) + ('photo_thumb_url', 'proof_thumb_url')
+_PHOTO, _PROOF = TICKET_FIELDS.index('photo_url'), TICKET_FIELDS.index('proof_url')
+
+
+def ticket_rows(query, model=Ticket):
+    """``query`` (over ``model``) selecting its response columns instead of loading objects."""
+    return (query.with_entities(*_COLUMNS[model])
+            .outerjoin(Department, Department.id == model.assigned_dept_id)
+            .outerjoin(_staff, _staff.id == model.assigned_staff_id))
+
+
+def encode_tickets(rows, columns=False):
+    """Rows from ``ticket_rows`` as the body of a ticket list."""
+    rows = [(*row, thumbnail_url(row[_PHOTO]), thumbnail_url(row[_PROOF])) for row in rows]
+    if columns:
+        return {'fields': TICKET_FIELDS, 'rows': rows}
+    return [dict(zip(TICKET_FIELDS, row)) for row in rows]
@@ -0,0 +1,116 @@
+"""SLA deadlines and breach sweeping.
+
+Accepting a ticket (``accept`` or ``staff_accept`` in workflow.py) stores
+its deadline in ``due_at``: ``accepted_at`` plus ``assigned_duration_minutes``.
+Tickets count against it while they are In Progress, so a ticket sent back
+from QA resumes the same deadline. ``(status, due_at)`` is indexed, which
+makes both questions below a range scan over the overdue tickets only:
+
+- ``overdue()``: the escalation list behind GET /tickets/overdue, most
+  overdue first.
+- ``sweep()``: sets ``breached_at`` on tickets that just went past due, a
+  batch per transaction, and logs an ``sla_breach`` event for each one.
+  The UPDATE repeats the breach conditions, so tickets resolved meanwhile,
+  or already flagged by another worker, are left alone.
+
+``Sweeper`` runs ``sweep()`` in the background. It sleeps until the next
+deadline, or for at most SWEEP_SECONDS. Accepting a ticket wakes it to
+look at the new deadline.
+"""
+import threading
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+from models import db, Ticket
+import changes
+import workflow
+from workflow import TICKET
+
+ACTIVE = 'In Progress'
+BATCH_SIZE = 500
+SWEEP_SECONDS = 60
+# Who breach events are logged as
+SWEEPER = {'id': None, 'role': 'sweeper'}
+
+
+def overdue(query, now=None):
+    """Tickets from ``query`` past their deadline, most overdue first."""
+    now = now or datetime.utcnow()
+    return query.filter(Ticket.status == ACTIVE, Ticket.due_at < now).order_by(Ticket.due_at, Ticket.id)
+
+
+def _unflagged(now):
+    return (TICKET.c.status == ACTIVE, TICKET.c.due_at < now, TICKET.c.breached_at.is_(None))
+
+
+def sweep(now=None, batch_size=BATCH_SIZE):
+    """Flag every ticket that went past due by ``now``. Returns the flagged ids."""
+    now = now or datetime.utcnow()
+    flagged = []
+    while True:
+        rows = [dict(row) for row in db.session.execute(
+            select(TICKET).where(*_unflagged(now)).order_by(TICKET.c.due_at).limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).mappings()]
+        if not rows:
+            break
+        selected = len(rows)
+        values = {'breached_at': now}
+        changes.stamp_updates(db.session, values, now)
+        ids = set(db.session.scalars(
+            update(TICKET).where(TICKET.c.id.in_([row['id'] for row in rows]), *_unflagged(now))
+            .values(**values).returning(TICKET.c.id)
+        ))
+        rows = [row for row in rows if row['id'] in ids]
+        workflow.record(rows, values, 'sla_breach', SWEEPER, {}, now)
+        db.session.commit()
+        flagged.extend(row['id'] for row in rows)
+        if selected < batch_size:
+            break
+    return flagged
+
+
+def next_deadline():
+    """The earliest deadline not yet flagged, or None."""
+    return db.session.scalar(
+        select(func.min(TICKET.c.due_at)).where(TICKET.c.status == ACTIVE, TICKET.c.breached_at.is_(None)))
+
+
+class Sweeper:
+    """Background thread flagging breaches as deadlines pass."""
+
+    def __init__(self, interval=SWEEP_SECONDS):
+        self.interval = interval
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def notify(self):
+        """Look at deadlines again; called after a ticket is accepted."""
+        self._wakeup.set()
+
+    def start(self, app):
+        if self._thread is not None:
+            return
+        self.interval = app.config.get('SLA_SWEEP_SECONDS', self.interval)
+        self._thread = threading.Thread(target=self._run, args=(app,), name='sla-sweeper', daemon=True)
+        self._thread.start()
+
+    def _run(self, app):
+        while True:
+            wait = self.interval
+            with app.app_context():
+                try:
+                    sweep()
+                    deadline = next_deadline()
+                    if deadline is not None:
+                        wait = max(1.0, min(wait, (deadline - datetime.utcnow()).total_seconds()))
+                except Exception:
+                    app.logger.exception('SLA sweep failed')
+                finally:
+                    db.session.remove()
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
+
+
+sweeper = Sweeper()
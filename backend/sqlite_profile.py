@@ -0,0 +1,83 @@
+"""Connection settings for running HubOps on SQLite with several workers.
+
+With the stock settings SQLite keeps a rollback journal and fsyncs every
+commit, and readers block the writer, so a few gunicorn workers writing at
+once soon fail with "database is locked". The ``production`` profile sets,
+on every new pooled connection of every SQLite engine (the primary and a
+SQLite ``replica`` bind alike):
+
+- ``journal_mode=WAL``: readers and the writer no longer block each other
+- ``synchronous=NORMAL``: durable across application crashes, and safe in WAL
+- ``busy_timeout``: wait for the write lock instead of failing
+- ``cache_size`` / ``mmap_size``: keep the hot pages in memory
+- ``temp_store=MEMORY``: sorts and temporary indexes stay off disk
+
+SQLITE_PROFILE=off keeps SQLite's defaults. Each value can be overridden
+with the matching setting in app.py, e.g. SQLITE_BUSY_TIMEOUT=10000 or
+SQLITE_JOURNAL_MODE=DELETE. Overrides are checked against the values
+SQLite accepts, since they end up in the PRAGMA statement.
+"""
+from sqlalchemy import event
+
+from models import db
+
+PRODUCTION = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'cache_size': -64000,  # negative means KiB, so 64 MiB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Keyword PRAGMAs and what they accept; the rest take an integer
+CHOICES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+
+
+def setting(name):
+    return f'SQLITE_{name.upper()}'
+
+
+def _checked(name, value):
+    if name in CHOICES:
+        if str(value).upper() not in CHOICES[name]:
+            raise ValueError(f"{setting(name)} must be one of {', '.join(CHOICES[name])}, got {value!r}")
+        return str(value).upper()
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{setting(name)} must be an integer, got {value!r}")
+
+
+def pragmas(config):
+    """The PRAGMA values for ``config``, or {} when the profile is off."""
+    if config.get('SQLITE_PROFILE', 'production') == 'off':
+        return {}
+    values = dict(PRODUCTION)
+    for name in values:
+        override = config.get(setting(name))
+        if override is not None:
+            values[name] = _checked(name, override)
+    return values
+
+
+def init_app(app):
+    """Apply the profile to the app's SQLite engines; call after ``db.init_app``."""
+    values = pragmas(app.config)
+    if not values:
+        return
+
+    def apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in values.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', apply)
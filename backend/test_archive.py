@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import archive
+import rollup
+from analytics import ticket_breakdown
+from models import db, Ticket, TicketArchive
+
+
+IT = 4
+
+
+def resolved(days_ago, dept=IT):
+    """Fields of a ticket resolved ``days_ago`` days ago."""
+    return {'status': 'Resolved', 'resolved_at': datetime.utcnow() - timedelta(days=days_ago), 'assigned_dept_id': dept}
+
+
+def listed(client, headers, query=''):
+    res = client.get(f'/tickets?{query}', headers=headers)
+    assert res.status_code == 200
+    return sorted(t['id'] for t in res.get_json())
+
+
+def test_old_resolved_tickets_move_to_the_archive(client, login, add_ticket):
+    old = [add_ticket(**resolved(days), feedback_rating=5) for days in (400, 200, 120)]
+    recent = add_ticket(**resolved(10))
+    other_dept = add_ticket(**resolved(300, dept=1))
+    open_ticket = add_ticket(status='In Progress', assigned_dept_id=IT)
+    newest = add_ticket(**resolved(500))
+    before = ticket_breakdown()
+
+    moved = archive.archive(90, batch_size=2)
+
+    # Oldest first, in batches
+    assert moved == [newest, old[0], other_dept, old[1], old[2]]
+    assert archive.archive(90) == []
+    assert sorted(t.id for t in Ticket.query) == [recent, open_ticket]
+    assert db.session.get(TicketArchive, old[0]).to_dict()['feedback_rating'] == 5
+    # Counters are untouched, and a recount over both tables agrees
+    assert ticket_breakdown() == before
+    assert rollup.rebuild()[1] == 0
+    # Archived ids are not handed out again
+    assert add_ticket() > newest
+
+
+def test_reads_opt_into_the_archive(client, login, add_ticket):
+    old = add_ticket(**resolved(200))
+    other_dept = add_ticket(**resolved(200, dept=1))
+    recent = add_ticket(**resolved(1))
+    gm, head = login('gm'), login('dept', 'IT')
+    seq = client.get('/tickets', headers=gm).headers['X-Change-Seq']
+    assert listed(client, gm) == [old, other_dept, recent]
+
+    archive.archive(90)
+
+    assert listed(client, gm) == [recent]
+    assert listed(client, gm, 'archived=1') == [old, other_dept]
+    assert listed(client, head, 'archived=1&status=Resolved') == [old]
+    res = client.get('/tickets?archived=1&limit=1', headers=gm)
+    assert res.headers['X-Total-Count'] == '2' and 'X-Next-Cursor' in res.headers
+    # Clients drop archived tickets as if deleted, and their history stays readable
+    changes = client.get(f'/tickets/changes?since={seq}', headers=gm).get_json()
+    assert changes['removed'] == [old, other_dept]
+    assert client.get(f'/tickets/{old}/events', headers=gm).status_code == 200
+    answer = client.post('/ai/query', headers=gm, json={'query': f'ticket #{old}'}).get_json()['answer']
+    assert answer.startswith(f'**Ticket #{old}**')
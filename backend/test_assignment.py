@@ -0,0 +1,80 @@
+import assignment
+import rollup
+from models import db, User
+
+IT = 4
+
+
+def add_staff(*names):
+    users = [User(username=name, role='staff', department_id=IT) for name in names]
+    db.session.add_all(users)
+    db.session.commit()
+    return [u.id for u in users]
+
+
+def load(client, headers):
+    res = client.get(f'/departments/{IT}/staff?with_load=1', headers=headers)
+    assert res.status_code == 200
+    return [(s['username'], s['open_tickets'], s['estimated_minutes']) for s in res.get_json()]
+
+
+def test_spread_deals_to_the_least_loaded():
+    staff = [{'id': 1, 'open_tickets': 2, 'estimated_minutes': 0},
+             {'id': 2, 'open_tickets': 0, 'estimated_minutes': 60},
+             {'id': 3, 'open_tickets': 0, 'estimated_minutes': 30}]
+    assert assignment.spread(staff, 6) == [3, 2, 3, 2, 1, 3]
+    assert assignment.spread([], 3) == []
+
+
+def test_load_follows_the_workflow(client, login, count_queries, act, add_ticket):
+    add_staff('it_staff_2')
+    head, staff = login('dept', 'IT'), login('staff', 'IT')
+    first, second = [add_ticket(assigned_dept_id=IT, status='Assigned') for _ in range(2)]
+    assert load(client, head) == [('it_staff', 0, 0), ('it_staff_2', 0, 0)]
+
+    for ticket_id in (first, second):
+        assert act(head, ticket_id, action='auto_assign').status_code == 200
+    assert load(client, head) == [('it_staff', 1, 0), ('it_staff_2', 1, 0)]
+
+    assert act(staff, first, action='staff_accept', duration_minutes=90).status_code == 200
+    with count_queries() as statements:
+        assert load(client, head) == [('it_staff_2', 1, 0), ('it_staff', 1, 90)]
+    assert not any('FROM ticket' in s for s in statements)
+
+    # The next ticket goes to whoever has less estimated work
+    third = add_ticket(assigned_dept_id=IT, status='Assigned')
+    res = act(head, third, action='auto_assign')
+    assert res.get_json()['assigned_staff_name'] == 'it_staff_2'
+
+    assert act(staff, first, action='staff_submit_work', proof_url='/p.jpg').status_code == 200
+    assert act(head, third, action='assign_staff',
+               staff_id=User.query.filter_by(username='it_staff').first().id).status_code == 200
+    assert load(client, head) == [('it_staff', 1, 0), ('it_staff_2', 1, 0)]
+    assert rollup.rebuild()[1] == 0
+
+
+def test_auto_assign_needs_a_department_with_staff(client, login, act, add_ticket):
+    ticket_id = add_ticket(assigned_dept_id=IT, status='Assigned')
+    assert act(login('gm'), ticket_id, action='auto_assign').status_code == 403
+
+    User.query.filter_by(role='staff', department_id=IT).delete()
+    db.session.commit()
+    res = act(login('dept', 'IT'), ticket_id, action='auto_assign')
+    assert res.status_code == 404
+    assert res.get_json()['message'] == 'No staff in your department'
+
+
+def test_bulk_auto_assign_spreads_the_tickets(client, login, add_ticket):
+    add_staff('it_staff_2', 'it_staff_3')
+    add_ticket(assigned_dept_id=IT, status='In Progress', staff_status='Accepted', assigned_duration_minutes=30,
+               assigned_staff_id=User.query.filter_by(username='it_staff').first().id)
+    ids = [add_ticket(assigned_dept_id=IT, status='Assigned') for _ in range(5)]
+    ids.append(add_ticket(assigned_dept_id=IT, status='In Progress'))
+
+    res = client.post('/tickets/bulk-action', headers=login('dept', 'IT'),
+                      json={'action': 'auto_assign', 'ids': ids})
+    assert res.status_code == 200
+    assert res.get_json()['updated'] == ids
+
+    assert load(client, login('dept', 'IT')) == [('it_staff_3', 2, 0), ('it_staff', 2, 30), ('it_staff_2', 3, 0)]
+    assert rollup.rebuild()[1] == 0
@@ -0,0 +1,76 @@
+import events
+import rollup
+from models import db, Ticket, TicketEvent, TicketTombstone
+
+
+def bulk(client, headers, **body):
+    return client.post('/tickets/bulk-action', headers=headers, json=body)
+
+
+def test_assigns_many_tickets_in_one_request(client, login, add_ticket):
+    ids = [add_ticket() for _ in range(3)]
+    subscription = events.broker.subscribe()
+
+    res = bulk(client, login('gm'), action='assign', department='IT', ids=ids + [999])
+
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body['updated'] == ids and body['failed'] == {'999': 'not found'}
+    tickets = client.get('/tickets', headers=login('dept', 'IT')).get_json()
+    assert sorted(t['id'] for t in tickets) == ids
+    assert {t['change_seq'] for t in tickets} == {body['seq']}
+
+    sent = [subscription.get(timeout=0) for _ in ids]
+    events.broker.unsubscribe(subscription)
+    assert sorted(e['id'] for e in sent) == ids
+    assert sent[0]['fields'] == {'status': 'Assigned', 'assigned_dept_id': 4, 'assigned_dept': 'IT'}
+    assert TicketEvent.query.filter_by(action='assign').count() == 3
+
+
+def test_side_tables_match_per_ticket_writes(client, login, add_ticket):
+    ids = [add_ticket(status=status, assigned_dept_id=1) for status in ('Pending GM Review',) * 2 + ('Assigned',) * 2]
+    gm = login('gm')
+
+    bulk(client, gm, action='gm_approve_work', ids=ids[:2])
+    bulk(client, gm, action='assign', department='Security', ids=ids[2:])
+
+    # The counters agree with a recount of the ticket table
+    assert rollup.rebuild()[1] == 0
+    # Tickets moved away from Maintenance reach it as removals
+    assert {t.ticket_id for t in TicketTombstone.query.filter_by(dept_id=1)} == set(ids[2:])
+    delta = client.get('/tickets/changes?since=1', headers=login('dept', 'Maintenance')).get_json()
+    assert delta['removed'] == ids[2:]
+    assert [db.session.get(Ticket, i).resolved_at is not None for i in ids] == [True, True, False, False]
+
+
+def test_permissions_are_checked_once(client, login, add_ticket):
+    ids = [add_ticket() for _ in range(2)]
+    gm = login('gm')
+    bulk(client, gm, action='assign', department='IT', ids=ids[:1])
+    bulk(client, gm, action='assign', department='Security', ids=ids[1:])
+
+    assert bulk(client, login('tenant'), action='assign', department='IT', ids=ids).status_code == 403
+    assert bulk(client, gm, action='explode', ids=ids).status_code == 400
+    assert bulk(client, gm, action='assign', department='Nowhere', ids=ids).status_code == 404
+    assert bulk(client, gm, action='assign', department='IT', ids=[]).status_code == 400
+
+    # A department only reaches its own tickets
+    body = bulk(client, login('dept', 'IT'), action='accept', ids=ids).get_json()
+    assert body['updated'] == ids[:1] and body['failed'] == {str(ids[1]): 'not found'}
+    # and only where the action applies
+    body = bulk(client, login('dept', 'IT'), action='accept', ids=ids[:1]).get_json()
+    assert body['updated'] == [] and body['failed'] == {str(ids[0]): 'cannot accept a ticket that is In Progress'}
+
+
+def test_statement_count_does_not_grow_with_batch_size(client, login, count_queries, add_ticket):
+    gm = login('gm')
+
+    def statements(n):
+        ids = [add_ticket(assigned_dept_id=1) for _ in range(n)]
+        db.session.expunge_all()
+        with count_queries() as executed:
+            assert bulk(client, gm, action='assign', department='IT', ids=ids).status_code == 200
+        return len(executed)
+
+    statements(1)  # creates the department's version row
+    assert statements(3) == statements(200)
@@ -0,0 +1,93 @@
+import cache
+import changes
+
+
+class FakeClock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    lru = cache.LocalCache(ttl=60, max_entries=2)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+
+    assert lru.get('b') is None
+    assert lru.get('a') == 1 and lru.get('c') == 3
+    assert lru.stats()['evictions'] == 1
+
+
+def test_entries_expire():
+    clock = FakeClock()
+    lru = cache.LocalCache(ttl=30, clock=clock)
+    lru.set('a', 1)
+    clock.now = 29
+    assert lru.get('a') == 1
+    clock.now = 30
+    assert lru.get('a') is None
+    assert lru.stats() == {'hits': 1, 'misses': 1, 'expired': 1, 'entries': 0}
+
+
+def test_invalidation_drops_only_tagged_entries():
+    lru = cache.LocalCache()
+    lru.set('gm', 1, ['ticket'])
+    lru.set('dept1', 2, ['ticket:dept:1'])
+    lru.set('stats', 3, ['ticket', 'stats'])
+
+    lru.invalidate(['ticket'])
+
+    assert lru.get('gm') is None and lru.get('stats') is None
+    assert lru.get('dept1') == 2
+    assert lru.stats()['invalidations'] == 2
+
+
+def entries():
+    return {k.split('|')[1] for k in cache.backend._entries}
+
+
+def test_lists_are_shared_per_scope_and_invalidated_on_commit(client, login, raise_ticket):
+    ticket_id = raise_ticket()
+    gm, tenant, security = login('gm'), login('tenant'), login('dept', 'Security')
+    client.put(f'/tickets/{ticket_id}/action', headers=gm, json={'action': 'assign', 'department': 'IT'})
+
+    client.get('/tickets', headers=gm)
+    hits = cache.backend.stats().get('hits', 0)
+    # Tenants get the very same list as the GM
+    assert client.get('/tickets', headers=tenant).get_json()[0]['id'] == ticket_id
+    assert cache.backend.stats()['hits'] == hits + 1
+
+    client.get('/tickets', headers=security)
+    client.get('/tickets', headers=login('dept', 'IT'))
+    assert entries() == {changes.SEQUENCE, changes.dept_scope(2), changes.dept_scope(4)}
+
+    # Moving the ticket from IT to Maintenance leaves Security's entry alone
+    client.put(f'/tickets/{ticket_id}/action', headers=gm, json={'action': 'assign', 'department': 'Maintenance'})
+    assert entries() == {changes.dept_scope(2)}
+
+
+def test_scheduler_and_recurring_task_writes_invalidate(client, login):
+    gm = login('gm')
+    client.get('/recurring-tasks', headers=gm)
+    client.get('/dashboard/stats', headers=gm)
+    assert len(cache.backend._entries) == 2
+
+    client.post('/recurring-tasks', headers=gm, json={
+        'title': 'HVAC', 'description': '', 'frequency_days': 7, 'next_run_date': '2026-01-01'
+    })
+    assert len(cache.backend._entries) == 1
+
+    client.post('/scheduler/check')
+    assert len(cache.backend._entries) == 0
+
+
+def test_metrics_are_gm_only(client, login):
+    client.get('/tickets', headers=login('gm'))
+    client.get('/tickets', headers=login('gm'))
+
+    assert client.get('/metrics/cache', headers=login('tenant')).status_code == 403
+    metrics = client.get('/metrics/cache', headers=login('gm')).get_json()
+    assert metrics['hits'] >= 1 and metrics['entries'] >= 1
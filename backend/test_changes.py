@@ -0,0 +1,119 @@
+from datetime import date
+
+import pytest
+
+import scheduler
+from models import db, RecurringTask, Ticket
+
+
+def start(client, headers):
+    return int(client.get('/tickets', headers=headers).headers['X-Change-Seq'])
+
+
+def sync(client, headers, since):
+    res = client.get(f'/tickets/changes?since={since}', headers=headers)
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def test_every_write_advances_the_sequence(client, login, raise_ticket, act):
+    first = raise_ticket()
+    second = raise_ticket('Broken lock')
+    gm = login('gm')
+    seq = start(client, gm)
+
+    res = act(gm, first, action='assign', department='Maintenance')
+
+    assert res.status_code == 200
+
+    ticket = res.get_json()
+    assert ticket['change_seq'] > seq and ticket['updated_at']
+
+    delta = sync(client, gm, seq)
+    assert [t['id'] for t in delta['tickets']] == [first]
+    assert delta['removed'] == []
+    assert delta['seq'] == ticket['change_seq']
+
+    # Nothing new since the last sync
+    assert sync(client, gm, delta['seq'])['tickets'] == []
+    assert second not in [t['id'] for t in delta['tickets']]
+
+
+def test_reassignment_leaves_a_tombstone_for_the_old_department(client, login, raise_ticket, act):
+    ticket_id = raise_ticket()
+    gm, security = login('gm'), login('dept', 'Security')
+    assert act(gm, ticket_id, action='assign', department='Security').status_code == 200
+    seq = start(client, security)
+
+    assert act(security, ticket_id, action='dept_reject', reason='Not ours').status_code == 200
+
+    delta = sync(client, security, seq)
+    assert delta['tickets'] == [] and delta['removed'] == [ticket_id]
+    # The GM still sees the ticket, just changed
+    gm_delta = sync(client, gm, seq)
+    assert [t['id'] for t in gm_delta['tickets']] == [ticket_id] and gm_delta['removed'] == []
+
+
+def test_ticket_that_comes_back_is_not_reported_removed(client, login, raise_ticket, act):
+    ticket_id = raise_ticket()
+    gm = login('gm')
+    assert act(gm, ticket_id, action='assign', department='Security').status_code == 200
+    seq = start(client, login('dept', 'Security'))
+
+    assert act(gm, ticket_id, action='assign', department='IT').status_code == 200
+    assert act(gm, ticket_id, action='assign', department='Security').status_code == 200
+
+    delta = sync(client, login('dept', 'Security'), seq)
+    assert [t['id'] for t in delta['tickets']] == [ticket_id] and delta['removed'] == []
+
+
+def test_deletions_reach_everyone(client, login, raise_ticket):
+    ticket_id = raise_ticket()
+    seq = start(client, login('gm'))
+
+    db.session.delete(db.session.get(Ticket, ticket_id))
+    db.session.commit()
+
+    assert sync(client, login('gm'), seq)['removed'] == [ticket_id]
+    assert sync(client, login('tenant'), seq)['removed'] == [ticket_id]
+
+
+def test_scheduler_tickets_are_stamped(client, login):
+    seq = start(client, login('gm'))
+    db.session.add(RecurringTask(title='HVAC', description='', frequency_days=7,
+                                 next_run_date=date(2026, 1, 1), assigned_dept_id=1))
+    db.session.commit()
+
+    _, ticket_ids = scheduler.run_due(date(2026, 1, 1))
+
+    delta = sync(client, login('dept', 'Maintenance'), seq)
+    assert [t['id'] for t in delta['tickets']] == ticket_ids
+
+
+def test_long_gaps_come_back_in_pages(client, login, raise_ticket):
+    gm = login('gm')
+    first = raise_ticket()
+    ids = [raise_ticket() for _ in range(3)]
+    seq = start(client, gm)
+    # One write covering three tickets, a deletion, then three more tickets
+    client.post('/tickets/bulk-action', headers=gm, json={'action': 'assign', 'department': 'IT', 'ids': ids})
+    db.session.delete(db.session.get(Ticket, first))
+    db.session.commit()
+    later = [raise_ticket() for _ in range(3)]
+
+    pages = []
+    while True:
+        res = client.get(f'/tickets/changes?since={seq}&limit=2', headers=gm).get_json()
+        pages.append(([t['id'] for t in res['tickets']], res['removed']))
+        seq = res['seq']
+        if not res['has_more']:
+            break
+
+    # The bulk write is not split across pages, even though it is over the limit
+    assert pages == [(ids, []), (later[:2], [first]), (later[2:], [])]
+
+
+@pytest.mark.parametrize('query', ['since=yesterday', 'since=-1', 'since=1&limit=all'])
+def test_invalid_since_or_limit(client, login, query):
+    res = client.get(f'/tickets/changes?{query}', headers=login('gm'))
+    assert res.status_code == 400
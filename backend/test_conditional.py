@@ -0,0 +1,67 @@
+from datetime import date
+
+import scheduler
+from models import db, RecurringTask
+
+
+def revalidate(client, url, headers, tag):
+    return client.get(url, headers={**headers, 'If-None-Match': tag})
+
+
+def test_unchanged_list_is_not_modified_without_reading_tickets(client, login, count_queries, raise_ticket):
+    raise_ticket()
+    gm = login('gm')
+    first = client.get('/tickets', headers=gm)
+    tag = first.headers['ETag']
+
+    with count_queries() as statements:
+        res = revalidate(client, '/tickets', gm, tag)
+    assert res.status_code == 304 and res.data == b''
+    assert res.headers['ETag'] == tag
+    assert not [s for s in statements if 'FROM ticket' in s]
+
+    # Other parameters are another representation
+    assert revalidate(client, '/tickets?limit=1', gm, tag).status_code == 200
+
+    raise_ticket()
+    assert revalidate(client, '/tickets', gm, tag).status_code == 200
+
+
+def test_department_tag_only_moves_with_its_own_tickets(client, login, raise_ticket):
+    ticket_id = raise_ticket()
+    gm, security = login('gm'), login('dept', 'Security')
+    tag = client.get('/tickets', headers=security).headers['ETag']
+
+    client.put(f'/tickets/{ticket_id}/action', headers=gm, json={'action': 'assign', 'department': 'IT'})
+    assert revalidate(client, '/tickets', security, tag).status_code == 304
+
+    client.put(f'/tickets/{ticket_id}/action', headers=gm, json={'action': 'assign', 'department': 'Security'})
+    res = revalidate(client, '/tickets', security, tag)
+    assert res.status_code == 200 and len(res.get_json()) == 1
+
+    # Leaving the department changes its list too
+    tag = res.headers['ETag']
+    client.put(f'/tickets/{ticket_id}/action', headers=gm, json={'action': 'assign', 'department': 'IT'})
+    assert revalidate(client, '/tickets', security, tag).status_code == 200
+
+
+def test_dashboard_stats(client, login, raise_ticket):
+    gm = login('gm')
+    tag = client.get('/dashboard/stats', headers=gm).headers['ETag']
+    assert revalidate(client, '/dashboard/stats', gm, tag).status_code == 304
+
+    raise_ticket()
+    assert revalidate(client, '/dashboard/stats', gm, tag).status_code == 200
+
+
+def test_recurring_tasks(client, login):
+    gm = login('gm')
+    db.session.add(RecurringTask(title='HVAC', description='', frequency_days=7, next_run_date=date(2026, 1, 1)))
+    db.session.commit()
+    tag = client.get('/recurring-tasks', headers=gm).headers['ETag']
+    assert revalidate(client, '/recurring-tasks', gm, tag).status_code == 304
+
+    # Firing the task moves next_run_date with a plain UPDATE
+    scheduler.run_due(date(2026, 1, 1))
+    res = revalidate(client, '/recurring-tasks', gm, tag)
+    assert res.status_code == 200 and res.get_json()[0]['next_run_date'] == '2026-01-08'
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from models import db, Department
+
+
+def stats_ticket(dept, status='Assigned', rating=None, accepted_hours_ago=None, resolved_hours_ago=None):
+    """Fields of a ticket created two days ago, with times relative to now."""
+    now = datetime.utcnow()
+    return dict(
+        type='General', description='x',
+        status=status, assigned_dept_id=dept.id if dept else None, feedback_rating=rating,
+        created_at=now - timedelta(days=2),
+        accepted_at=now - timedelta(hours=accepted_hours_ago) if accepted_hours_ago else None,
+        resolved_at=now - timedelta(hours=resolved_hours_ago) if resolved_hours_ago is not None else None
+    )
+
+
+def test_stats_values(client, login, add_ticket):
+    maintenance = Department.query.filter_by(name='Maintenance').first()
+    it = Department.query.filter_by(name='IT').first()
+    add_ticket(**stats_ticket(maintenance, 'In Progress'))
+    add_ticket(**stats_ticket(maintenance, 'In Progress'))
+    add_ticket(**stats_ticket(maintenance, 'Resolved', rating=5, accepted_hours_ago=4, resolved_hours_ago=0))
+    add_ticket(**stats_ticket(it, 'Resolved', rating=3, accepted_hours_ago=2, resolved_hours_ago=0))
+    add_ticket(**stats_ticket(it, 'Assigned', rating=1))
+    add_ticket(**stats_ticket(None, 'Pending Approval'))
+
+    stats = client.get('/dashboard/stats', headers=login('gm')).get_json()
+
+    assert {'name': 'Maintenance', 'count': 3} in stats['issues_per_dept']
+    assert {'name': 'IT', 'count': 2} in stats['issues_per_dept']
+    assert {'name': 'Security', 'count': 0} in stats['issues_per_dept']
+    assert {'name': 'Maintenance', 'active_tickets': 2} in stats['dept_load']
+    assert stats['satisfaction'] == [
+        {'name': 'Happy', 'value': 1}, {'name': 'Neutral', 'value': 1}, {'name': 'Unhappy', 'value': 1}
+    ]
+    assert len(stats['avg_time']) == 7
+    assert stats['avg_time'][-1]['full_date'] == datetime.utcnow().strftime('%Y-%m-%d')
+    assert stats['avg_time'][-1]['hours'] == 3.0
+
+
+def test_stats_query_count_is_constant(client, login, count_queries, add_ticket):
+    headers = login('gm')
+    with count_queries() as before:
+        client.get('/dashboard/stats', headers=headers)
+
+    for i in range(20):
+        dept = Department(name=f'Extra {i}')
+        db.session.add(dept)
+        db.session.flush()
+        add_ticket(**stats_ticket(dept, 'In Progress', rating=4, accepted_hours_ago=1, resolved_hours_ago=0))
+
+    with count_queries() as after:
+        client.get('/dashboard/stats', headers=headers)
+    assert len(before) == len(after) <= 5  # version lookup + departments + three counter reads
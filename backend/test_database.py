@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+
+import database
+from app import app
+from models import db, Ticket
+
+
+def test_heroku_style_urls_are_normalized():
+    assert database.normalize_url('postgres://u:p@db/hubops') == 'postgresql://u:p@db/hubops'
+    assert database.normalize_url('sqlite:///hubops.db') == 'sqlite:///hubops.db'
+
+
+def test_pool_settings_only_apply_outside_sqlite():
+    config = {'DB_POOL_SIZE': 5, 'DB_MAX_OVERFLOW': 7, 'DB_POOL_TIMEOUT': 3, 'DB_POOL_RECYCLE': 60}
+    assert database.engine_options('sqlite:///hubops.db', config) == {}
+    assert database.engine_options('postgresql://db/hubops', config) == {
+        'pool_size': 5, 'max_overflow': 7, 'pool_timeout': 3, 'pool_recycle': 60, 'pool_pre_ping': True,
+    }
+
+
+@contextmanager
+def replica(tmp_path):
+    """A second database holding one ticket the primary does not have."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Ticket.__table__.insert(), {
+            'tenant_name': 'Tenant User', 'type': 'Plumbing', 'priority': 'Low',
+            'description': 'From the replica', 'status': 'Pending',
+        })
+    db.engines[database.REPLICA] = engine
+    try:
+        yield engine
+    finally:
+        del db.engines[database.REPLICA]
+        engine.dispose()
+
+
+def test_read_only_views_use_the_replica(client, login, tmp_path):
+    gm = login('gm')
+    with replica(tmp_path):
+        tickets = client.get('/tickets', headers=gm).get_json()
+        assert [t['description'] for t in tickets] == ['From the replica']
+        assert client.get('/dashboard/stats', headers=gm).status_code == 200
+
+        res = client.post('/tickets', headers=login('tenant'), json={
+            'type': 'Plumbing', 'priority': 'Low', 'description': 'Leaking tap'
+        })
+        assert res.status_code == 201
+
+    # The write went to the primary, and reads follow it once the replica is gone
+    assert [t.description for t in Ticket.query.all()] == ['Leaking tap']
+    assert [t['description'] for t in client.get('/tickets', headers=gm).get_json()] == ['Leaking tap']
+
+
+@pytest.mark.parametrize('path', ['/tickets', '/dashboard/stats'])
+def test_reads_use_the_primary_without_a_replica(client, login, path):
+    assert database.REPLICA not in db.engines
+    assert client.get(path, headers=login('gm')).status_code == 200
@@ -0,0 +1,95 @@
+import json
+from datetime import date
+
+import events
+import scheduler
+from models import db, RecurringTask, Ticket
+
+
+def open_stream(client, token_headers):
+    token = token_headers['Authorization'].split()[1]
+    res = client.get(f'/tickets/stream?jwt={token}')
+    assert res.status_code == 200
+    assert res.mimetype == 'text/event-stream'
+    chunks = iter(res.response)
+    assert next(chunks).startswith(b'retry:')
+    return res, chunks
+
+
+def next_event(chunks):
+    chunk = next(chunks).decode()
+    assert chunk.startswith('data: ')
+    return json.loads(chunk[len('data: '):])
+
+
+def test_stream_sends_created_and_updated_events(client, login, raise_ticket):
+    res, chunks = open_stream(client, login('gm'))
+    ticket_id = raise_ticket()
+
+    created = next_event(chunks)
+    assert created['type'] == 'created' and created['id'] == ticket_id
+    assert created['status'] == 'Pending Approval'
+    assert created['fields']['description'] == 'Leaking tap'
+
+    client.put(f'/tickets/{ticket_id}/action', headers=login('gm'),
+               json={'action': 'assign', 'department': 'Security'})
+    updated = next_event(chunks)
+    assert updated['type'] == 'updated' and updated['status'] == 'Assigned'
+    # Only what changed, keyed like the ticket payload
+    assert updated['fields'] == {'status': 'Assigned', 'assigned_dept_id': 2, 'assigned_dept': 'Security'}
+
+    res.close()
+    assert not events.broker._subscribers
+
+
+def test_department_only_sees_its_own_tickets(client, login, raise_ticket):
+    ticket_id = raise_ticket()
+    res, chunks = open_stream(client, login('dept', 'Security'))
+    gm = login('gm')
+
+    client.put(f'/tickets/{ticket_id}/action', headers=gm, json={'action': 'assign', 'department': 'Maintenance'})
+    client.put(f'/tickets/{ticket_id}/action', headers=gm, json={'action': 'assign', 'department': 'Security'})
+    event = next_event(chunks)
+    assert event['type'] == 'updated' and event['assigned_dept_id'] == 2
+
+    client.put(f'/tickets/{ticket_id}/action', headers=login('dept', 'Security'),
+               json={'action': 'dept_reject', 'reason': 'Not ours'})
+    removed = next_event(chunks)
+    assert removed == {'type': 'removed', 'id': ticket_id, 'seq': removed['seq']}
+    res.close()
+
+
+def test_rolled_back_changes_are_not_published(client, login, raise_ticket):
+    ticket_id = raise_ticket()
+    subscription = events.broker.subscribe()
+    try:
+        db.session.get(Ticket, ticket_id).status = 'Resolved'
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        assert subscription.queue.empty()
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+def test_scheduler_bulk_insert_is_published(client):
+    db.session.add(RecurringTask(title='HVAC', description='', frequency_days=7,
+                                 next_run_date=date(2026, 1, 1), assigned_dept_id=1))
+    db.session.commit()
+    subscription = events.broker.subscribe()
+    try:
+        _, ticket_ids = scheduler.run_due(date(2026, 1, 1))
+        event = subscription.get(timeout=0)
+        assert event['id'] == ticket_ids[0]
+        assert event['fields']['assigned_dept'] == 'Maintenance'
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+def test_slow_subscriber_is_told_to_resync():
+    broker = events.LocalBroker(queue_size=2)
+    subscription = broker.subscribe()
+    broker.publish([{'type': 'updated', 'id': i} for i in range(5)])
+
+    assert subscription.get(timeout=0) == {'type': 'resync'}
+    assert subscription.queue.empty()
@@ -0,0 +1,94 @@
+import pytest
+
+import analytics
+import hubai
+import rollup
+from models import db, Ticket
+
+
+def ask(client, headers, query):
+    res = client.post('/ai/query', headers=headers, json={'query': query})
+    assert res.status_code == 200
+    return res.get_json()['answer']
+
+
+@pytest.mark.parametrize('text, intent', [
+    ('Show me ticket #12', 'lookup'),
+    ('Find the ticket about the leak', 'search'),
+    ('How many open tickets are there?', 'count'),
+    ('Which department is the busiest?', 'department'),
+    ('What is the tenant satisfaction rating?', 'satisfaction'),
+    ('Give me a status report', 'summary'),
+    ('Hi there', 'hello'),
+    ('Thanks!', 'thanks'),
+    # Earlier intents win
+    ('Search the latest tickets', 'search'),
+    ('Latest issues', 'recent'),
+    ('Tell me a joke', None),
+])
+def test_questions_are_routed_by_priority(text, intent):
+    assert hubai.route(text.lower())[0] == intent
+
+
+def test_unhandled_questions_get_the_fallback(client, login):
+    gm = login('gm')
+    assert ask(client, gm, 'How many departments?') == hubai.FALLBACK
+    assert ask(client, gm, 'Tell me a joke') == hubai.FALLBACK
+
+
+def test_aggregates_are_cached_until_a_ticket_changes(client, login, count_queries, add_ticket):
+    gm = login('gm')
+    add_ticket()
+
+    assert ask(client, gm, 'How many open tickets?') == 'There are currently **1 open tickets** requiring attention (Low 1).'
+    with count_queries() as statements:
+        ask(client, gm, 'how many OPEN tickets')
+    assert not any('count(' in s.lower() for s in statements)
+
+    client.post('/tickets', headers=login('tenant'), json={'type': 'Plumbing', 'priority': 'Urgent', 'description': 'Drip'})
+    assert ask(client, gm, 'How many open tickets?') == 'There are currently **2 open tickets** requiring attention (Urgent 1, Low 1).'
+
+    # A ticket written around the ORM hooks shows up once the counters are rebuilt
+    db.session.execute(db.insert(Ticket).values(tenant_name='Tenant User', type='Plumbing', priority='Low',
+                                                description='Drip', status='Pending Approval'))
+    db.session.commit()
+    rollup.rebuild()
+    assert ask(client, gm, 'How many open tickets?') == 'There are currently **3 open tickets** requiring attention (Urgent 1, Low 2).'
+
+
+@pytest.fixture
+def mix(add_ticket):
+    # (department, status, priority) for each ticket
+    for dept, status, priority in [(1, 'In Progress', 'Urgent'), (1, 'Resolved', 'Low'), (4, 'Assigned', 'Low'),
+                                   (4, 'In Progress', 'Low'), (4, 'Pending QA', 'Urgent'),
+                                   (None, 'Pending Approval', 'Medium')]:
+        add_ticket(assigned_dept_id=dept, status=status, priority=priority)
+
+
+def test_breakdown_comes_from_one_rollup_read(client, count_queries, mix):
+    with count_queries() as statements:
+        breakdown = analytics.ticket_breakdown()
+
+    assert len(statements) == 2  # department names + counters
+    assert (breakdown['total'], breakdown['open'], breakdown['resolved'], breakdown['unassigned_open']) == (6, 5, 1, 1)
+    assert breakdown['by_priority'] == {'Urgent': {'total': 2, 'open': 2}, 'Medium': {'total': 1, 'open': 1},
+                                        'Low': {'total': 3, 'open': 2}}
+    it, maintenance = breakdown['departments'][:2]
+    assert (it['name'], it['open'], it['open_by_priority']) == ('IT', 3, {'Low': 2, 'Urgent': 1})
+    assert (maintenance['name'], maintenance['total'], maintenance['by_status']) == \
+        ('Maintenance', 2, {'In Progress': 1, 'Resolved': 1})
+
+
+def test_department_and_summary_answers(client, login, mix):
+    gm = login('gm')
+
+    assert ask(client, gm, 'Which department is busiest?') == (
+        "**IT** is currently the busiest department with **3 open tickets**.\n"
+        "**Open load by department:**\n"
+        "1. IT: 3 open (Urgent 1, Low 2)\n"
+        "2. Maintenance: 1 open (Urgent 1)\n"
+    )
+    assert ask(client, gm, 'Summary please') == (
+        "**Executive Summary**:\n- Open Issues: 5\n- Resolved: 1\n- Open by priority: Urgent 2, Medium 1, Low 2\n"
+        "- Busiest department: IT (3 open)\n- Awaiting assignment: 1\nSystem is operating normally."
+    )
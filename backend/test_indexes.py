@@ -0,0 +1,70 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Ticket, User, Department
+import sla
+
+pytestmark = pytest.mark.sqlite_only
+
+TICKET_ACCESS = re.compile(r'\b(SCAN|SEARCH) ticket\b')
+
+
+@contextmanager
+def capture_ticket_selects():
+    captured = []
+
+    def before_execute(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM ticket' in statement:
+            captured.append((statement, params))
+
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_execute)
+
+
+def query_plan(statement, params):
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def assert_uses_index(captured):
+    assert captured
+    for statement, params in captured:
+        plan = query_plan(statement, params)
+        assert not any('TEMP B-TREE FOR ORDER BY' in line for line in plan), plan
+        accesses = [line for line in plan if TICKET_ACCESS.search(line)]
+        assert accesses, plan
+        for line in accesses:
+            assert 'INDEX' in line, f'{line}\n{statement}'
+
+
+def test_endpoint_queries_use_ticket_indexes(client, login, add_ticket):
+    dept = Department.query.filter_by(name='Maintenance').first()
+    staff = User.query.filter_by(role='staff').first()
+    for i in range(20):
+        add_ticket(status='Resolved' if i % 2 else 'In Progress', assigned_dept_id=dept.id,
+                   assigned_staff_id=staff.id, staff_status='Accepted')
+
+    gm, head = login('gm'), login('dept', 'Maintenance')
+    with capture_ticket_selects() as captured:
+        first = client.get('/tickets?limit=5', headers=gm)
+        client.get(f"/tickets?limit=5&cursor={first.headers['X-Next-Cursor']}", headers=gm)
+        client.get('/tickets?limit=5', headers=head)
+        client.get('/tickets?status=Resolved&count=false', headers=gm)
+        client.get('/tickets/overdue', headers=gm)
+        sla.sweep()
+        # Shape used when resolution times are recomputed
+        Ticket.query.filter(Ticket.status == 'Resolved', Ticket.resolved_at >= datetime(2025, 1, 1)).all()
+        # Shape archive.py picks its batches with
+        Ticket.query.filter(Ticket.status == 'Resolved', Ticket.resolved_at < datetime(2025, 1, 1)) \
+            .order_by(Ticket.resolved_at).limit(500).all()
+        # Shape used by the staff views
+        Ticket.query.filter_by(assigned_staff_id=staff.id, staff_status='Accepted').all()
+    assert_uses_index(captured)
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+from sqlalchemy import event
+
+import media
+from models import db, MediaJob, Ticket
+
+
+def upload(client, data, name):
+    res = client.post('/upload', data={'file': (io.BytesIO(data), name)}, content_type='multipart/form-data')
+    return res.get_json()
+
+
+def local(url):
+    return url.split('localhost', 1)[1]
+
+
+def test_image_thumbnail_is_generated_in_background(client):
+    Image = pytest.importorskip('PIL.Image')
+    buffer = io.BytesIO()
+    Image.new('RGB', (2000, 1000), 'red').save(buffer, 'PNG')
+
+    body = upload(client, buffer.getvalue(), 'leak.png')
+    job = MediaJob.query.one()
+    assert job.status == 'queued'
+
+    # Before the worker runs, the thumbnail falls back to the original
+    pending = client.get(local(body['thumbnail_url']))
+    assert pending.status_code == 302
+    assert pending.headers['Location'].endswith(local(body['url']))
+
+    assert media.process_pending() == 1
+    assert db.session.get(MediaJob, job.id).status == 'done'
+
+    thumb = client.get(local(body['thumbnail_url']))
+    assert thumb.status_code == 200 and thumb.mimetype == 'image/jpeg'
+    with Image.open(io.BytesIO(thumb.data)) as image:
+        assert image.size == (media.THUMB_SIZE, media.THUMB_SIZE // 2)
+
+    # The same file uploaded again reuses the finished job
+    upload(client, buffer.getvalue(), 'again.png')
+    assert MediaJob.query.count() == 1
+
+
+def test_video_without_ffmpeg_is_skipped(client, monkeypatch):
+    monkeypatch.setattr(media.shutil, 'which', lambda name: None)
+    body = upload(client, b'not really a video', 'proof.mp4')
+
+    media.process_pending()
+    assert MediaJob.query.one().status == 'skipped'
+    assert client.get(local(body['thumbnail_url'])).status_code == 404
+
+
+def test_failed_jobs_retry_then_give_up(client, monkeypatch):
+    upload(client, b'corrupt', 'broken.jpg')
+    monkeypatch.setattr(media, 'generate', lambda path: 1 / 0)
+
+    for _ in range(media.MAX_ATTEMPTS):
+        media.process_pending(limit=1)
+    job = MediaJob.query.one()
+    assert job.status == 'failed' and job.attempts == media.MAX_ATTEMPTS
+    assert 'division by zero' in job.error
+
+
+def test_concurrent_uploads_share_one_job(client):
+    def other_request(session, flush_context, instances):
+        # Queues the same file between our lookup and our insert
+        with db.engine.begin() as connection:
+            connection.execute(db.insert(MediaJob).values(source_path='ab/leak.png', status='queued', attempts=0))
+    event.listen(db.session, 'before_flush', other_request, once=True)
+
+    job = media.enqueue('ab/leak.png')
+
+    assert MediaJob.query.one().id == job.id
+
+
+def test_non_media_uploads_are_not_queued(client):
+    upload(client, b'%PDF', 'invoice.pdf')
+    assert MediaJob.query.count() == 0
+
+
+def test_ticket_payload_carries_thumbnail_urls(client, add_ticket):
+    ticket_id = add_ticket(photo_url='http://localhost:5000/uploads/ab/cd/abcd.png',
+                           proof_url='https://example.com/proof.jpg')
+    data = db.session.get(Ticket, ticket_id).to_dict()
+    assert data['photo_thumb_url'] == 'http://localhost:5000/uploads/thumbs/ab/cd/abcd.png.jpg'
+    assert data['proof_thumb_url'] is None
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from models import db, Ticket, Department
+
+
+def created_at(i):
+    # Pairs share a timestamp so the id tiebreak is exercised
+    return datetime(2025, 1, 1) + timedelta(hours=i // 2)
+
+
+def test_cursor_walks_every_ticket_once(client, login, add_ticket):
+    for i in range(25):
+        add_ticket(description=f'Ticket {i}', created_at=created_at(i))
+    headers = login('gm')
+
+    seen, cursor = [], None
+    while True:
+        url = '/tickets?limit=10' + (f'&cursor={cursor}' if cursor else '')
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200
+        assert res.headers['X-Total-Count'] == '25'
+        page = res.get_json()
+        assert len(page) <= 10
+        seen.extend(t['id'] for t in page)
+        cursor = res.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 25
+    created = [db.session.get(Ticket, i).created_at for i in seen]
+    assert created == sorted(created, reverse=True)
+
+
+def test_filters_and_count_opt_out(client, login, add_ticket):
+    maintenance = Department.query.filter_by(name='Maintenance').first()
+    for i in range(3):
+        add_ticket(created_at=created_at(i), status='Assigned', priority='Urgent', assigned_dept_id=maintenance.id)
+    for i in range(4):
+        add_ticket(created_at=created_at(i), status='Resolved', type='IT')
+    headers = login('gm')
+
+    res = client.get('/tickets?status=Assigned,In Progress&priority=Urgent', headers=headers)
+    assert len(res.get_json()) == 3
+    assert res.headers['X-Total-Count'] == '3'
+
+    res = client.get('/tickets?department=Maintenance&count=false', headers=headers)
+    assert len(res.get_json()) == 3
+    assert 'X-Total-Count' not in res.headers
+
+    res = client.get('/tickets?type=IT&created_from=2025-01-01&created_to=2025-01-01', headers=headers)
+    assert {t['type'] for t in res.get_json()} == {'IT'}
+    assert len(res.get_json()) == 4
+
+
+def test_bad_parameters_are_rejected(client, login):
+    headers = login('gm')
+    assert client.get('/tickets?cursor=not-a-cursor', headers=headers).status_code == 400
+    assert client.get('/tickets?limit=ten', headers=headers).status_code == 400
+    assert client.get('/tickets?created_from=yesterday', headers=headers).status_code == 400
@@ -0,0 +1,53 @@
+import pytest
+
+from models import db, Ticket, User, Department
+
+
+@pytest.fixture
+def add_assigned_tickets(add_ticket):
+    def _add(n):
+        dept = Department.query.filter_by(name='Maintenance').first()
+        for _ in range(n):
+            # A distinct assignee per ticket so lazy loads could not hit the identity map
+            staff = User(username=f'staff_{User.query.count()}', role='staff', department_id=dept.id)
+            db.session.add(staff)
+            db.session.flush()
+            add_ticket(status='In Progress', assigned_dept_id=dept.id, assigned_staff_id=staff.id,
+                       staff_status='Accepted')
+        db.session.expunge_all()
+    return _add
+
+
+def list_query_count(client, headers, count_queries):
+    with count_queries() as statements:
+        res = client.get('/tickets?limit=500', headers=headers)
+    assert res.status_code == 200
+    assert all(t['assigned_dept'] == 'Maintenance' and t['assigned_staff_name'] for t in res.get_json())
+    return len(statements)
+
+
+def test_listing_cost_does_not_grow_with_ticket_count(client, login, count_queries, add_assigned_tickets):
+    headers = login('gm')
+
+    add_assigned_tickets(3)
+    small = list_query_count(client, headers, count_queries)
+
+    add_assigned_tickets(50)
+    large = list_query_count(client, headers, count_queries)
+
+    assert small == large
+    assert large <= 4  # version lookup + COUNT + page, with room for the cursor lookahead
+
+
+def test_action_response_does_not_lazy_load(client, login, count_queries, add_assigned_tickets):
+    add_assigned_tickets(1)
+    headers = login('dept', 'Maintenance')
+    ticket_id = Ticket.query.first().id
+    db.session.expunge_all()
+
+    with count_queries() as statements:
+        res = client.put(f'/tickets/{ticket_id}/action', json={'action': 'resolve'}, headers=headers)
+    assert res.status_code == 200
+    assert res.get_json()['assigned_dept'] == 'Maintenance'
+    selects = [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+    assert len(selects) <= 2  # load + post-commit refresh
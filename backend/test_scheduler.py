@@ -0,0 +1,133 @@
+from datetime import date, timedelta
+
+import pytest
+
+import rollup
+import scheduler
+from models import db, Department, RecurringTask, Ticket
+
+TODAY = date(2026, 3, 10)
+
+
+def add_task(policy, next_run_date, frequency_days=1, dept='Maintenance'):
+    task = RecurringTask(
+        title=f'{policy} check',
+        description='Walk the floor',
+        frequency_days=frequency_days,
+        next_run_date=next_run_date,
+        assigned_dept_id=Department.query.filter_by(name=dept).one().id if dept else None,
+        catch_up_policy=policy
+    )
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+
+@pytest.mark.parametrize('policy, tickets', [('skip', 0), ('coalesce', 1), ('backfill', 3)])
+def test_catch_up_policies(client, policy, tickets):
+    # Every other day, three runs missed, the last one yesterday
+    task_id = add_task(policy, TODAY - timedelta(days=5), frequency_days=2)
+
+    fired, ticket_ids = scheduler.run_due(TODAY)
+
+    assert len(fired) == 1
+    assert len(ticket_ids) == Ticket.query.count() == tickets
+    assert db.session.get(RecurringTask, task_id).next_run_date == TODAY + timedelta(days=1)
+
+
+def test_skip_still_fires_the_run_due_today(client):
+    add_task('skip', TODAY - timedelta(days=4), frequency_days=2)
+
+    _, ticket_ids = scheduler.run_due(TODAY)
+
+    assert len(ticket_ids) == 1
+    assert Ticket.query.one().status == 'Assigned'
+
+
+def test_coalesced_ticket_mentions_missed_runs(client):
+    add_task('coalesce', TODAY - timedelta(days=2), dept=None)
+
+    scheduler.run_due(TODAY)
+
+    ticket = Ticket.query.one()
+    assert ticket.status == 'Pending Approval'
+    assert 'Covers 3 missed runs' in ticket.description
+
+
+def test_tasks_fire_once(client):
+    add_task('backfill', TODAY - timedelta(days=2))
+
+    assert len(scheduler.run_due(TODAY)[1]) == 3
+    assert scheduler.run_due(TODAY) == ([], [])
+    assert Ticket.query.count() == 3
+
+
+def test_stale_claim_is_refused(client):
+    task_id = add_task('coalesce', TODAY)
+
+    assert scheduler.claim(task_id, TODAY, TODAY + timedelta(days=1))
+    # A second worker still holding the old run date loses
+    assert not scheduler.claim(task_id, TODAY, TODAY + timedelta(days=1))
+    db.session.commit()
+    assert db.session.get(RecurringTask, task_id).next_run_date == TODAY + timedelta(days=1)
+
+
+def test_bulk_insert_keeps_rollup_in_step(client):
+    add_task('backfill', TODAY - timedelta(days=9))
+    add_task('coalesce', TODAY - timedelta(days=9), dept='Security')
+
+    scheduler.run_due(TODAY)
+
+    _, mismatched = rollup.rebuild()
+    assert mismatched == 0
+
+
+def test_scheduler_check_endpoint(client):
+    add_task('coalesce', date.today() - timedelta(days=3))
+    add_task('coalesce', date.today() + timedelta(days=3))
+
+    body = client.post('/scheduler/check').get_json()
+
+    assert body['message'] == 'Processed 1 due tasks'
+    assert body['tickets_created'] == [t.id for t in Ticket.query.all()]
+
+
+def test_rejects_unknown_policy(client, login):
+    res = client.post('/recurring-tasks', headers=login('gm'), json={
+        'title': 'Fire drill', 'description': '', 'frequency_days': 30,
+        'next_run_date': '2026-04-01', 'catch_up_policy': 'sometimes'
+    })
+    assert res.status_code == 400
+
+
+@pytest.mark.parametrize('frequency_days', [0, -7, '1.5', None, True])
+def test_rejects_a_frequency_that_is_not_a_positive_integer(client, login, frequency_days):
+    task = {'title': 'Fire drill', 'description': '', 'frequency_days': frequency_days,
+            'next_run_date': '2026-04-01'}
+    assert client.post('/recurring-tasks', headers=login('gm'), json=task).status_code == 400
+
+    task_id = add_task('coalesce', TODAY)
+    res = client.put(f'/recurring-tasks/{task_id}', headers=login('gm'), json={'frequency_days': frequency_days})
+    assert res.status_code == 400
+    assert db.session.get(RecurringTask, task_id).frequency_days == 1
+
+
+def test_tasks_without_a_positive_frequency_never_fire(client):
+    add_task('coalesce', TODAY - timedelta(days=3), frequency_days=0)
+    timer = scheduler.Scheduler()
+    timer.load()
+
+    assert scheduler.run_due(TODAY) == ([], [])
+    assert timer.next_due() is None
+
+
+def test_timer_only_runs_when_the_earliest_task_is_due(client):
+    add_task('coalesce', TODAY + timedelta(days=2))
+    timer = scheduler.Scheduler()
+    timer.load()
+
+    assert timer.next_due() == TODAY + timedelta(days=2)
+    assert timer.tick(TODAY) == []
+
+    assert len(timer.tick(TODAY + timedelta(days=2))) == 1
+    assert timer.next_due() == TODAY + timedelta(days=3)
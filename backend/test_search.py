@@ -0,0 +1,31 @@
+from models import db, Ticket
+from search import tokenize, search_tickets
+
+
+def test_tokenize_drops_request_words():
+    assert tokenize("Search for tickets about 'water leak'") == ['water', 'leak']
+    assert tokenize('find information') == ['information']
+
+
+def test_multi_word_search_is_ranked_and_kept_in_sync(client, add_ticket):
+    pipe = db.session.get(Ticket, add_ticket(description='Leaking pipe near the water fountain'))
+    add_ticket(description='Water dispenser empty', type='General')
+    add_ticket(description='Leak in the roof, water dripping, water everywhere')
+    add_ticket(description='Lights flickering', type='Electrical')
+
+    results = search_tickets(['water', 'leak'])
+    assert len(results) == 2
+    assert results[0].description.startswith('Leak in the roof')
+
+    # Prefix matching on type, and updates reach the index
+    assert {t.type for t in search_tickets(['electric'])} == {'Electrical'}
+    pipe.description = 'Broken tile'
+    db.session.commit()
+    assert [t.id for t in search_tickets(['pipe'])] == []
+    assert [t.id for t in search_tickets(['tile'])] == [pipe.id]
+
+
+def test_hubai_search(client, login, add_ticket):
+    add_ticket(description='Leaking pipe in store 101')
+    res = client.post('/ai/query', json={'query': 'Find "leaking pipe"'}, headers=login('gm'))
+    assert 'Found **1** tickets' in res.get_json()['answer']
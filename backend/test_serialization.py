@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import serialization
+from models import Ticket
+from serialization import encode_tickets, ticket_rows
+
+
+@pytest.fixture
+def two_tickets(add_ticket):
+    """A bare ticket and one with every optional field filled in."""
+    add_ticket(photo_url='http://localhost:5000/uploads/ab/cd/abcd.jpg')
+    add_ticket(anonymous=True, type='Security', priority='Urgent', description='Door',
+               status='Pending GM Review', assigned_dept_id=2, assigned_staff_id=6, staff_status='Completed',
+               accepted_at=datetime(2024, 5, 1, 9, 30), resolved_at=datetime(2024, 5, 2, 10, 0, 0, 123456),
+               proof_url='http://localhost:5000/uploads/ef/01/ef01.mp4')
+
+
+@pytest.fixture(params=sorted(serialization.BACKENDS))
+def backend(request):
+    serialization.use(request.param)
+    yield request.param
+    serialization.use('auto')
+
+
+def test_rows_encode_like_to_dict(client, backend, two_tickets):
+    expected = json.loads(json.dumps([t.to_dict() for t in Ticket.query.order_by(Ticket.id)]))
+
+    rows = ticket_rows(Ticket.query).order_by(Ticket.id).all()
+
+    assert serialization.loads(serialization.dumps(encode_tickets(rows))) == expected
+    columns = serialization.loads(serialization.dumps(encode_tickets(rows, columns=True)))
+    assert [dict(zip(columns['fields'], row)) for row in columns['rows']] == expected
+
+
+def test_list_is_served_in_either_shape(client, login, backend, two_tickets):
+    headers = login('gm')
+
+    tickets = client.get('/tickets', headers=headers).get_json()
+    res = client.get('/tickets?format=columns', headers=headers)
+
+    assert res.mimetype == 'application/json'
+    body = res.get_json()
+    assert [dict(zip(body['fields'], row)) for row in body['rows']] == tickets
+    assert [t['tenant_name'] for t in tickets] == ['Anonymous', 'Tenant User']
+    assert tickets[0]['assigned_staff_name'] == 'security_staff'
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        serialization.use('pickle')
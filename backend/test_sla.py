@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import rollup
+import sla
+from models import db, Ticket, TicketEvent
+
+
+@pytest.fixture
+def add_overdue(add_ticket):
+    def _add(minutes_late, **fields):
+        fields.setdefault('assigned_dept_id', 4)
+        return add_ticket(status='In Progress', due_at=datetime.utcnow() - timedelta(minutes=minutes_late), **fields)
+    return _add
+
+
+def test_accepting_sets_the_deadline(client, login, act, add_ticket):
+    ticket_id = add_ticket(status='Assigned', assigned_dept_id=4)
+    head = login('dept', 'IT')
+
+    res = act(head, ticket_id, action='accept', duration_minutes='soon')
+    assert res.status_code == 400
+    assert db.session.get(Ticket, ticket_id).status == 'Assigned'
+
+    res = act(head, ticket_id, action='accept', estimated_fix_time='2 hours', duration_minutes=120)
+    assert res.status_code == 200
+    ticket = res.get_json()
+    assert ticket['due_at'] is not None and ticket['breached_at'] is None
+    due_at = datetime.fromisoformat(ticket['due_at'])
+    assert due_at - datetime.fromisoformat(ticket['accepted_at']) == timedelta(minutes=120)
+
+
+def test_overdue_list_is_scoped_and_most_overdue_first(client, login, add_ticket, add_overdue):
+    late = add_overdue(10)
+    later = add_overdue(90)
+    other_dept = add_overdue(30, assigned_dept_id=1)
+    add_ticket(status='In Progress', assigned_dept_id=4, due_at=datetime.utcnow() + timedelta(hours=1))
+    add_ticket(status='Resolved', assigned_dept_id=4, due_at=datetime.utcnow() - timedelta(hours=1))
+
+    res = client.get('/tickets/overdue', headers=login('gm'))
+    assert res.status_code == 200
+    assert [t['id'] for t in res.get_json()] == [later, other_dept, late]
+    assert [t['id'] for t in client.get('/tickets/overdue?limit=1', headers=login('gm')).get_json()] == [later]
+    assert [t['id'] for t in client.get('/tickets/overdue', headers=login('dept', 'IT')).get_json()] == [later, late]
+    assert client.get('/tickets/overdue', headers=login('dept', 'Security')).get_json() == []
+    assert client.get('/tickets/overdue?limit=x', headers=login('gm')).status_code == 400
+
+
+def test_sweep_flags_breaches_once(client, add_ticket, add_overdue):
+    overdue = [add_overdue(minutes) for minutes in (5, 15, 25, 35, 45)]
+    upcoming = add_ticket(status='In Progress', due_at=datetime.utcnow() + timedelta(hours=1))
+    resolved = add_ticket(status='Resolved', due_at=datetime.utcnow() - timedelta(hours=1))
+
+    assert sorted(sla.sweep(batch_size=2)) == overdue
+    assert sla.sweep() == []
+
+    db.session.expire_all()
+    assert all(db.session.get(Ticket, i).breached_at for i in overdue)
+    assert db.session.get(Ticket, upcoming).breached_at is None
+    assert db.session.get(Ticket, resolved).breached_at is None
+    events = TicketEvent.query.filter_by(action='sla_breach').all()
+    assert sorted(e.ticket_id for e in events) == overdue
+    assert {e.actor_role for e in events} == {'sweeper'}
+    assert sla.next_deadline() is not None
+    # Set-based writes kept the counters in step
+    assert rollup.rebuild()[1] == 0
+
+
+def test_reaccepting_clears_the_breach(client, login, act, add_overdue):
+    ticket_id = add_overdue(60)
+    sla.sweep()
+    assert db.session.get(Ticket, ticket_id).breached_at is not None
+
+    db.session.get(Ticket, ticket_id).status = 'Assigned'
+    db.session.commit()
+    res = act(login('dept', 'IT'), ticket_id, action='accept', duration_minutes=30)
+    assert res.status_code == 200
+    assert res.get_json()['breached_at'] is None
+    assert sla.sweep() == []
@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+
+import scheduler
+import ticket_log
+from models import db, RecurringTask, TicketEvent, User
+
+
+def test_rejections_are_logged_not_appended(client, login, raise_ticket, act):
+    ticket_id = raise_ticket()
+    gm, it = login('gm'), login('dept', 'IT')
+    assert act(gm, ticket_id, action='assign', department='IT').status_code == 200
+    assert act(it, ticket_id, action='dept_reject', reason='Not ours').status_code == 200
+    assert act(gm, ticket_id, action='assign', department='IT').status_code == 200
+    res = act(it, ticket_id, action='dept_reject', reason='Still not ours')
+    assert res.status_code == 200
+    ticket = res.get_json()
+
+    assert ticket['description'] == 'Leaking tap'
+    assert ticket['rejection_message'] == 'Still not ours'
+
+    history = client.get(f'/tickets/{ticket_id}/events', headers=gm).get_json()
+    assert [e['action'] for e in history] == ['create', 'assign', 'dept_reject', 'assign', 'dept_reject']
+    assert [e['payload'].get('reason') for e in history if e['action'] == 'dept_reject'] == ['Not ours', 'Still not ours']
+    assert history[1]['payload'] == {'department': 'IT'} and history[1]['status'] == 'Assigned'
+    assert history[2]['actor_role'] == 'dept'
+
+
+def test_history_follows_ticket_visibility(client, login, raise_ticket, act):
+    ticket_id = raise_ticket()
+    assert act(login('gm'), ticket_id, action='assign', department='IT').status_code == 200
+
+    assert client.get(f'/tickets/{ticket_id}/events', headers=login('dept', 'IT')).status_code == 200
+    assert client.get(f'/tickets/{ticket_id}/events', headers=login('dept', 'Security')).status_code == 404
+    assert client.get('/tickets/999/events', headers=login('gm')).status_code == 404
+
+
+def test_scheduled_tickets_are_logged(client):
+    db.session.add(RecurringTask(title='HVAC', frequency_days=7, next_run_date=date.today()))
+    db.session.commit()
+
+    _, ticket_ids = scheduler.run_due()
+
+    event = TicketEvent.query.filter_by(ticket_id=ticket_ids[0]).one()
+    assert (event.action, event.actor_role, event.status) == ('create', 'scheduler', 'Pending Approval')
+
+
+def log(ticket_id, action, status, at, actor_id=None):
+    db.session.add(TicketEvent(ticket_id=ticket_id, action=action, status=status, created_at=at, actor_id=actor_id))
+
+
+def test_workflow_analytics(client, add_ticket):
+    staff = User.query.filter_by(username='it_staff').one()
+    start = datetime(2026, 3, 1, 9)
+    tickets = [add_ticket(description=str(i)) for i in range(2)]
+    for ticket_id, rework in zip(tickets, (True, False)):
+        log(ticket_id, 'create', 'Pending Approval', start)
+        log(ticket_id, 'assign', 'Assigned', start + timedelta(hours=1))
+        log(ticket_id, 'staff_accept', 'In Progress', start + timedelta(hours=3))
+        log(ticket_id, 'staff_submit_work', 'Pending QA', start + timedelta(hours=4), staff.id)
+        if rework:
+            log(ticket_id, 'dept_reject_work', 'In Progress', start + timedelta(hours=5))
+            log(ticket_id, 'staff_submit_work', 'Pending QA', start + timedelta(hours=7), staff.id)
+    # Outside the window
+    log(tickets[1], 'gm_reject_work', 'Pending QA', start - timedelta(days=1))
+    db.session.commit()
+
+    states = ticket_log.time_in_state(start)
+    assert states['Pending Approval'] == {'tickets': 2, 'avg_seconds': 3600.0}
+    assert states['Assigned'] == {'tickets': 2, 'avg_seconds': 7200.0}
+    # One hour of work each, plus two more on the ticket sent back
+    assert states['In Progress'] == {'tickets': 2, 'avg_seconds': 7200.0}
+
+    assert ticket_log.rework(start) == {'dept_reject_work': {'events': 1, 'tickets': 1}}
+    assert ticket_log.staff_throughput(start) == [{'staff_id': staff.id, 'name': 'it_staff', 'completed': 3}]
+
+
+def test_workflow_endpoint_is_gm_only(client, login):
+    assert client.get('/dashboard/workflow', headers=login('tenant')).status_code == 403
+    assert client.get('/dashboard/workflow?days=x', headers=login('gm')).status_code == 400
+    body = client.get('/dashboard/workflow?days=7', headers=login('gm')).get_json()
+    assert body == {'days': 7, 'time_in_state': {}, 'rework': {}, 'staff_throughput': []}
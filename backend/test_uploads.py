@@ -0,0 +1,96 @@
+import hashlib
+import io
+import os
+
+from app import app
+
+
+def upload(client, data, name='proof.MP4'):
+    return client.post('/upload', data={'file': (io.BytesIO(data), name)}, content_type='multipart/form-data')
+
+
+def stored_path(url):
+    return os.path.join(app.config['UPLOAD_FOLDER'], *url.split('/uploads/', 1)[1].split('/'))
+
+
+def leftover_temp_files():
+    tmp_dir = os.path.join(app.config['UPLOAD_FOLDER'], '.tmp')
+    return os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else []
+
+
+def test_upload_is_content_addressed_and_deduplicated(client):
+    data = os.urandom(300 * 1024)
+    digest = hashlib.sha256(data).hexdigest()
+
+    first = upload(client, data).get_json()
+    assert first['url'].endswith(f'/uploads/{digest[:2]}/{digest[2:4]}/{digest}.mp4')
+    assert first['sha256'] == digest and first['size'] == len(data)
+    assert not first['deduplicated']
+
+    second = upload(client, data, name='same_video.mp4').get_json()
+    assert second['url'] == first['url'] and second['deduplicated']
+
+    with open(stored_path(first['url']), 'rb') as f:
+        assert f.read() == data
+    assert client.get(first['url'].split('localhost', 1)[1]).data == data
+    assert leftover_temp_files() == []
+
+
+def test_raw_body_upload(client):
+    data = b'raw image bytes'
+    res = client.post('/upload?filename=photo.png', data=data, content_type='image/png')
+    assert res.status_code == 201
+    url = res.get_json()['url']
+    assert url.endswith('.png')
+    with open(stored_path(url), 'rb') as f:
+        assert f.read() == data
+
+
+def test_missing_file_is_rejected(client):
+    assert client.post('/upload', data={}, content_type='multipart/form-data').status_code == 400
+    assert client.post('/upload', data=b'x').status_code == 400
+    res = client.post('/upload', data={'file': (io.BytesIO(b'x'), '')}, content_type='multipart/form-data')
+    assert res.status_code == 400
+    assert leftover_temp_files() == []
+
+
+def test_legacy_flat_uploads_still_resolve(client):
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], '1765582571_Screenshot.png'), 'wb') as f:
+        f.write(b'png')
+    assert client.get('/uploads/1765582571_Screenshot.png').data == b'png'
+
+
+def test_content_addressed_media_is_cacheable_and_ranged(client):
+    data = bytes(range(256)) * 1024
+    url = upload(client, data, name='clip.mp4').get_json()['url'].split('localhost', 1)[1]
+    digest = hashlib.sha256(data).hexdigest()
+
+    full = client.get(url)
+    assert full.headers['ETag'] == f'"{digest}"'
+    assert 'immutable' in full.headers['Cache-Control'] and 'max-age=31536000' in full.headers['Cache-Control']
+    assert full.headers['Accept-Ranges'] == 'bytes'
+    assert 'Last-Modified' in full.headers
+
+    assert client.get(url, headers={'If-None-Match': f'"{digest}"'}).status_code == 304
+    assert client.get(url, headers={'If-Modified-Since': full.headers['Last-Modified']}).status_code == 304
+
+    part = client.get(url, headers={'Range': 'bytes=1000-1999'})
+    assert part.status_code == 206
+    assert part.data == data[1000:2000]
+    assert part.headers['Content-Range'] == f'bytes 1000-1999/{len(data)}'
+
+    stale = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': '"other"'})
+    assert stale.status_code == 200 and stale.data == data
+
+
+def test_accel_redirect_offload(client):
+    url = upload(client, b'video', name='clip.mp4').get_json()['url'].split('localhost', 1)[1]
+    app.config['UPLOADS_OFFLOAD'] = 'x-accel'
+    try:
+        res = client.get(url)
+        assert res.data == b''
+        assert res.headers['X-Accel-Redirect'] == '/protected-uploads/' + url.split('/uploads/', 1)[1]
+        assert res.mimetype == 'video/mp4'
+        assert client.get('/uploads/ab/cd/missing.mp4').status_code == 404
+    finally:
+        app.config['UPLOADS_OFFLOAD'] = None
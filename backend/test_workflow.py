@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+import rollup
+import workflow
+from models import db, Ticket, TicketEvent, TicketTombstone, User
+from workflow import Transition, compile_transitions
+from writer import writes
+
+
+def staff_id(department):
+    return User.query.filter_by(role='staff', department_id=department).first().id
+
+
+def test_table_is_checked_when_compiled():
+    nothing = workflow._nothing
+    with pytest.raises(ValueError, match='duplicate source'):
+        compile_transitions([Transition('x', 'Assigned', workflow.GM, None, nothing)] * 2)
+    with pytest.raises(ValueError, match='share roles'):
+        compile_transitions([Transition('x', 'Assigned', workflow.GM, None, nothing),
+                             Transition('x', 'Rejected', workflow.DEPT, None, nothing)])
+    with pytest.raises(ValueError, match='pinned by the role scope'):
+        compile_transitions([Transition('x', 'Assigned', workflow.DEPT, None, nothing, {'assigned_dept_id': None})])
+
+
+def test_role_and_state_are_checked(client, login, act, add_ticket):
+    ticket_id = add_ticket(status='Pending Approval')
+    gm = login('gm')
+
+    assert act(gm, ticket_id, action='explode').status_code == 400
+    assert act(login('tenant'), ticket_id, action='assign', department='IT').status_code == 403
+    assert act(gm, 999, action='gm_approve_work').status_code == 404
+    res = act(gm, ticket_id, action='gm_approve_work')
+    assert res.status_code == 409
+    assert res.get_json()['message'] == 'Cannot gm_approve_work a ticket that is Pending Approval'
+
+    assert act(gm, ticket_id, action='assign', department='IT').status_code == 200
+    # Another department cannot act on it
+    assert act(login('dept', 'Security'), ticket_id, action='accept').status_code == 403
+    assert act(login('dept', 'IT'), ticket_id, action='resolve').status_code == 409
+    assert db.session.get(Ticket, ticket_id).status == 'Assigned'
+    assert [e.action for e in TicketEvent.query.filter_by(ticket_id=ticket_id)] == ['assign']
+
+
+def test_staff_actions_are_validated(client, login, act, add_ticket):
+    ticket_id = add_ticket(status='Assigned', assigned_dept_id=4)
+    it_staff = login('staff', 'IT')
+
+    # Not assigned to them yet
+    assert act(it_staff, ticket_id, action='staff_accept').status_code == 403
+    assert act(login('dept', 'IT'), ticket_id, action='assign_staff',
+               staff_id=staff_id(1)).status_code == 403
+    assert act(login('dept', 'IT'), ticket_id, action='assign_staff',
+               staff_id=staff_id(4)).status_code == 200
+
+    assert act(it_staff, ticket_id, action='staff_submit_work').status_code == 409
+    res = act(it_staff, ticket_id, action='staff_accept', duration_minutes=30)
+    assert res.status_code == 200 and res.get_json()['status'] == 'In Progress'
+    # Accepting again finds it no longer pending
+    assert act(it_staff, ticket_id, action='staff_accept').status_code == 409
+    assert act(it_staff, ticket_id, action='staff_submit_work', proof_url='/x.jpg').status_code == 200
+    assert db.session.get(Ticket, ticket_id).status == 'Pending QA'
+
+
+def test_reassignment_pins_the_current_department(client, login, act, add_ticket):
+    ticket_id = add_ticket(status='Assigned', assigned_dept_id=1)
+
+    res = act(login('gm'), ticket_id, action='assign', department='IT')
+
+    assert res.status_code == 200 and res.get_json()['assigned_dept'] == 'IT'
+    assert [t.ticket_id for t in TicketTombstone.query.filter_by(dept_id=1)] == [ticket_id]
+    assert rollup.rebuild()[1] == 0
+
+
+@pytest.mark.parametrize('queued', [True, False])
+def test_only_one_racing_action_wins(client, login, queued, add_ticket):
+    ticket_id = add_ticket(status='Pending QA', assigned_dept_id=4)
+    it = login('dept', 'IT')
+    bodies = [{'action': 'dept_approve_work'}, {'action': 'dept_reject_work', 'rejection_message': 'Redo'}] * 4
+    start = threading.Barrier(len(bodies))
+    codes = [None] * len(bodies)
+
+    def race(i):
+        start.wait()
+        codes[i] = client.put(f'/tickets/{ticket_id}/action', headers=it, json=bodies[i]).status_code
+
+    enabled, writes.enabled = writes.enabled, queued
+    try:
+        threads = [threading.Thread(target=race, args=(i,)) for i in range(len(bodies))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        writes.enabled = enabled
+
+    assert sorted(codes) == [200] + [409] * (len(bodies) - 1)
+    db.session.expire_all()
+    assert db.session.get(Ticket, ticket_id).status in ('Pending GM Review', 'In Progress')
+    assert TicketEvent.query.filter_by(ticket_id=ticket_id).count() == 1
+    assert rollup.rebuild()[1] == 0
@@ -0,0 +1,125 @@
+import threading
+from functools import partial
+
+import pytest
+from flask import Flask
+
+import database
+import sqlite_profile
+from app import app
+from models import db, Ticket
+from writer import WriteQueue
+
+
+def submit_all(queue, works):
+    results = [None] * len(works)
+
+    def run(i):
+        try:
+            results[i] = queue.submit(works[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(works))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def hold_writer(queue):
+    """Keep the writer busy so the next submissions queue up behind it."""
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+    threading.Thread(target=queue.submit, args=(block,)).start()
+    started.wait(5)
+    return release
+
+
+def test_queued_writes_commit_together(client, add_ticket):
+    queue = WriteQueue()
+    queue.init_app(app)
+    release = hold_writer(queue)
+
+    threading.Timer(0.2, release.set).start()
+    ids = submit_all(queue, [partial(add_ticket, commit=False, description=f'Leak {i}') for i in range(10)])
+
+    assert sorted(ids) == sorted(t.id for t in Ticket.query.all())
+    assert queue.jobs == 11 and queue.batches < 11
+
+
+def test_failing_write_does_not_sink_its_batch(client, add_ticket):
+    queue = WriteQueue()
+    queue.init_app(app)
+    release = hold_writer(queue)
+
+    threading.Timer(0.2, release.set).start()
+    results = submit_all(queue, [partial(add_ticket, commit=False, description=description)
+                                 for description in ('Leak', None, 'Drip')])
+
+    assert isinstance(results[1], Exception)
+    assert {t.description for t in Ticket.query.all()} == {'Leak', 'Drip'}
+
+
+def test_timed_out_write_never_commits(client, add_ticket):
+    queue = WriteQueue()
+    queue.init_app(app)
+    release = hold_writer(queue)
+
+    with pytest.raises(TimeoutError):
+        queue.submit(partial(add_ticket, commit=False), timeout=0.1)
+    release.set()
+    queue.submit(lambda: None)  # Queued behind the withdrawn job
+
+    assert Ticket.query.count() == 0
+    assert queue.jobs == 2
+
+
+def test_disabled_queue_writes_inline(client, add_ticket):
+    queue = WriteQueue()
+    queue.init_app(app)
+    queue.enabled = False
+
+    ticket_id = queue.submit(partial(add_ticket, commit=False))
+    assert db.session.get(Ticket, ticket_id).description == 'Leak'
+    assert queue.batches == 0
+
+
+@pytest.mark.sqlite_only
+@pytest.mark.parametrize('pragma, expected', [
+    ('journal_mode', 'wal'), ('synchronous', 1), ('busy_timeout', 5000), ('temp_store', 2)
+])
+def test_production_pragmas(client, pragma, expected):
+    assert db.session.execute(db.text(f'PRAGMA {pragma}')).scalar() == expected
+
+
+def test_pragmas_apply_to_the_replica_too(tmp_path):
+    other = Flask(__name__)
+    other.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+                        DATABASE_READ_URL=f"sqlite:///{tmp_path / 'replica.db'}")
+    database.init_app(other)
+    db.init_app(other)
+    sqlite_profile.init_app(other)
+
+    with other.app_context():
+        assert set(db.engines) == {None, database.REPLICA}
+        for engine in db.engines.values():
+            with engine.connect() as connection:
+                assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_pragma_overrides_are_checked():
+    values = sqlite_profile.pragmas({'SQLITE_BUSY_TIMEOUT': '10000', 'SQLITE_JOURNAL_MODE': 'delete'})
+    assert values['busy_timeout'] == 10000 and values['journal_mode'] == 'DELETE'
+    assert sqlite_profile.pragmas({'SQLITE_PROFILE': 'off', 'SQLITE_BUSY_TIMEOUT': '1'}) == {}
+
+    for name, value in [('SQLITE_BUSY_TIMEOUT', '1; DROP TABLE ticket'), ('SQLITE_JOURNAL_MODE', 'WAL; --')]:
+        with pytest.raises(ValueError, match=name):
+            sqlite_profile.pragmas({name: value})
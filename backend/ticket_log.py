@@ -0,0 +1,96 @@
+"""Append-only log of ticket transitions.
+
+A Ticket row holds the current state only. Every ticket created, and every
+action TicketAction applies, adds one TicketEvent recording who did it,
+the status it left the ticket in, and a small payload (reasons, proof,
+staff). Events are never updated or deleted. History such as rejection
+reasons lives here rather than growing ``description``, so list responses
+stay small.
+
+The workflow analytics below read one time window of ``ticket_event``
+through its ``created_at`` and ``(action, created_at)`` indexes.
+"""
+from sqlalchemy import func, select
+
+from models import db, TicketEvent, User
+
+# Actions that send work back to be done again
+REWORK = ('dept_reject_work', 'gm_reject_work', 'dept_reject')
+# A staff member handing in finished work
+COMPLETED = 'staff_submit_work'
+
+
+def record(ticket, action, actor=None, **payload):
+    """Add an event for ``ticket``'s state after ``action``; flushed with it."""
+    payload = {k: v for k, v in payload.items() if v is not None}
+    db.session.add(TicketEvent(
+        ticket=ticket, action=action,
+        actor_id=actor['id'] if actor else None,
+        actor_role=actor['role'] if actor else None,
+        status=ticket.status, payload=payload or None
+    ))
+
+
+def record_inserts(session, ticket_ids, rows, actor_role=None):
+    """Log 'create' for tickets written with a bulk INSERT."""
+    if ticket_ids:
+        session.execute(db.insert(TicketEvent), [
+            {'ticket_id': ticket_id, 'action': 'create', 'actor_role': actor_role,
+             'status': row['status'], 'created_at': row['created_at']}
+            for ticket_id, row in zip(ticket_ids, rows)
+        ])
+
+
+def record_updates(session, rows, values, action, actor, payload, now):
+    """Log ``action`` for tickets changed with a set-based UPDATE."""
+    payload = {k: v for k, v in payload.items() if v is not None} or None
+    if rows:
+        session.execute(db.insert(TicketEvent), [
+            {'ticket_id': row['id'], 'action': action, 'actor_id': actor['id'], 'actor_role': actor['role'],
+             'status': values.get('status', row['status']), 'payload': payload, 'created_at': now}
+            for row in rows
+        ])
+
+
+def history(ticket_id):
+    return TicketEvent.query.filter_by(ticket_id=ticket_id).order_by(TicketEvent.id).all()
+
+
+def time_in_state(since):
+    """Seconds tickets spent in each status, for stays that began and ended after ``since``."""
+    # When the ticket's next event moved it on
+    left_at = func.lead(TicketEvent.created_at, type_=db.DateTime).over(
+        partition_by=TicketEvent.ticket_id, order_by=TicketEvent.id)
+    stays = select(TicketEvent.ticket_id, TicketEvent.status, TicketEvent.created_at.label('entered'),
+                   left_at.label('left')).where(TicketEvent.created_at >= since).subquery()
+
+    seconds, tickets = {}, {}
+    for ticket_id, status, entered, left in db.session.execute(select(stays).where(stays.c.left.isnot(None))):
+        seconds[status] = seconds.get(status, 0.0) + (left - entered).total_seconds()
+        tickets.setdefault(status, set()).add(ticket_id)
+    return {
+        status: {'tickets': len(tickets[status]), 'avg_seconds': round(seconds[status] / len(tickets[status]), 1)}
+        for status in seconds
+    }
+
+
+def rework(since):
+    """Rejections since ``since`` per action: events and distinct tickets."""
+    rows = db.session.execute(
+        select(TicketEvent.action, func.count(), func.count(TicketEvent.ticket_id.distinct()))
+        .where(TicketEvent.action.in_(REWORK), TicketEvent.created_at >= since)
+        .group_by(TicketEvent.action)
+    )
+    return {action: {'events': events, 'tickets': tickets} for action, events, tickets in rows}
+
+
+def staff_throughput(since):
+    """Work handed in per staff member since ``since``, busiest first."""
+    rows = db.session.execute(
+        select(TicketEvent.actor_id, User.username, func.count())
+        .join(User, User.id == TicketEvent.actor_id)
+        .where(TicketEvent.action == COMPLETED, TicketEvent.created_at >= since)
+        .group_by(TicketEvent.actor_id, User.username)
+        .order_by(func.count().desc())
+    )
+    return [{'staff_id': staff_id, 'name': name, 'completed': count} for staff_id, name, count in rows]
@@ -0,0 +1,127 @@
+import base64
+from datetime import datetime, timedelta
+
+from models import db, Ticket, Department
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+FALSY = ('0', 'false', 'no', 'off')
+
+
+class QueryError(ValueError):
+    """Bad listing parameters. Resources turn this into a 400."""
+
+
+def _split(value):
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def _parse_datetime(value, name, end_of_range=False):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise QueryError(f"Invalid '{name}': expected YYYY-MM-DD or ISO datetime")
+    # A bare date as the upper bound means "up to and including that day"
+    if end_of_range and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def encode_cursor(ticket):
+    raw = f"{ticket.created_at.isoformat()}|{ticket.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, ticket_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), int(ticket_id)
+    except (ValueError, UnicodeDecodeError):
+        raise QueryError("Invalid 'cursor'")
+
+
+def scoped_query(user, model=Ticket):
+    """Tickets ``user`` (the decoded JWT identity) may see, or None for unknown roles.
+
+    ``model`` is Ticket, or TicketArchive for the archived ones.
+    """
+    role = user['role']
+    if role == 'tenant':
+        # Tenants see their own tickets (or all for demo simplicity if we want)
+        # For demo, let's show all tickets created by "Tenant User"
+        return model.query
+    if role == 'gm':
+        # GM sees all tickets
+        return model.query
+    if role in ('dept', 'staff'):
+        # Dept sees tickets assigned to their dept. Staff see their department's
+        # pool too; the dashboard narrows it to their own assignments.
+        return model.query.filter_by(assigned_dept_id=user['dept_id'])
+    return None
+
+
+def apply_filters(query, args, model=Ticket):
+    """Narrow a Ticket query with the filters supported by GET /tickets.
+
+    Multi-valued filters (status, priority, type) take comma separated lists,
+    e.g. ``?status=Assigned,In Progress``.
+    """
+    if args.get('status'):
+        query = query.filter(model.status.in_(_split(args['status'])))
+    if args.get('priority'):
+        query = query.filter(model.priority.in_(_split(args['priority'])))
+    if args.get('type'):
+        query = query.filter(model.type.in_(_split(args['type'])))
+
+    if args.get('department_id'):
+        try:
+            query = query.filter(model.assigned_dept_id == int(args['department_id']))
+        except ValueError:
+            raise QueryError("Invalid 'department_id'")
+    elif args.get('department'):
+        dept = Department.query.filter_by(name=args['department']).first()
+        # Unknown department simply matches nothing
+        query = query.filter(model.assigned_dept_id == (dept.id if dept else None))
+
+    if args.get('created_from'):
+        query = query.filter(model.created_at >= _parse_datetime(args['created_from'], 'created_from'))
+    if args.get('created_to'):
+        query = query.filter(model.created_at < _parse_datetime(args['created_to'], 'created_to', end_of_range=True))
+
+    return query
+
+
+def paginate(query, args, select=None, model=Ticket):
+    """Keyset-paginate a Ticket query on (created_at DESC, id DESC).
+
+    ``select``, if given, turns the query into one returning plain rows
+    (e.g. ``serialization.ticket_rows``); the count still runs on ``query``.
+    Returns ``(tickets, next_cursor, total)``. ``total`` is None when the
+    caller opted out with ``?count=false``; ``next_cursor`` is None on the
+    last page.
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise QueryError("Invalid 'limit'")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    total = None
+    if str(args.get('count', 'true')).lower() not in FALSY:
+        total = query.order_by(None).count()
+    if select is not None:
+        query = select(query)
+
+    if args.get('cursor'):
+        created_at, ticket_id = decode_cursor(args['cursor'])
+        query = query.filter(db.or_(
+            model.created_at < created_at,
+            db.and_(model.created_at == created_at, model.id < ticket_id)
+        ))
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor, total
@@ -0,0 +1,171 @@
+"""Content-addressed storage for uploaded photos and proof videos.
+
+Files are hashed while they stream to a temp file inside the upload folder
+and then atomically renamed to ``ab/cd/<sha256><ext>``. Identical uploads
+end up at the same path and are stored once. Older flat
+``<timestamp>_<name>`` files stay where they are and keep being served.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+
+from flask import Request, abort, current_app, g, redirect, send_from_directory, url_for
+from werkzeug.utils import safe_join, secure_filename
+
+CHUNK_SIZE = 64 * 1024
+
+# Content-addressed files never change; timestamped legacy files are only
+# ever rewritten by a same-second name clash, so cache those for a day.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LEGACY_MAX_AGE = 24 * 3600
+
+THUMBS_DIR = 'thumbs'
+
+CONTENT_ADDRESS = re.compile(r'([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{60})(\.\w+)?')
+
+
+def upload_root():
+    return current_app.config['UPLOAD_FOLDER']
+
+
+def _tmp_dir():
+    # Inside the upload folder so the final rename never crosses filesystems
+    path = os.path.join(upload_root(), '.tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class HashingFile:
+    """Writable temp file that keeps a running SHA-256 of what it receives."""
+
+    def __init__(self):
+        self.file = tempfile.NamedTemporaryFile(dir=_tmp_dir(), delete=False)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        # Cleaned up at teardown unless store() claims it first
+        g.setdefault('pending_uploads', []).append(self)
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.file.name):
+            os.remove(self.file.name)
+
+
+class UploadRequest(Request):
+    """Request that streams multipart file parts straight into HashingFile."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingFile()
+
+
+def stream_to_file(stream):
+    """Copy a raw request body into a HashingFile in fixed-size chunks."""
+    target = HashingFile()
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        target.write(chunk)
+    return target
+
+
+def store(hashed, filename):
+    """Move a finished HashingFile to its content address.
+
+    Returns ``(relative_path, deduplicated)``.
+    """
+    ext = os.path.splitext(secure_filename(filename or ''))[1].lower()
+    digest = hashed.sha256.hexdigest()
+    relative_path = f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+    destination = os.path.join(upload_root(), *relative_path.split('/'))
+
+    hashed.file.close()
+    g.pending_uploads.remove(hashed)
+    if os.path.exists(destination):
+        os.remove(hashed.file.name)
+        return relative_path, True
+
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(hashed.file.name, destination)
+    return relative_path, False
+
+
+def discard_pending(exc=None):
+    """Teardown hook removing temp files of uploads that were never stored."""
+    for hashed in g.pop('pending_uploads', []):
+        hashed.discard()
+
+
+def thumbnail_path(relative_path):
+    """Where the JPEG thumbnail (or video poster) of an upload is written."""
+    return f"{THUMBS_DIR}/{relative_path}.jpg"
+
+
+def thumbnail_url(url):
+    """Thumbnail URL for a stored ``/uploads/`` URL, or None for anything else.
+
+    The URL is derived, not looked up, so serializing a ticket costs nothing;
+    until the thumbnail exists, image thumbnails redirect to the original.
+    """
+    if not url or '/uploads/' not in url:
+        return None
+    base, relative_path = url.split('/uploads/', 1)
+    if relative_path.startswith(THUMBS_DIR + '/'):
+        return None
+    return f"{base}/uploads/{thumbnail_path(relative_path)}"
+
+
+def _missing_thumbnail(filename):
+    original = filename[len(THUMBS_DIR) + 1:-len('.jpg')]
+    path = safe_join(upload_root(), original)
+    mimetype = mimetypes.guess_type(original)[0] or ''
+    if path and os.path.isfile(path) and mimetype.startswith('image/'):
+        return redirect(url_for('uploaded_file', filename=original))
+    abort(404)
+
+
+def serve(filename):
+    """Response for ``/uploads/<filename>`` with validators and byte ranges.
+
+    Content-addressed files get their hash as a strong ETag and a year-long
+    immutable Cache-Control. Range, If-Range, If-None-Match and
+    If-Modified-Since are answered by Werkzeug's conditional handling.
+    With UPLOADS_OFFLOAD set to 'x-accel' the body is left to nginx via
+    X-Accel-Redirect; USE_X_SENDFILE does the same for Apache/lighttpd.
+    """
+    if filename.startswith(THUMBS_DIR + '/'):
+        path = safe_join(upload_root(), filename)
+        if path is None or not os.path.isfile(path):
+            return _missing_thumbnail(filename)
+
+    match = CONTENT_ADDRESS.fullmatch(filename)
+    max_age = IMMUTABLE_MAX_AGE if match else LEGACY_MAX_AGE
+
+    if current_app.config.get('UPLOADS_OFFLOAD') == 'x-accel':
+        path = safe_join(upload_root(), filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = current_app.config['UPLOADS_ACCEL_PREFIX'].rstrip('/') + '/' + filename
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response = send_from_directory(
+            upload_root(), filename, max_age=max_age, etag=match.group(3) if match else True
+        )
+        # Werkzeug only advertises this on 206s; players look for it up front
+        response.headers.setdefault('Accept-Ranges', 'bytes')
+
+    if match:
+        response.cache_control.immutable = True
+    return response
@@ -0,0 +1,319 @@
+"""Ticket state machine.
+
+Every action a user can take on a ticket is one row of TRANSITIONS: the
+status it starts from, the roles allowed, the status it leads to (None
+keeps the current one) and the fields it sets. The table is compiled at
+import into DISPATCH, a dict from action to its transitions with their
+WHERE clauses prebuilt. A request then costs a dict lookup and a role check
+before any SQL runs.
+
+A transition applies as one conditional UPDATE:
+
+    UPDATE ticket SET ... WHERE id = ? AND status = ? [AND pins] RETURNING *
+
+If another request moved the ticket first, the UPDATE matches nothing and
+the caller gets a 409. That update is never lost. No SELECT is needed
+first, because the UPDATE only matches a row whose state is already pinned
+down:
+
+- ``status`` is the transition's source.
+- dept users are pinned to their department, and staff to their own tickets.
+- ``pins`` fix any other column the transition overwrites and whose old
+  value the rollup, tombstones or live events need. ``CURRENT`` means the
+  value cannot be known in advance. It is read first and pinned, so a
+  concurrent change still makes the UPDATE miss. Reassignment needs it, and
+  so do the staff fields the workload counters are kept from.
+
+The row before the UPDATE is therefore the returned row with the source
+status and the pins put back. That is what the explicit rollup, changes,
+events and ticket_log helpers need, since a set-based UPDATE skips their
+session hooks.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, bindparam, select, update
+
+from models import db, Department, Ticket, User
+import assignment
+import changes
+import events
+import rollup
+import ticket_log
+
+CURRENT = object()  # pin to whatever the column holds when the action starts
+
+GM, DEPT, STAFF = ('gm',), ('dept',), ('staff',)
+
+TICKET = Ticket.__table__
+
+
+class TransitionError(ValueError):
+    """A request the resource rejects, with its HTTP status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# Field updates: (request data, user, now) -> (values for the UPDATE, ticket_log payload)
+
+def _department(data, user, now):
+    dept = Department.query.filter_by(name=data.get('department')).first()
+    if not dept:
+        raise TransitionError('Department not found', 404)
+    return {'assigned_dept_id': dept.id}, {'department': dept.name}
+
+
+def _dept_reject(data, user, now):
+    reason = data.get('reason', 'No reason provided')
+    # Earlier reasons stay in the event log rather than the description
+    return {'rejection_message': reason, 'assigned_dept_id': None}, {'reason': reason}
+
+
+def _estimate(data, user, now):
+    minutes = data.get('duration_minutes')  # Integer for timer
+    if minutes is not None:
+        try:
+            minutes = int(minutes)
+        except (TypeError, ValueError):
+            raise TransitionError("'duration_minutes' must be a whole number of minutes")
+    return {
+        'estimated_fix_time': data.get('estimated_fix_time'),  # Human readable string
+        'assigned_duration_minutes': minutes,
+        'accepted_at': now,
+        # The SLA deadline, swept for breaches by sla.py
+        'due_at': now + timedelta(minutes=minutes) if minutes else None,
+        'breached_at': None,
+    }, {}
+
+
+def _staff_accept(data, user, now):
+    values, payload = _estimate(data, user, now)
+    return {**values, 'staff_status': 'Accepted'}, payload
+
+
+def _assign_staff(data, user, now):
+    staff = db.session.get(User, data.get('staff_id') or 0)
+    if not staff or staff.role != 'staff':
+        raise TransitionError('Staff member not found', 404)
+    if user['role'] == 'dept' and staff.department_id != user['dept_id']:
+        raise TransitionError('Staff member is not in your department', 403)
+    return {'assigned_staff_id': staff.id, 'staff_status': 'Pending'}, {'staff_id': staff.id}
+
+
+def _auto_assign(data, user, now):
+    staff_id = assignment.least_loaded(user['dept_id'])
+    if staff_id is None:
+        raise TransitionError('No staff in your department', 404)
+    return {'assigned_staff_id': staff_id, 'staff_status': 'Pending'}, {'staff_id': staff_id}
+
+
+def _staff_reject(data, user, now):
+    return {'assigned_staff_id': None, 'staff_status': None}, {'staff_id': user['id']}
+
+
+def _proof(data, user, now):
+    proof_url = data.get('proof_url')
+    return {'proof_url': proof_url}, {'proof_url': proof_url}
+
+
+def _staff_proof(data, user, now):
+    values, payload = _proof(data, user, now)
+    return {**values, 'staff_status': 'Completed'}, payload
+
+
+def _dept_rework(data, user, now):
+    # Send back to staff; proof_url is kept for history
+    message = data.get('rejection_message')
+    return {'staff_status': 'Rejected', 'rejection_message': message}, {'reason': message}
+
+
+def _gm_rework(data, user, now):
+    # Back to the department head for QA
+    message = f"[GM]: {data.get('rejection_message', 'No reason provided')}"
+    return {'rejection_message': message}, {'reason': message}
+
+
+def _resolved(data, user, now):
+    return {'resolved_at': now}, {}
+
+
+def _nothing(data, user, now):
+    return {}, {}
+
+
+Transition = namedtuple('Transition', 'action source roles target fields pins', defaults=({},))
+
+# Handing a ticket to a staff member moves it off its previous assignee's load
+STAFFING = {'assigned_staff_id': CURRENT, 'staff_status': CURRENT}
+
+TRANSITIONS = [
+    # action, from status, roles, to status, field updates, pins
+    Transition('assign', 'Pending Approval', GM, 'Assigned', _department, {'assigned_dept_id': None}),
+    Transition('assign', 'Rejected', GM, 'Assigned', _department, {'assigned_dept_id': None}),
+    Transition('assign', 'Assigned', GM, 'Assigned', _department, {'assigned_dept_id': CURRENT}),
+    Transition('dept_reject', 'Assigned', DEPT, 'Rejected', _dept_reject),
+    Transition('accept', 'Assigned', DEPT, 'In Progress', _estimate, {'assigned_duration_minutes': CURRENT}),
+    Transition('assign_staff', 'Assigned', GM + DEPT, None, _assign_staff, STAFFING),
+    Transition('assign_staff', 'In Progress', GM + DEPT, None, _assign_staff, STAFFING),
+    Transition('auto_assign', 'Assigned', DEPT, None, _auto_assign, STAFFING),
+    Transition('auto_assign', 'In Progress', DEPT, None, _auto_assign, STAFFING),
+    Transition('staff_accept', 'Assigned', STAFF, 'In Progress', _staff_accept,
+               {'staff_status': 'Pending', 'assigned_duration_minutes': CURRENT}),
+    Transition('staff_accept', 'In Progress', STAFF, 'In Progress', _staff_accept,
+               {'staff_status': 'Pending', 'assigned_duration_minutes': CURRENT}),
+    Transition('staff_reject', 'Assigned', STAFF, None, _staff_reject, {'staff_status': 'Pending'}),
+    Transition('staff_reject', 'In Progress', STAFF, None, _staff_reject, {'staff_status': 'Pending'}),
+    Transition('resolve', 'In Progress', DEPT, 'Pending GM Review', _proof),
+    Transition('staff_submit_work', 'In Progress', STAFF, 'Pending QA', _staff_proof, {'staff_status': CURRENT}),
+    Transition('dept_approve_work', 'Pending QA', DEPT, 'Pending GM Review', _nothing),
+    Transition('dept_reject_work', 'Pending QA', DEPT, 'In Progress', _dept_rework),
+    Transition('gm_approve_work', 'Pending GM Review', GM, 'Resolved', _resolved),
+    Transition('gm_reject_work', 'Pending GM Review', GM, 'Pending QA', _gm_rework),
+]
+
+# Who each role may act on: pinned in every UPDATE it issues
+SCOPE = {'dept': ('assigned_dept_id', 'dept_id'), 'staff': ('assigned_staff_id', 'id')}
+
+
+class Compiled:
+    """One transition with its WHERE clause and UPDATE built for each role."""
+
+    def __init__(self, transition):
+        self.transition = transition
+        self.source = transition.source
+        self.target = transition.target
+        self.current = [col for col, value in transition.pins.items() if value is CURRENT]
+        self.static = {col: value for col, value in transition.pins.items() if value is not CURRENT}
+        self.conditions, self.statements = {}, {}
+        for role in transition.roles:
+            clauses = [TICKET.c.status == transition.source]
+            clauses += [TICKET.c[col].is_(None) if value is None else TICKET.c[col] == value
+                        for col, value in self.static.items()]
+            if role in SCOPE:
+                clauses.append(TICKET.c[SCOPE[role][0]] == bindparam('scope'))
+            self.conditions[role] = and_(*clauses)
+            self.statements[role] = (
+                update(TICKET)
+                .where(TICKET.c.id == bindparam('ticket_id'), self.conditions[role],
+                       *[TICKET.c[col].is_not_distinct_from(bindparam(f'current_{col}')) for col in self.current])
+                .returning(*TICKET.c))
+
+    def pins(self, user):
+        """Columns whose value the UPDATE fixed, as ``{column: value}``."""
+        pinned = dict(self.static)
+        if user['role'] in SCOPE:
+            col, key = SCOPE[user['role']]
+            pinned[col] = user[key]
+        return pinned
+
+    def params(self, user):
+        return {'scope': user[SCOPE[user['role']][1]]} if user['role'] in SCOPE else {}
+
+    def allows(self, row, user):
+        return row['status'] == self.source and all(row[col] == value for col, value in self.pins(user).items())
+
+    def values(self, values):
+        return {**values, 'status': self.target} if self.target else dict(values)
+
+
+def compile_transitions(transitions):
+    """Group the table by action, checking each action is declared consistently."""
+    dispatch = {}
+    for transition in transitions:
+        dispatch.setdefault(transition.action, []).append(Compiled(transition))
+    for action, compiled in dispatch.items():
+        first = compiled[0].transition
+        for other in compiled[1:]:
+            if (other.transition.roles, other.transition.fields) != (first.roles, first.fields):
+                raise ValueError(f'{action}: every source must share roles and field updates')
+        if len({c.source for c in compiled}) != len(compiled):
+            raise ValueError(f'{action}: duplicate source status')
+        for c in compiled:
+            scoped = {SCOPE[role][0] for role in c.transition.roles if role in SCOPE}
+            if scoped & set(c.transition.pins):
+                raise ValueError(f'{action}: {scoped & set(c.transition.pins)} is already pinned by the role scope')
+    return dispatch
+
+
+DISPATCH = compile_transitions(TRANSITIONS)
+
+
+def prepare(data, user):
+    """Look up and authorize ``data['action']``: ``(action, compiled transitions, values, payload, now)``."""
+    action = data.get('action')
+    compiled = DISPATCH.get(action)
+    if compiled is None:
+        raise TransitionError('Invalid action')
+    if user['role'] not in compiled[0].transition.roles:
+        raise TransitionError('Unauthorized', 403)
+    now = datetime.utcnow()
+    values, payload = compiled[0].transition.fields(data, user, now)
+    return action, compiled, values, payload, now
+
+
+def record(rows, values, action, user, payload, now):
+    """Bring the side tables in step with an UPDATE that changed ``rows`` (as they were) to ``values``."""
+    changes.record_updates(db.session, rows, values)
+    rollup.record_updates(db.session.connection(), rows, values)
+    events.record_updates(db.session, rows, values)
+    ticket_log.record_updates(db.session, rows, values, action, user, payload, now)
+
+
+def _refused(ticket_id, action, user):
+    """Why no transition matched: read only once the UPDATEs have missed."""
+    row = db.session.execute(select(TICKET).where(TICKET.c.id == ticket_id)).mappings().first()
+    if row is None:
+        return TransitionError('Ticket not found', 404)
+    if user['role'] in SCOPE:
+        col, key = SCOPE[user['role']]
+        if row[col] != user[key]:
+            return TransitionError('Unauthorized', 403)
+    return TransitionError(f"Cannot {action} a ticket that is {row['status']}", 409)
+
+
+def apply(ticket_id, data, user):
+    """Apply ``data['action']`` to one ticket in the current transaction.
+
+    Raises TransitionError when the action is unknown, not allowed, or the
+    ticket is not in a state it applies to.
+    """
+    action, compiled, values, payload, now = prepare(data, user)
+
+    # Earlier work in this session must reach the row before it is updated
+    db.session.flush()
+    changes.stamp_updates(db.session, values, now)
+    for transition in compiled:
+        params = {'ticket_id': ticket_id, **transition.params(user)}
+        if transition.current:
+            current = db.session.execute(
+                select(*[TICKET.c[col] for col in transition.current])
+                .where(TICKET.c.id == ticket_id, TICKET.c.status == transition.source)
+            ).mappings().first()
+            if current is None:
+                continue
+            params.update({f'current_{col}': current[col] for col in transition.current})
+        new_values = transition.values(values)
+        statement = transition.statements[user['role']].values(**new_values)
+        row = db.session.execute(statement, params).mappings().first()
+        if row is not None:
+            break
+    else:
+        raise _refused(ticket_id, action, user)
+
+    # Old values of the columns just set are unknown unless pinned
+    before = {**row, **{col: None for col in new_values}, 'status': transition.source,
+              **transition.pins(user), **{f: params[f'current_{f}'] for f in transition.current}}
+    record([before], new_values, action, user, payload, now)
+
+    expire([ticket_id])
+    return ticket_id
+
+
+def expire(ticket_ids):
+    """Drop stale copies of tickets changed behind the session's back."""
+    for ticket_id in ticket_ids:
+        ticket = db.session.identity_map.get(db.session.identity_key(Ticket, ticket_id))
+        if ticket is not None:
+            db.session.expire(ticket)
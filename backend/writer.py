@@ -0,0 +1,119 @@
+"""Single-writer queue for ticket writes.
+
+SQLite lets one connection write at a time. Rather than have every request
+thread race for the lock, TicketList.post, TicketAction.put and
+TicketBulkAction.post hand their work to one writer thread per process.
+The writer drains whatever is queued and commits it in a single
+transaction, so a burst of N writes costs one fsync instead of N.
+
+``submit(work)`` runs ``work()`` on the writer thread, with its own session,
+and returns the result once the batch has committed. If ``work`` returns a
+callable, that callable is run after the commit and its return value is
+used instead. The resources use this to build their response from the
+freshly committed row, as they did when they committed themselves. If one
+job in a batch raises, the batch is rolled back and its jobs are retried
+one by one, so only the failing request sees the error.
+
+A caller waits SUBMIT_TIMEOUT seconds. If its job is still queued by then,
+the job is withdrawn and never runs, and the caller gets TimeoutError. A
+job the writer has already picked up is in a batch that is about to
+commit, so the caller waits for that instead of reporting a failure for a
+write that lands anyway.
+
+Only these ticket writes are queued. The scheduler, the SLA sweeper, the
+archiver, media job updates and the recurring task endpoints commit on
+their own sessions. They are periodic or rare, commit in batches of their
+own, and wait for the lock through SQLite's ``busy_timeout``.
+
+With WRITE_QUEUE off, or outside SQLite, ``submit`` runs the work inline
+and commits it straight away.
+"""
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from models import db
+
+MAX_BATCH = 64
+SUBMIT_TIMEOUT = 30
+
+
+class WriteQueue:
+    def __init__(self, max_batch=MAX_BATCH):
+        self.max_batch = max_batch
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.app = None
+        self.enabled = False
+        self.batches = 0
+        self.jobs = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = (app.config.get('WRITE_QUEUE', True)
+                        and app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'))
+
+    def submit(self, work, timeout=SUBMIT_TIMEOUT):
+        if not self.enabled:
+            result = work()
+            db.session.commit()
+            return result() if callable(result) else result
+
+        self._ensure_started()
+        future = Future()
+        self._jobs.put((work, future))
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            # Withdraw a job that is still queued; one already running commits
+            if future.cancel():
+                raise
+            return future.result()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._jobs.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            # Claim each job; those whose caller gave up are dropped
+            batch = [job for job in batch if job[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            with self.app.app_context():
+                try:
+                    self._write(batch)
+                finally:
+                    db.session.remove()
+
+    def _write(self, batch):
+        try:
+            results = [work() for work, _ in batch]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+            else:
+                for job in batch:
+                    self._write([job])
+            return
+        self.batches += 1
+        self.jobs += len(batch)
+        for (_, future), result in zip(batch, results):
+            try:
+                future.set_result(result() if callable(result) else result)
+            except Exception as e:
+                future.set_exception(e)
+
+
+writes = WriteQueue()
@@ -1,4 +1,11 @@
-from app import app
+from app import app, start_timers
+
+# Each gunicorn worker imports this module, and on SQLite nothing stops
+# several of them from running the timers at once (SKIP LOCKED is a no-op
+# there). Timers start here only with HUBOPS_RUN_TIMERS set, for a single
+# worker; otherwise they run in one `flask --app app run-timers` process.
+if app.config['SCHEDULER_ENABLED'] and app.config['HUBOPS_RUN_TIMERS']:
+    start_timers()
 
 if __name__ == "__main__":
-    app.run()
\ No newline at end of file
+    app.run()
@@ -0,0 +1,116 @@
+import { useEffect, useRef } from "react";
+import axios from "axios";
+
+const TICKETS_URL = "http://localhost:5000/tickets";
+const STREAM_URL = "http://localhost:5000/tickets/stream";
+const CHANGES_URL = "http://localhost:5000/tickets/changes";
+
+// GET /tickets returns one page at a time (500 at most); follow
+// X-Next-Cursor until the last page so dashboards see every ticket.
+export const fetchAllTickets = async (token, params = {}) => {
+  const tickets = [];
+  let cursor = null;
+  do {
+    const res = await axios.get(TICKETS_URL, {
+      headers: { Authorization: `Bearer ${token}` },
+      params: { ...params, limit: 500, count: false, ...(cursor && { cursor }) },
+    });
+    tickets.push(...res.data);
+    cursor = res.headers["x-next-cursor"];
+  } while (cursor);
+  return tickets;
+};
+
+// Apply one change event from /tickets/stream to a ticket list.
+// Returns null when the list can't be patched and must be refetched.
+export const applyTicketEvent = (tickets, event) => {
+  if (event.type === "removed") {
+    return tickets.filter((t) => t.id !== event.id);
+  }
+  const index = tickets.findIndex((t) => t.id === event.id);
+  if (index === -1) {
+    // A partial update for a ticket we have never seen can't be shown
+    return event.type === "created"
+      ? [{ id: event.id, ...event.fields }, ...tickets]
+      : null;
+  }
+  const next = tickets.slice();
+  next[index] = { ...next[index], ...event.fields };
+  return next;
+};
+
+// Apply a /tickets/changes delta: drop removed ids, then upsert.
+export const applyTicketDelta = (tickets, delta) => {
+  const changed = new Map(delta.tickets.map((t) => [t.id, t]));
+  const kept = tickets
+    .filter((t) => !delta.removed.includes(t.id))
+    .map((t) => changed.get(t.id) || t);
+  const known = new Set(kept.map((t) => t.id));
+  const added = delta.tickets.filter((t) => !known.has(t.id));
+  return [...added.reverse(), ...kept];
+};
+
+// Keep `tickets` in step with server-pushed changes instead of refetching
+// the whole list after every action. After a dropped connection only the
+// changes since the last event are fetched; `refetch` runs when there is
+// nothing to resume from or the stream asks for a resync. `onChange` runs
+// after each event.
+const useTicketStream = (token, tickets, setTickets, refetch, onChange) => {
+  const current = useRef({ tickets, refetch, onChange });
+  current.current = { tickets, refetch, onChange };
+
+  useEffect(() => {
+    if (!token) return undefined;
+    const source = new EventSource(`${STREAM_URL}?jwt=${encodeURIComponent(token)}`);
+    let opened = false;
+    let seq = null;
+
+    const catchUp = async () => {
+      if (seq === null) {
+        current.current.refetch();
+        return;
+      }
+      try {
+        // Long gaps come back a page at a time
+        let more = true;
+        while (more) {
+          const res = await axios.get(`${CHANGES_URL}?since=${seq}`, {
+            headers: { Authorization: `Bearer ${token}` },
+          });
+          seq = res.data.seq;
+          more = res.data.has_more;
+          current.current.tickets = applyTicketDelta(current.current.tickets, res.data);
+        }
+        setTickets(current.current.tickets);
+      } catch (err) {
+        console.error(err);
+        current.current.refetch();
+      }
+    };
+
+    source.onopen = () => {
+      if (opened) catchUp();
+      opened = true;
+    };
+    source.onmessage = (message) => {
+      const event = JSON.parse(message.data);
+      if (event.type === "resync") {
+        current.current.refetch();
+        return;
+      }
+      if (event.seq) seq = Math.max(seq || 0, event.seq);
+      const next = applyTicketEvent(current.current.tickets, event);
+      if (next === null) {
+        current.current.refetch();
+      } else {
+        current.current.tickets = next;
+        setTickets(next);
+      }
+      if (current.current.onChange) current.current.onChange(event);
+    };
+
+    return () => source.close();
+  }, [token, setTickets]);
+};
+
+export default useTicketStream;
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { useAuth } from "../context/AuthContext";
+import useTicketStream, { fetchAllTickets } from "../hooks/useTicketStream";
 import Layout from "../components/Layout";
 import { useToast } from "../context/ToastContext";
 import InputModal from "../components/InputModal";
@@ -45,10 +46,7 @@ const DeptDashboard = () => {
 
   const fetchTickets = async () => {
     try {
-      const res = await axios.get("http://localhost:5000/tickets", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setTickets(res.data);
+      setTickets(await fetchAllTickets(token));
     } catch (err) {
       console.error(err);
     } finally {
@@ -56,6 +54,9 @@ const DeptDashboard = () => {
     }
   };
 
+  // Changes after the first load arrive over /tickets/stream
+  useTicketStream(token, tickets, setTickets, fetchTickets);
+
   const handleFileUpload = async (file) => {
     setIsUploading(true);
     const formData = new FormData();
@@ -77,7 +78,7 @@ const DeptDashboard = () => {
     if (!user?.department_id) return;
     try {
       const res = await axios.get(
-        `http://localhost:5000/departments/${user.department_id}/staff`,
+        `http://localhost:5000/departments/${user.department_id}/staff?with_load=1`,
         {
           headers: { Authorization: `Bearer ${token}` },
         }
@@ -107,7 +108,6 @@ const DeptDashboard = () => {
         },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchTickets();
       showToast("Job accepted successfully", "success");
       setEstimateTicketId(null);
       setTimeValue("");
@@ -125,7 +125,6 @@ const DeptDashboard = () => {
         { action: "assign_staff", staff_id: staffId },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchTickets();
       showToast("Staff assigned successfully", "success");
       setAssignTicketId(null);
     } catch (err) {
@@ -134,6 +133,22 @@ const DeptDashboard = () => {
     }
   };
 
+  const handleAutoAssign = async () => {
+    if (!assignTicketId) return;
+    try {
+      const res = await axios.put(
+        `http://localhost:5000/tickets/${assignTicketId}/action`,
+        { action: "auto_assign" },
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      showToast(`Assigned to ${res.data.assigned_staff_name}`, "success");
+      setAssignTicketId(null);
+    } catch (err) {
+      console.error(err);
+      showToast("Error assigning staff", "error");
+    }
+  };
+
   const handleResolve = async (ticketId) => {
     if (!proofUrl) {
       showToast("Please provide a proof URL (mock upload)", "error");
@@ -148,7 +163,6 @@ const DeptDashboard = () => {
       );
       setResolvingId(null);
       setProofUrl("");
-      fetchTickets();
       showToast("Ticket resolved successfully", "success");
     } catch (err) {
       console.error(err);
@@ -163,7 +177,6 @@ const DeptDashboard = () => {
         { action: "dept_approve_work" },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchTickets();
       showToast("Work approved", "success");
     } catch (err) {
       console.error(err);
@@ -179,7 +192,6 @@ const DeptDashboard = () => {
         { action: "dept_reject_work", rejection_message: reason },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchTickets();
       showToast("Work rejected", "error");
       setRejectTicketId(null);
     } catch (err) {
@@ -258,7 +270,7 @@ const DeptDashboard = () => {
                       Original Issue
                     </span>
                     <img
-                      src={ticket.photo_url}
+                      src={ticket.photo_thumb_url || ticket.photo_url}
                       alt="Issue"
                       className="w-full h-full object-contain"
                     />
@@ -272,7 +284,10 @@ const DeptDashboard = () => {
                   </div>
                   <div className="flex gap-2">
                     <button
-                      onClick={() => setAssignTicketId(ticket.id)}
+                      onClick={() => {
+                        setAssignTicketId(ticket.id);
+                        fetchStaff(); // Loads change as work moves
+                      }}
                       className="glass-button px-3 py-2 text-xs flex items-center gap-2"
                       title="Assign to Staff"
                     >
@@ -358,7 +373,7 @@ const DeptDashboard = () => {
                       Original Issue
                     </span>
                     <img
-                      src={ticket.photo_url}
+                      src={ticket.photo_thumb_url || ticket.photo_url}
                       alt="Issue"
                       className="w-full h-full object-contain"
                     />
@@ -498,7 +513,7 @@ const DeptDashboard = () => {
                     </span>
                     {ticket.photo_url ? (
                       <img
-                        src={ticket.photo_url}
+                        src={ticket.photo_thumb_url || ticket.photo_url}
                         alt="Issue"
                         className="w-full h-full object-contain"
                       />
@@ -662,7 +677,7 @@ const DeptDashboard = () => {
                     </span>
                     {ticket.photo_url ? (
                       <img
-                        src={ticket.photo_url}
+                        src={ticket.photo_thumb_url || ticket.photo_url}
                         className="w-full h-full object-contain"
                         alt="Issue"
                       />
@@ -767,9 +782,20 @@ const DeptDashboard = () => {
                       <Users size={16} />
                     </div>
                     <span className="font-medium">{staff.username}</span>
+                    <span className="ml-auto text-xs text-zinc-500">
+                      {staff.open_tickets} open · {staff.estimated_minutes}m
+                    </span>
                   </button>
                 ))
               )}
+              {staffList.length > 0 && (
+                <button
+                  onClick={handleAutoAssign}
+                  className="btn-primary w-full text-sm py-2 rounded-xl"
+                >
+                  Auto-assign to least loaded
+                </button>
+              )}
             </div>
           </div>
         </div>
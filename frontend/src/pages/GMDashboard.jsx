@@ -1,6 +1,7 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import { useAuth } from "../context/AuthContext";
+import useTicketStream, { fetchAllTickets } from "../hooks/useTicketStream";
 import Layout from "../components/Layout";
 import {
   BarChart,
@@ -37,13 +38,17 @@ import RecurringTasks from "../components/RecurringTasks";
 import HubAIWidget from "../components/HubAIWidget";
 import CustomSelect from "../components/CustomSelect";
 
+// In Progress tickets past their SLA deadline (up to 500)
+const OVERDUE_URL = "http://localhost:5000/tickets/overdue?limit=500";
+
 const GMDashboard = () => {
   const { token } = useAuth();
   const [tickets, setTickets] = useState([]);
   const [stats, setStats] = useState(null);
+  const [overdueTickets, setOverdueTickets] = useState([]);
   const [loading, setLoading] = useState(true);
   const [searchQuery, setSearchQuery] = useState("");
-  const [filterStatus, setFilterStatus] = useState("All"); // All, Pending, Pending Review, Active, Resolved, Rejected
+  const [filterStatus, setFilterStatus] = useState("All"); // All, Pending, Pending Review, Active, Overdue, Resolved, Rejected
   const [showNotifications, setShowNotifications] = useState(false);
   const [showSettings, setShowSettings] = useState(false);
   const [selectedTicket, setSelectedTicket] = useState(null);
@@ -56,16 +61,16 @@ const GMDashboard = () => {
 
   const fetchData = async () => {
     try {
-      const [ticketRes, statsRes] = await Promise.all([
-        axios.get("http://localhost:5000/tickets", {
-          headers: { Authorization: `Bearer ${token}` },
-        }),
+      const [allTickets, statsRes, overdueRes] = await Promise.all([
+        fetchAllTickets(token),
         axios.get("http://localhost:5000/dashboard/stats", {
           headers: { Authorization: `Bearer ${token}` },
         }),
+        axios.get(OVERDUE_URL, { headers: { Authorization: `Bearer ${token}` } }),
       ]);
-      setTickets(ticketRes.data);
+      setTickets(allTickets);
       setStats(statsRes.data);
+      setOverdueTickets(overdueRes.data);
     } catch (err) {
       console.error(err);
     } finally {
@@ -73,6 +78,28 @@ const GMDashboard = () => {
     }
   };
 
+  // Ticket changes arrive over /tickets/stream; only the stats and the
+  // overdue list are refetched
+  const statsTimer = useRef(null);
+  const fetchStats = async () => {
+    try {
+      const [statsRes, overdueRes] = await Promise.all([
+        axios.get("http://localhost:5000/dashboard/stats", {
+          headers: { Authorization: `Bearer ${token}` },
+        }),
+        axios.get(OVERDUE_URL, { headers: { Authorization: `Bearer ${token}` } }),
+      ]);
+      setStats(statsRes.data);
+      setOverdueTickets(overdueRes.data);
+    } catch (err) {
+      console.error(err);
+    }
+  };
+  useTicketStream(token, tickets, setTickets, fetchData, () => {
+    clearTimeout(statsTimer.current);
+    statsTimer.current = setTimeout(fetchStats, 1000);
+  });
+
   const handleAssign = async (ticketId, deptName) => {
     try {
       await axios.put(
@@ -80,7 +107,6 @@ const GMDashboard = () => {
         { action: "assign", department: deptName },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchData();
     } catch (err) {
       console.error(err);
       console.error(err);
@@ -99,7 +125,6 @@ const GMDashboard = () => {
       );
       setRejectTicketId(null);
       setRejectReason("");
-      fetchData();
     } catch (err) {
       console.error(err);
     }
@@ -110,9 +135,19 @@ const GMDashboard = () => {
     (t) => t.status === "Pending GM Review"
   );
 
+  // Timer logic
+  const [now, setNow] = useState(Date.now());
+
+  useEffect(() => {
+    const interval = setInterval(() => setNow(Date.now()), 30000); // Minutes are shown, so every 30s is enough
+    return () => clearInterval(interval);
+  }, []);
+
   const COLORS = ["#10b981", "#64748b", "#ef4444"];
 
-  const filteredTickets = tickets.filter((t) => {
+  // The server keeps the overdue list, most overdue first
+  const listed = filterStatus === "Overdue" ? overdueTickets : tickets;
+  const filteredTickets = listed.filter((t) => {
     const matchesSearch =
       t.description.toLowerCase().includes(searchQuery.toLowerCase()) ||
       t.type.toLowerCase().includes(searchQuery.toLowerCase());
@@ -153,14 +188,6 @@ const GMDashboard = () => {
     }
   };
 
-  // Timer logic
-  const [now, setNow] = useState(Date.now());
-
-  useEffect(() => {
-    const interval = setInterval(() => setNow(Date.now()), 1000); // Update every second
-    return () => clearInterval(interval);
-  }, []);
-
   const getTimerContent = (ticket) => {
     if (
       ticket.status === "Resolved" &&
@@ -183,38 +210,31 @@ const GMDashboard = () => {
       );
     }
 
-    if (
-      ticket.status === "In Progress" &&
-      ticket.accepted_at &&
-      ticket.assigned_duration_minutes
-    ) {
-      const start = new Date(ticket.accepted_at).getTime();
-      const durationMs = ticket.assigned_duration_minutes * 60 * 1000;
-      const deadline = start + durationMs;
-      const diff = deadline - now;
+    if (ticket.status === "In Progress" && ticket.due_at) {
+      // The deadline is set by the server when the ticket is accepted
+      const diff = new Date(ticket.due_at).getTime() - now;
 
-      const isOverdue = diff < 0;
+      const overdue = Boolean(ticket.breached_at) || diff < 0;
       const absDiff = Math.abs(diff);
 
       const hours = Math.floor(absDiff / (1000 * 60 * 60));
       const minutes = Math.floor((absDiff % (1000 * 60 * 60)) / (1000 * 60));
-      const seconds = Math.floor((absDiff % (1000 * 60)) / 1000);
 
       const timeString = `${hours.toString().padStart(2, "0")}:${minutes
         .toString()
-        .padStart(2, "0")}:${seconds.toString().padStart(2, "0")}`;
+        .padStart(2, "0")}`;
 
       return (
         <div
           className={clsx(
             "flex items-center gap-1.5 px-2 py-1 rounded text-xs font-mono font-bold border",
-            isOverdue
+            overdue
               ? "bg-red-500/10 text-red-500 border-red-500/20 animate-pulse"
               : "bg-emerald-500/10 text-emerald-500 border-emerald-500/20"
           )}
         >
           <Clock size={12} />
-          {isOverdue ? "-" : ""}
+          {overdue ? "-" : ""}
           {timeString}
         </div>
       );
@@ -240,7 +260,7 @@ const GMDashboard = () => {
       notificationCount={tickets.filter((t) => t.status === "Resolved").length}
     >
       {/* KPI Cards */}
-      <div className="grid grid-cols-1 md:grid-cols-4 gap-6 mb-8">
+      <div className="grid grid-cols-1 md:grid-cols-5 gap-6 mb-8">
         <KPICard
           title="Pending Triage"
           value={pendingTickets.length}
@@ -264,6 +284,14 @@ const GMDashboard = () => {
           onClick={() => setFilterStatus("Active")}
           active={filterStatus === "Active"}
         />
+        <KPICard
+          title="Overdue"
+          value={overdueTickets.length}
+          change="SLA"
+          color="text-red-400"
+          onClick={() => setFilterStatus("Overdue")}
+          active={filterStatus === "Overdue"}
+        />
         <KPICard
           title="Resolved Today"
           value={tickets.filter((t) => t.status === "Resolved").length}
@@ -320,7 +348,7 @@ const GMDashboard = () => {
                       <div className="w-16 h-16 bg-surface-highlight rounded-lg border border-white/5 flex items-center justify-center shrink-0 overflow-hidden cursor-pointer hover:opacity-80 transition-opacity">
                         {ticket.photo_url ? (
                           <img
-                            src={ticket.photo_url}
+                            src={ticket.photo_thumb_url || ticket.photo_url}
                             alt="Issue"
                             className="w-full h-full object-cover"
                           />
@@ -331,7 +359,7 @@ const GMDashboard = () => {
                             <Video className="text-emerald-400 w-8 h-8" />
                           ) : (
                             <img
-                              src={ticket.proof_url}
+                              src={ticket.proof_thumb_url || ticket.proof_url}
                               alt="Proof"
                               className="w-full h-full object-cover"
                             />
@@ -580,6 +608,7 @@ const GMDashboard = () => {
       {selectedTicket && (
         <TicketDetailsModal
           ticket={selectedTicket}
+          token={token}
           onClose={() => setSelectedTicket(null)}
           getStatusColor={getStatusColor}
           onApprove={() => handleGMAction(selectedTicket.id, "approve")}
@@ -670,11 +699,24 @@ const KPICard = ({ title, value, change, color, onClick, active }) => (
 
 const TicketDetailsModal = ({
   ticket,
+  token,
   onClose,
   getStatusColor,
   onApprove,
   onReject,
 }) => {
+  // Transitions, rejection reasons included, come from the event log
+  const [history, setHistory] = useState([]);
+
+  useEffect(() => {
+    axios
+      .get(`http://localhost:5000/tickets/${ticket.id}/events`, {
+        headers: { Authorization: `Bearer ${token}` },
+      })
+      .then((res) => setHistory(res.data))
+      .catch((err) => console.error("Error fetching ticket history:", err));
+  }, [ticket.id, ticket.change_seq, token]);
+
   return (
     <div className="fixed inset-0 z-[100] flex items-center justify-center bg-black/50 backdrop-blur-sm p-4">
       <div className="bg-[#161e33] border border-white/10 rounded-2xl w-full max-w-2xl p-0 relative animate-scale-in overflow-hidden flex flex-col max-h-[90vh]">
@@ -725,6 +767,16 @@ const TicketDetailsModal = ({
               {ticket.description}
             </div>
           </div>
+          {ticket.status === "Rejected" && ticket.rejection_message && (
+            <div className="p-4 bg-red-500/10 border border-red-500/20 rounded-xl">
+              <p className="text-[10px] uppercase font-bold text-red-400 mb-1">
+                Reason for Rejection
+              </p>
+              <p className="text-red-300 text-sm italic">
+                "{ticket.rejection_message}"
+              </p>
+            </div>
+          )}
           {/* Time Stats */}
           {ticket.accepted_at && (
             <div className="grid grid-cols-2 gap-4">
@@ -822,6 +874,30 @@ const TicketDetailsModal = ({
               </p>
             </div>
           </div>
+          {history.length > 0 && (
+            <div className="space-y-2">
+              <h3 className="text-sm font-medium text-zinc-400 uppercase tracking-wider">
+                History
+              </h3>
+              <ul className="space-y-1 text-xs">
+                {history.map((event) => (
+                  <li key={event.id} className="flex gap-3 text-zinc-400">
+                    <span className="font-mono text-zinc-500">
+                      {new Date(event.created_at).toLocaleString()}
+                    </span>
+                    <span className="text-zinc-300">
+                      {event.action.replace(/_/g, " ")}
+                    </span>
+                    {event.payload.reason && (
+                      <span className="italic text-red-300">
+                        "{event.payload.reason}"
+                      </span>
+                    )}
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
         </div>
 
         {/* Footer */}
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { useAuth } from "../context/AuthContext";
+import useTicketStream, { fetchAllTickets } from "../hooks/useTicketStream";
 import Layout from "../components/Layout";
 import { useToast } from "../context/ToastContext";
 import {
@@ -34,10 +35,7 @@ const StaffDashboard = () => {
 
   const fetchTickets = async () => {
     try {
-      const res = await axios.get("http://localhost:5000/tickets", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setTickets(res.data);
+      setTickets(await fetchAllTickets(token));
     } catch (err) {
       console.error(err);
     } finally {
@@ -45,6 +43,9 @@ const StaffDashboard = () => {
     }
   };
 
+  // Changes after the first load arrive over /tickets/stream
+  useTicketStream(token, tickets, setTickets, fetchTickets);
+
   const handleAction = async (ticketId, action) => {
     try {
       await axios.put(
@@ -52,7 +53,6 @@ const StaffDashboard = () => {
         { action: action },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchTickets();
       showToast(
         action === "staff_accept" ? "Job accepted" : "Job rejected",
         "success"
@@ -82,7 +82,6 @@ const StaffDashboard = () => {
         },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchTickets();
       showToast("Job accepted successfully", "success");
       setEstimateTicketId(null);
       setTimeValue("");
@@ -123,7 +122,6 @@ const StaffDashboard = () => {
       );
       setResolvingId(null);
       setProofUrl("");
-      fetchTickets();
       showToast("Work submitted for review", "success");
     } catch (err) {
       console.error(err);
@@ -199,7 +197,7 @@ const StaffDashboard = () => {
                       Original Issue
                     </span>
                     <img
-                      src={ticket.photo_url}
+                      src={ticket.photo_thumb_url || ticket.photo_url}
                       alt="Issue"
                       className="w-full h-full object-contain"
                     />
@@ -319,7 +317,7 @@ const StaffDashboard = () => {
                       Original Issue
                     </span>
                     <img
-                      src={ticket.photo_url}
+                      src={ticket.photo_thumb_url || ticket.photo_url}
                       alt="Issue"
                       className="w-full h-full object-contain"
                     />
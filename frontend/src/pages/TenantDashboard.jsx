@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { useAuth } from "../context/AuthContext";
+import useTicketStream, { fetchAllTickets } from "../hooks/useTicketStream";
 import Layout from "../components/Layout";
 import {
   Plus,
@@ -41,10 +42,7 @@ const TenantDashboard = () => {
 
   const fetchTickets = async () => {
     try {
-      const res = await axios.get("http://localhost:5000/tickets", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setTickets(res.data);
+      setTickets(await fetchAllTickets(token));
     } catch (err) {
       console.error(err);
     } finally {
@@ -52,6 +50,9 @@ const TenantDashboard = () => {
     }
   };
 
+  // Changes after the first load arrive over /tickets/stream
+  useTicketStream(token, tickets, setTickets, fetchTickets);
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
@@ -59,7 +60,6 @@ const TenantDashboard = () => {
         headers: { Authorization: `Bearer ${token}` },
       });
       setShowForm(false);
-      fetchTickets();
       setFormData({
         type: "Maintenance",
         priority: "Low",
@@ -293,7 +293,7 @@ const TenantDashboard = () => {
                   <div className="w-16 h-16 bg-surface-highlight rounded-xl flex items-center justify-center shrink-0 border border-white/5 overflow-hidden">
                     {ticket.photo_url ? (
                       <img
-                        src={ticket.photo_url}
+                        src={ticket.photo_thumb_url || ticket.photo_url}
                         alt="Issue"
                         className="w-full h-full object-cover"
                       />